@@ -0,0 +1,156 @@
+# game_actions.py
+# 合法动作生成：当前行动玩家此刻能做的全部动作，编码成定长位掩码
+# UI 按钮状态、电脑玩家 / 强化学习环境的动作选择都从这里取，不再各自推导
+
+from enum import IntEnum
+from typing import Optional
+
+from game_character_skill import SKILL_REGISTRY, SkillLevel
+
+
+class Action(IntEnum):
+    """固定动作，值即位号"""
+    ROLL = 0            # 转动天命罗盘
+    SKILL = 1           # 发动无目标的主动技能（丑牛、寅虎、卯兔、未羊）
+    BUY = 2             # 购地
+    UPGRADE = 3         # 加盖
+    ADVANCE = 4         # 技能进阶
+    MERGE_MAIN = 5      # 寅虎合体到【阳】
+    MERGE_CLONE = 6     # 寅虎合体到【阴】
+    END_TURN = 7        # 回合结束
+    TARGET = 8          # 以某名玩家为目标发动技能（子鼠），参数为座次
+    LAND = 9            # 腾翔降落到某格（酉鸡），参数为格子序号
+
+
+N_FIXED = Action.TARGET     # 固定动作占用的位数
+
+
+class ActionSpace:
+    """
+    位布局：[0, N_FIXED) 固定动作 | 每名玩家一位（技能目标） | 每个格子一位（降落点）
+    动作空间大小只取决于玩家数与格子数，整局不变
+    """
+
+    def __init__(self, n_players: int, n_tiles: int):
+        self.n_players = n_players
+        self.n_tiles = n_tiles
+        self.target_base = N_FIXED
+        self.land_base = N_FIXED + n_players
+        self.size = self.land_base + n_tiles
+
+    def bit(self, action: Action, arg: Optional[int] = None) -> int:
+        if action == Action.TARGET:
+            return self.target_base + arg
+        if action == Action.LAND:
+            return self.land_base + arg
+        return int(action)
+
+    def decode(self, bit: int) -> tuple[Action, Optional[int]]:
+        """位号 → (动作, 参数)"""
+        if bit >= self.land_base:
+            return Action.LAND, bit - self.land_base
+        if bit >= self.target_base:
+            return Action.TARGET, bit - self.target_base
+        return Action(bit), None
+
+
+class LegalActions:
+    """
+    当前行动玩家的合法动作。结果按 (回合, 子回合, 是否已转罗盘, 相关对象 version) 缓存，
+    同一帧内 UI 反复查询只计算一次。
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.space = ActionSpace(len(game.players), len(game.board.tiles))
+        self._key = None
+        self._mask = 0
+
+    # ---------- 查询 ----------
+    def mask(self, rolled: bool = False) -> int:
+        """合法动作位掩码（第 i 位为 1 表示动作 i 合法）"""
+        game = self.game
+        player = game.players[game.current_player_idx]
+        tile = game.current_tile(player)
+        key = (game.turn, game.scheduler.current, rolled, game.game_over, tile.version,
+               player.skill_mgr.version, tuple(p.version for p in game.players))
+        if key != self._key:
+            self._mask = self._compute(player, tile, rolled)
+            self._key = key
+        return self._mask
+
+    def is_legal(self, action: Action, arg: Optional[int] = None, rolled: bool = False) -> bool:
+        return bool(self.mask(rolled) >> self.space.bit(action, arg) & 1)
+
+    def actions(self, rolled: bool = False) -> list[tuple[Action, Optional[int]]]:
+        """展开成 [(动作, 参数), ...]"""
+        mask = self.mask(rolled)
+        result = []
+        while mask:
+            low = mask & -mask
+            result.append(self.space.decode(low.bit_length() - 1))
+            mask ^= low
+        return result
+
+    def as_bytes(self, rolled: bool = False) -> bytearray:
+        """定长 0/1 数组，供强化学习环境做动作屏蔽"""
+        mask = self.mask(rolled)
+        return bytearray((mask >> i) & 1 for i in range(self.space.size))
+
+    def skill_available(self, rolled: bool = False) -> bool:
+        """技能按钮是否可点：可发动技能、有可选目标 / 降落点，或寅虎待合体"""
+        mask = self.mask(rolled)
+        skill_bits = (1 << Action.SKILL | 1 << Action.MERGE_MAIN
+                      | ((1 << self.space.size) - (1 << self.space.target_base)))
+        return bool(mask & skill_bits)
+
+    def targets(self, rolled: bool = False) -> list[int]:
+        """可选为技能目标的玩家座次"""
+        return [arg for a, arg in self.actions(rolled) if a == Action.TARGET]
+
+    def landings(self, rolled: bool = False) -> list[int]:
+        """酉鸡可降落的格子"""
+        return [arg for a, arg in self.actions(rolled) if a == Action.LAND]
+
+    # ---------- 计算 ----------
+    def _compute(self, player, tile, rolled: bool) -> int:
+        game = self.game
+        if game.game_over or player.bankrupt:
+            return 0
+        space = self.space
+        mask = 1 << Action.END_TURN
+        stay = (player.status.get('puppet') or {}).get('direction') == 'stay'
+
+        if not rolled and player.can_move and not stay:
+            mask |= 1 << Action.ROLL
+        if game.can_buy(player)[0]:
+            mask |= 1 << Action.BUY
+        if game.can_upgrade(player, tile)[0] and player.last_upgrade_turn != game.turn:
+            mask |= 1 << Action.UPGRADE
+        if player.skill_mgr.upgradable:
+            mask |= 1 << Action.ADVANCE
+
+        mgr = player.skill_mgr
+        hu = mgr.skills.get('虎') if player.zodiac == '虎' else None
+        if hu is not None and player.clone_idx is not None:
+            # 分身回合走完必须合体；III 级可随时主动合体
+            if hu['split_turns'] == 0 or hu['level'] == SkillLevel.III:
+                mask |= 1 << Action.MERGE_MAIN | 1 << Action.MERGE_CLONE
+
+        definition = SKILL_REGISTRY.get(player.zodiac)
+        if rolled or stay or definition is None or definition.handler is None:
+            return mask
+        if not mgr.can_use_active_skill():
+            return mask
+
+        if definition.targeting == 'players':
+            for seat, other in enumerate(game.players):
+                if other is not player and not other.bankrupt and not other.skill_shielded():
+                    mask |= 1 << space.bit(Action.TARGET, seat)
+        elif definition.targeting == 'tiles':
+            if player.zodiac == '鸡':
+                for idx in mgr.ji_landings(game):
+                    mask |= 1 << space.bit(Action.LAND, idx)
+        elif hu is None or player.clone_idx is None:
+            mask |= 1 << Action.SKILL
+        return mask
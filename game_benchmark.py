@@ -0,0 +1,243 @@
+# game_benchmark.py
+# 核心热点的微基准：固定种子的中盘局面，输出 ns/op、每次操作留存的内存与临时内存峰值，结果写成 JSON 便于跨提交对比
+#
+# 用法：
+#   python game_benchmark.py -o bench.json               运行全部
+#   python game_benchmark.py -k rent                     只跑名称包含 rent 的项
+#   python game_benchmark.py -o new.json --compare old.json
+
+import argparse
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter_ns
+from typing import Callable
+
+from game_core import EndConditions, Game, GameBoard
+from game_factory import GameFactory
+from game_sim import midgame, new_game, play
+from game_trigger_event import trigger_bagua_encounter
+
+SEED = 7
+
+
+class Case:
+    """
+    一个基准项。setup() 返回被测状态（不计时），op(state) 为一次操作。
+    每一批操作前重新 setup 并重置随机种子，保证各次运行走同样的分支
+    """
+
+    def __init__(self, name: str, op: Callable, setup: Callable = lambda: None, batch: int = 200):
+        self.name, self.op, self.setup, self.batch = name, op, setup, batch
+
+
+def _fixture():
+    """中盘局面：每批操作前按固定种子重新走一遍，不计入计时"""
+    return midgame(SEED)
+
+
+def _cur(game):
+    return game.players[game.current_player_idx]
+
+
+def _owned_tile(game):
+    """有主且有建筑的格子，没有时取任意有主格子"""
+    owned = [t for t in game.board.tiles if t.owner is not None]
+    return max(owned, key=lambda t: t.level.value) if owned else game.board.tiles[1]
+
+
+# 技能基准的其余座次：被动技能，不会在走中盘时抢先用掉主动技能
+_PASSIVE = ['马', '狗', '猪']
+
+
+def _skill_case(zodiac: str, use: Callable) -> Case:
+    """zodiac 坐 0 号位走到中盘（不判破产，免得主角先出局），再把行动权交给它；每次调用前清空冷却"""
+    def setup():
+        game = new_game(SEED, zodiacs=[zodiac] + _PASSIVE, end_conditions=EndConditions(bankruptcy=False))
+        play(game, 60, random.Random(SEED))
+        player = game.players[0]
+        game.current_player_idx = 0
+        return game, player, player.skill_mgr
+
+    def op(state):
+        game, player, mgr = state
+        mgr.skills[zodiac]['cooldown'] = 0
+        use(game, player, mgr)
+        game.log.clear()
+    return Case(f"SkillManager.use_{_HANDLER[zodiac]}", op, setup)
+
+
+_HANDLER = {'鼠': 'shu', '牛': 'niu', '虎': 'hu', '兔': 'tu', '羊': 'yang', '鸡': 'ji'}
+
+
+def _use_hu(game, player, mgr):
+    mgr.use_hu(None, None, game)
+    mgr._merge_clones('main')          # 合体复原，下一次才能再分身
+    game.current_player_idx = 0        # 分身排入的额外回合不会被消费，回到座次起点清空，免得队列逐次增长
+
+
+def _use_ji(game, player, mgr):
+    landings = mgr.ji_landings(game)
+    if landings:
+        start = player.position
+        mgr.use_ji(None, {'from_idx': start, 'to_idx': landings[0]}, game)
+        player.position = start
+
+
+def _bagua_setup():
+    game = _fixture()
+    tiles = [t for t in game.board.tiles if getattr(t, 'bagua', None)]
+    return game, _cur(game), tiles
+
+
+def _bagua_op(state):
+    game, player, tiles = state
+    trigger_bagua_encounter(game, player, tiles[random.randrange(len(tiles))])
+    game.log.clear()
+
+
+def _rent_setup():
+    game = _fixture()
+    tile = _owned_tile(game)
+    payer = next(p for p in game.players if p is not tile.owner and not p.bankrupt)
+    payer.position = tile.idx
+    return game, tile, payer
+
+
+def _pay_rent_op(state):
+    game, tile, payer = state
+    payer.money = 10 ** 9               # 不触发欠款结算，只测租金本身
+    game.pay_rent(payer)
+    game.log.clear()
+
+
+def _next_turn_op(game):
+    game.next_turn()
+    game.log.clear()
+
+
+def _move_op(game):
+    game.move_player(_cur(game), random.randint(1, 10))
+    game.log.clear()
+
+
+def _trigger_op(game):
+    game.trigger_event(_cur(game))
+    game.log.clear()
+
+
+CASES = [
+    Case("GameBoard()", lambda _: GameBoard(), batch=50),
+    Case("Game()", lambda _: Game(["a", "b", "c", "d"], ['鼠', '牛', '虎', '兔']), batch=50),
+    Case("GameFactory.new_game", lambda f: f.new_game(["a", "b", "c", "d"], ['鼠', '牛', '虎', '兔']),
+         GameFactory, batch=50),
+    Case("Game.next_turn", _next_turn_op, _fixture),
+    Case("Game.calculate_rent", lambda s: s[0].calculate_rent(s[1], s[2]), _rent_setup, batch=2000),
+    Case("Game.pay_rent", _pay_rent_op, _rent_setup),
+    Case("Game.move_player", _move_op, _fixture),
+    Case("Game.trigger_event", _trigger_op, _fixture),
+    Case("trigger_bagua_encounter", _bagua_op, _bagua_setup),
+    _skill_case('鼠', lambda g, p, m: m.use_shu([q for q in g.players if q is not p][:1], 'backward', g)),
+    _skill_case('牛', lambda g, p, m: m.use_niu(None, None, g)),
+    _skill_case('虎', _use_hu),
+    _skill_case('兔', lambda g, p, m: m.use_tu(None, None, g)),
+    _skill_case('羊', lambda g, p, m: m.use_yang(None, None, g)),
+    _skill_case('鸡', _use_ji),
+]
+
+
+def run_case(case: Case, min_ns: int = 200_000_000) -> dict:
+    """
+    计时至少 min_ns；另跑一批在 tracemalloc 下统计内存：
+        retained_*_per_op      操作结束（含 gc）后仍被持有的内存，操作的返回值保留到统计之后
+        peak_bytes_per_op      单次操作期间临时内存的峰值（相对操作开始时），反映中间对象的分配量
+    tracemalloc 只能看到存活的内存，操作内部创建又释放的对象不会计入留存
+    """
+    ops = elapsed = 0
+    while elapsed < min_ns:
+        state = case.setup()
+        random.seed(SEED + ops)
+        start = perf_counter_ns()
+        for _ in range(case.batch):
+            case.op(state)
+        elapsed += perf_counter_ns() - start
+        ops += case.batch
+
+    state = case.setup()
+    random.seed(SEED)
+    kept = []
+    peaks = 0
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(case.batch):
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        kept.append(case.op(state))
+        peaks += tracemalloc.get_traced_memory()[1] - start
+    gc.collect()        # 操作留下的循环垃圾不算留存
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, 'filename')
+    del kept
+    return {
+        'ns_per_op': round(elapsed / ops, 1),
+        'ops': ops,
+        'retained_bytes_per_op': round(sum(d.size_diff for d in diff) / case.batch, 1),
+        'retained_blocks_per_op': round(sum(d.count_diff for d in diff) / case.batch, 2),
+        'peak_bytes_per_op': round(peaks / case.batch),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="核心热点微基准")
+    parser.add_argument('-o', '--output', help="结果 JSON 路径")
+    parser.add_argument('-k', '--filter', default='', help="只运行名称包含该字符串的项")
+    parser.add_argument('--min-ms', type=int, default=200, help="每项最少计时毫秒数")
+    parser.add_argument('--compare', help="与之前的结果 JSON 对比")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for case in CASES:
+        if args.filter not in case.name:
+            continue
+        results[case.name] = r = run_case(case, args.min_ms * 1_000_000)
+        print(f"{case.name:<28} {r['ns_per_op']:>12,.0f} ns/op  "
+              f"留存 {r['retained_blocks_per_op']:>8} 块/op  峰值 {r['peak_bytes_per_op']:>10,} B/op")
+
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': SEED,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            old = json.load(f)['results']
+        print("\n对比", args.compare)
+        for name, r in results.items():
+            if name in old:
+                ratio = r['ns_per_op'] / old[name]['ns_per_op']
+                print(f"{name:<28} {ratio:6.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
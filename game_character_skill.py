@@ -2,25 +2,9 @@
 # 游戏角色技能模块
 
 import random
-from enum import Enum
-
-def fmt_name(player, tag: str = "") -> str:
-    """
-    返回统一格式：[玩家名]角色名
-    寅虎分身回合时追加【阴】【阳】
-    """
-    from game_core import EARTHLY_NAMES
-    base = f"[{player.name}]{EARTHLY_NAMES[player.zodiac]}"
-    if player.zodiac == '虎' and tag:          # 仅在分身回合
-        mark = '阳' if tag == 'main' else '阴'
-        return f"{base}【{mark}】"
-    return base
-
-# 技能等级
-class SkillLevel(Enum):
-    I = 1
-    II = 2
-    III = 3
+from typing import NamedTuple, Optional, Callable
+from game_constants import BuildingLevel, SkillLevel, fmt_name
+from game_tracking import TrackedDict, Versioned, rebind
 
 # ===== 子鼠技能数据结构 =====
 SKILL_SHU = {
@@ -41,8 +25,7 @@ SKILL_HU = {
     'level': SkillLevel.I,
     'cooldown': 0,
     'used': 0,
-    'split_turns': 0,       # 分身剩余回合数
-    'clone_position': None, # 分身位置
+    'split_turns': 0,       # 分身剩余回合数（分身位置见 Player.clone_idx）
     'can_merge': False      # 是否可以主动合体
 }
 
@@ -60,8 +43,7 @@ SKILL_YANG = {
     'level': SkillLevel.I,
     'cooldown': 0,
     'used': 0,
-    'soul_pos': None,     # 灵魂当前位置
-    'soul_turns': 0,      # 灵魂出窍剩余回合
+    'soul_turns': 0,      # 灵魂出窍剩余回合（灵魂位置见 Player.soul_pos）
     'max_dist': 12        # I/II/III 对应 12/17/23
 }
 
@@ -72,21 +54,194 @@ SKILL_JI = {
     'used': 0
 }
 
-class SkillManager:
+# 酉鸡各等级最多跨越的拐角数
+JI_MAX_CORNERS = {SkillLevel.I: 0, SkillLevel.II: 1, SkillLevel.III: 2}
+
+# ===== 技能注册表 =====
+class SkillDef(NamedTuple):
+    """
+    单个生肖技能的静态定义。新增生肖技能只需在 SKILL_REGISTRY 中登记一条，
+    SkillManager 的分派、冷却、升级与 UI 的"进阶"按钮都会自动支持。
+    """
+    name: str                                   # 技能名
+    handler: Optional[str]                      # SkillManager 上的主动技能方法名，None=被动/未开发
+    state: Optional[dict]                       # 技能状态模板，None=无需状态
+    cooldown: dict                              # {SkillLevel: 冷却回合}（含当前回合 -1 的补偿）
+    upgrades: dict                              # {当前等级: (所需使用次数, 灵气消耗)}
+    targeting: str = 'none'                     # 'none' 无目标 / 'players' 其他玩家 / 'tiles' 格子
+    max_targets: dict = {}                      # {SkillLevel: 最多目标数}，仅 targeting='players'
+    on_upgrade: Optional[Callable] = None       # 升级成功后的额外处理 (skill, new_level)
+
+def _flat_cooldown(turns: int) -> dict:
+    return {lv: turns for lv in SkillLevel}
+
+def _tu_on_upgrade(skill, new_level):
+    if new_level == SkillLevel.III:
+        skill['multiplier'] = 3
+
+SKILL_REGISTRY = {
+    '鼠': SkillDef('灵鼠窃运', 'use_shu', SKILL_SHU,
+                   {SkillLevel.I: 4, SkillLevel.II: 4, SkillLevel.III: 5},
+                   {SkillLevel.I: (3, 100), SkillLevel.II: (6, 250)},
+                   targeting='players',
+                   max_targets={SkillLevel.I: 1, SkillLevel.II: 1, SkillLevel.III: 2}),
+    '牛': SkillDef('蛮牛冲撞', 'use_niu', SKILL_NIU, _flat_cooldown(3),
+                   {SkillLevel.I: (2, 150), SkillLevel.II: (4, 300)}),
+    '虎': SkillDef('猛虎分身', 'use_hu', SKILL_HU,
+                   {SkillLevel.I: 3, SkillLevel.II: 3, SkillLevel.III: 4},
+                   {SkillLevel.I: (2, 200), SkillLevel.II: (4, 400)}),
+    '兔': SkillDef('玉兔疾行', 'use_tu', SKILL_RABBIT, _flat_cooldown(3),
+                   {SkillLevel.I: (3, 100), SkillLevel.II: (6, 200)},
+                   on_upgrade=_tu_on_upgrade),
+    '龙': SkillDef('真龙吐息', None, None, _flat_cooldown(0), {}),
+    '蛇': SkillDef('灵蛇隐踪', None, None, _flat_cooldown(0), {}),
+    '马': SkillDef('天马守护', None, None, _flat_cooldown(0), {}),      # 被动技能，无冷却
+    '羊': SkillDef('灵羊出窍', 'use_yang', SKILL_YANG, _flat_cooldown(5), {}),
+    '猴': SkillDef('灵猴百变', None, None, _flat_cooldown(0), {}),
+    '鸡': SkillDef('金鸡腾翔', 'use_ji', SKILL_JI, _flat_cooldown(3),
+                   {SkillLevel.I: (3, 200), SkillLevel.II: (6, 400)},
+                   targeting='tiles'),
+    '狗': SkillDef('天狗护体', None, None, _flat_cooldown(0), {}),      # 被动技能，无冷却
+    '猪': SkillDef('福猪破障', None, None, _flat_cooldown(2), {}),
+}
+
+# ===== 技能状态记录 =====
+class SkillState:
+    """
+    单个生肖技能的紧凑状态：每个玩家只保存自己生肖的一份，字段由注册表中的状态模板决定（__slots__）。
+    冷却以"可再次发动的独立回合 ready_turn"存储并与 Game.turn 比较，不再每回合递减；
+    skill['cooldown'] 仍可读写，读出的是按玩家人数折算的剩余己方回合数。
+    """
+    __slots__ = ('_mgr', 'level', 'used', 'ready_turn')
+    _fields = ('level', 'used', 'ready_turn')
+
+    def __init__(self, mgr, template: dict):
+        object.__setattr__(self, '_mgr', mgr)
+        object.__setattr__(self, 'ready_turn', 0)
+        for k, v in template.items():
+            object.__setattr__(self, k, v)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        self._mgr.touch()
+
+    @property
+    def cooldown(self) -> int:
+        turn, players = self._mgr._clock()
+        left = self.ready_turn - turn
+        return 0 if left <= 0 else -(-left // players)
+
+    @cooldown.setter
+    def cooldown(self, value: int):
+        # 冷却 k 表示还要经过 k 次己方回合结束，即 (k-1) 轮之后的下一个独立回合
+        turn, players = self._mgr._clock()
+        self.ready_turn = turn + (value - 1) * players + 1 if value > 0 else turn
+
+    # 兼容原先的字典式访问
+    def __getitem__(self, key):
+        if key != 'cooldown' and key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key != 'cooldown' and key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key == 'cooldown' or key in self._fields
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __repr__(self):
+        fields = ', '.join(f"{k}={getattr(self, k)!r}" for k in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+    # 生肖子类由 _state_class() 动态生成，不在模块属性里，pickle 按生肖重建；
+    # _mgr 放在 state 里，等 SkillManager 建好后由 __setstate__ 绑定，不触发 touch
+    def __reduce__(self):
+        return _blank_state, (self._zodiac,), (self._mgr, {k: getattr(self, k) for k in self._fields})
+
+    def __setstate__(self, state):
+        mgr, fields = state
+        object.__setattr__(self, '_mgr', mgr)
+        for k, v in fields.items():
+            object.__setattr__(self, k, v)
+
+    def copy_for(self, mgr) -> "SkillState":
+        """复制一份挂到 mgr 上（字段均为标量，直接共用）"""
+        state = object.__new__(type(self))
+        object.__setattr__(state, '_mgr', mgr)
+        for k in self._fields:
+            object.__setattr__(state, k, getattr(self, k))
+        return state
+
+
+_STATE_CLASSES: dict = {}
+
+def _state_class(zodiac: str) -> type:
+    """按注册表的状态模板为每个生肖生成一个只含所需字段的 SkillState 子类"""
+    cls = _STATE_CLASSES.get(zodiac)
+    if cls is None:
+        extra = tuple(k for k in SKILL_REGISTRY[zodiac].state
+                      if k not in SkillState._fields and k != 'cooldown')
+        cls = type(f"SkillState_{zodiac}", (SkillState,), {
+            '__slots__': extra,
+            '_fields': SkillState._fields + extra,
+            '_zodiac': zodiac,
+        })
+        _STATE_CLASSES[zodiac] = cls
+    return cls
+
+def _blank_state(zodiac: str) -> SkillState:
+    """pickle 重建用：未填字段的空状态"""
+    return object.__new__(_state_class(zodiac))
+
+def new_skill_state(mgr, zodiac: str) -> Optional[SkillState]:
+    """创建某生肖的初始技能状态；被动/未开发技能返回 None"""
+    template = SKILL_REGISTRY[zodiac].state
+    if template is None:
+        return None
+    template = {k: v for k, v in template.items() if k != 'cooldown'}
+    return _state_class(zodiac)(mgr, template)
+
+class SkillManager(Versioned):
     """每个玩家自带一个实例，负责冷却、升级与触发"""
     def __init__(self, player):
         self.player = player
         self.can_use_skill = True
         self.cooldown_buff = 0
-        self.skills = {
-            '鼠': SKILL_SHU.copy(),
-            '牛': SKILL_NIU.copy(),
-            '虎': SKILL_HU.copy(),
-            '兔': SKILL_RABBIT.copy(),
-            '羊': SKILL_YANG.copy(),
-            '鸡': SKILL_JI.copy()
-        }
+        # 只保存本生肖的技能状态
+        state = new_skill_state(self, player.zodiac) if player.zodiac in SKILL_REGISTRY else None
+        self.skills = {player.zodiac: state} if state is not None else {}
         self.shu_iii_used_this_turn = 0  # 仅供子鼠 III 级使用
+        self._upgradable_key = None      # (version, energy)，用于缓存 upgradable
+        self._upgradable = False
+
+    def clone_for(self, player) -> "SkillManager":
+        """以本实例为原型复制一份给 player：供 GameFactory 批量建局，不重新走 __init__"""
+        mgr = SkillManager.__new__(SkillManager)
+        d = mgr.__dict__
+        for k, v in self.__dict__.items():
+            d[k] = rebind(v, mgr)
+        d['player'] = player
+        skills = TrackedDict(mgr)
+        for z, state in self.skills.items():
+            dict.__setitem__(skills, z, state.copy_for(mgr))
+        d['skills'] = skills
+        return mgr
+
+    def _owning_game(self):
+        player = self.__dict__.get('player')
+        return player.__dict__.get('game') if player is not None else None
+
+    def _clock(self) -> tuple[int, int]:
+        """返回 (当前独立回合, 未出局玩家人数)，未绑定游戏时视为 (0, 1)"""
+        game = self._owning_game()
+        if game is None:
+            return 0, 1
+        return game.turn, max(1, len(game.active_players))
 
     def can_use_active_skill(self):
         """检查玩家是否可以使用主动技能"""
@@ -103,7 +258,7 @@ class SkillManager:
                     return False  # 被子鼠II级技能封锁，无法使用技能
 
         # 子鼠 III 级可以使用两次按钮
-        if self.skills['鼠']['level'] == SkillLevel.III.value and self.shu_iii_used_this_turn < 2 :
+        if self.player.zodiac == '鼠' and self.skills['鼠']['level'] == SkillLevel.III and self.shu_iii_used_this_turn < 2 :
             # self.skills['鼠']['cooldown'] = 0
             return True
 
@@ -115,37 +270,58 @@ class SkillManager:
 
     def set_skill_cooldown(self):
         z = self.player.zodiac
-        skill = self.skills[z]
-        level = skill['level']
-        # 由于当前回合 cooldown 就会 -1 所以设置的时候需要 +1
-        if z == '鼠':
-            skill['cooldown'] = 5 if level == SkillLevel.III.value else 4
-        elif z == '牛':
-            skill['cooldown'] = 3
-        elif z == '虎':
-            skill['cooldown'] = 4 if level == SkillLevel.III.value else 3
-        elif z == '兔':
-            skill['cooldown'] = 3
-        elif z == '龙':
-            pass
-        elif z == '蛇':
-            pass
-        elif z == '马':
-            pass                        # 被动技能，无冷却
-        elif z == '羊':
-            skill['cooldown'] = 5
-        elif z == '猴':
-            pass
-        elif z == '鸡':
-            skill['cooldown'] = 3
-        elif z == '狗':
-            pass                        # 被动技能，无冷却
-        elif z == '猪':
-            skill['cooldown'] = 2
+        skill = self.skills.get(z)
+        if skill is None:
+            return                      # 被动技能/未开发技能，无冷却
+        # 由于当前回合 cooldown 就会 -1 所以设置的时候需要 +1（已计入注册表数值）
+        skill['cooldown'] = SKILL_REGISTRY[z].cooldown[skill['level']]
 
         # 考虑cooldown_buff的增、减益效果
         skill['cooldown'] += self.cooldown_buff
 
+    # ------------- 技能升级 ----------------
+    def next_upgrade(self, zodiac: str = None) -> Optional[tuple[int, int]]:
+        """返回当前等级升级所需 (使用次数, 灵气)，已满级或无升级路线时返回 None"""
+        z = zodiac or self.player.zodiac
+        skill = self.skills.get(z)
+        if skill is None:
+            return None
+        return SKILL_REGISTRY[z].upgrades.get(skill['level'])
+
+    def can_upgrade(self, zodiac: str = None) -> bool:
+        need = self.next_upgrade(zodiac)
+        if need is None:
+            return False
+        used, energy = need
+        return self.skills[zodiac or self.player.zodiac]['used'] >= used and self.player.energy >= energy
+
+    @property
+    def upgradable(self) -> bool:
+        """
+        当前生肖技能此刻能否进阶（UI 每帧读取）。
+        只在技能状态版本号或灵气变化后才重新计算
+        """
+        key = (self.version, self.player.energy)
+        if key != self._upgradable_key:
+            self._upgradable = self.can_upgrade()
+            self._upgradable_key = key
+        return self._upgradable
+
+    def upgrade(self, zodiac: str = None) -> bool:
+        """按注册表的门槛升级技能，成功返回 True"""
+        z = zodiac or self.player.zodiac
+        if not self.can_upgrade(z):
+            return False
+        skill = self.skills[z]
+        _, energy = self.next_upgrade(z)
+        new_level = SkillLevel(skill['level'].value + 1)
+        skill['level'] = new_level
+        self.player.spend_energy(energy, "技能进阶")
+        on_upgrade = SKILL_REGISTRY[z].on_upgrade
+        if on_upgrade is not None:
+            on_upgrade(skill, new_level)
+        return True
+
     # ------------- 统一外部调用接口 ----------------
     def use_active_skill(self, target_list=None, option=None, game=None):
         """
@@ -169,55 +345,44 @@ class SkillManager:
         if z in self.skills and self.skills[z]['cooldown'] > 0:
             return False, f"技能冷却中，还需 {self.skills[z]['cooldown']} 回合"
 
-        if z == '鼠':
-            return self.use_shu(target_list, option)
-        elif z == '牛':
-            return self.use_niu(target_list, option, game)
-        elif z == '虎':
-            return self.use_hu(target_list, option, game)
-        elif z == '兔':
-            return self.use_tu(target_list, option)
-        elif z == '羊':
-            return self.use_yang(target_list, option)
-        elif z == '鸡':
-            return self.use_ji(target_list, option, game)
-        else:
+        definition = SKILL_REGISTRY.get(z)
+        if definition is None or definition.handler is None:
             return False, "暂无主动技能"
+        return getattr(self, definition.handler)(target_list, option, game)
 
     # ------------- 鼠 - 灵鼠窃运 ----------------
-    def use_shu(self, target_list, direction):
+    def use_shu(self, target_list, direction, game=None):
         """
         子鼠技能——灵鼠窃运：指定一名其他玩家，控制其下一回合的移动方向（可强制其向反方向移动或原地停留），高级技能可以进行除移动外的其他操作
         """
-        from game_core import Player
-
         if not target_list:
             return False, "未选择目标"
 
         skill = self.skills['鼠']
         level = skill['level']
-        turns = 2 if level == SkillLevel.III.value else 1     # 只有III级可以操控两个回合
-        lock_skill = (level == SkillLevel.II.value)           # 技能等级II级能够封锁技能
-        skip_turn = (level == SkillLevel.III.value)           # 技能等级III级能够跳过回合
+        turns = 2 if level == SkillLevel.III else 1     # 只有III级可以操控两个回合
+        lock_skill = (level == SkillLevel.II)           # 技能等级II级能够封锁技能
+        skip_turn = (level == SkillLevel.III)           # 技能等级III级能够跳过回合
+        max_targets = SKILL_REGISTRY['鼠'].max_targets[level]
 
         if skill['cooldown'] > 0:
             return False, "【灵鼠窃运】技能冷却中"
 
         # III 级：每回合最多发动 2 次，每次只能选 1 人
-        if level == SkillLevel.III.value:
+        if level == SkillLevel.III:
             if self.shu_iii_used_this_turn >= 2:
                 return False, "【灵鼠窃运】本回合已发动 2 次，无法继续使用"
 
-        if level != SkillLevel.III.value and len(target_list) != 1:          # 等级 I和II 仅允许 1 个目标
+        if max_targets == 1 and len(target_list) != 1:          # 等级 I和II 仅允许 1 个目标
             return False, "等级 I / II：必须且只能指定一名目标玩家"
-        elif level == SkillLevel.III.value and (len(target_list) > 2 or len(target_list) <= 0):
+        elif len(target_list) > max_targets or len(target_list) <= 0:
             return False, "等级 III：最多能指定两名目标玩家，至少指定一名玩家"
 
         names = ",".join(fmt_name(p) for p in target_list)
 
         # 支持多目标
         for target in target_list:
-            assert isinstance(target, Player)
+            assert isinstance(target, type(self.player))
             if not target.can_be_skill_targeted():
                 return False, f"{self.player.name} 无法对 [{names}] 发动【灵鼠窃运】"
             if direction == 'backward':     # 反向
@@ -237,7 +402,7 @@ class SkillManager:
                 target.can_move = False
 
         # 设置技能冷却
-        if level == SkillLevel.III.value:
+        if level == SkillLevel.III:
             self.shu_iii_used_this_turn += 1
             if self.shu_iii_used_this_turn == 2:
                 # 第二次发动后进入冷却
@@ -249,22 +414,8 @@ class SkillManager:
 
         return True, f"{self.player.name} 对 [{names}] 发动【灵鼠窃运】"
 
-    def upgrade_shu(self):
-        skill = self.skills['鼠']
-        lvl, used, eng = skill['level'], skill['used'], self.player.energy
-
-        # 升级 I→II
-        if lvl == SkillLevel.I and used >= 3 and eng >= 100:
-            skill['level'] = SkillLevel.II.value
-            self.player.energy -= 100
-            return True
-
-        # 升级 II→III
-        if lvl == SkillLevel.II and used >= 6 and eng >= 250:
-            skill['level'] = SkillLevel.III.value
-            self.player.energy -= 250
-            return True
-        return False
+    def upgrade_shu(self) -> bool:
+        return self.upgrade('鼠')
 
     # ------------- 牛 - 蛮牛冲撞 ----------------
     def use_niu(self, target_list=None, option=None, game=None) -> tuple[bool, str]:
@@ -298,20 +449,8 @@ class SkillManager:
 
         return True, f"{fmt_name(self.player)} 发动【蛮牛冲撞】，横冲直撞破坏沿途建筑！"
 
-    def upgrade_niu(self):
-        """升级丑牛技能"""
-        skill = self.skills['牛']
-        lvl, used, eng = skill['level'], skill['used'], self.player.energy
-
-        if lvl == SkillLevel.I and used >= 2 and eng >= 150:
-            skill['level'] = SkillLevel.II
-            self.player.energy -= 150
-            return True
-        if lvl == SkillLevel.II and used >= 4 and eng >= 300:
-            skill['level'] = SkillLevel.III
-            self.player.energy -= 300
-            return True
-        return False
+    def upgrade_niu(self) -> bool:
+        return self.upgrade('牛')
 
     # ------------- 虎 - 猛虎分身 ----------------
     def use_hu(self, target_list=None, option=None, game=None) -> tuple[bool, str]:
@@ -337,12 +476,11 @@ class SkillManager:
         if skill['cooldown'] > 0:
             return False, "【猛虎分身】冷却中"
 
-        # 生成两个独立子回合
-        game.tiger_sub_turns = [(self.player, "clone")]
+        # 本回合结束后立即进行一次分身子回合，此后每轮先【阳】后【阴】
+        game.scheduler.grant_extra_turn(self.player, 'clone')
         self.set_skill_cooldown()
         skill['split_turns'] = 2 if level == SkillLevel.I else 3
         skill['used'] += 1
-        skill['clone_position'] = self.player.position
         self.player.clone_idx = self.player.position   # 分身出生位置
 
         # 状态
@@ -365,8 +503,9 @@ class SkillManager:
         skill_level = skill['level']
 
         # 计算最终落点
-        if merge_to == 'clone' and skill['clone_position'] is not None:
-            final_pos = skill['clone_position']
+        self.player.control('main')
+        if merge_to == 'clone' and self.player.clone_idx is not None:
+            final_pos = self.player.clone_idx
             mark = '阴'
         else:                       # 默认合体到主体（阳）
             final_pos = self.player.position
@@ -377,7 +516,6 @@ class SkillManager:
 
         # 统一清理
         skill['split_turns'] = 0
-        skill['clone_position'] = None
         self.player.clone_idx = None          # 合体后消失
         skill['can_merge'] = False
         self.player.status.pop('tiger_split', None)
@@ -385,20 +523,10 @@ class SkillManager:
         return True, f"{fmt_name(self.player)} 合体到【{mark}】位置 {final_pos}"
 
     def upgrade_hu(self) -> bool:
-        skill = self.skills['虎']
-        lvl, used, eng = skill['level'], skill['used'], self.player.energy
-        if lvl == SkillLevel.I and used >= 2 and eng >= 200:
-            skill['level'] = SkillLevel.II
-            self.player.energy -= 200
-            return True
-        if lvl == SkillLevel.II and used >= 4 and eng >= 400:
-            skill['level'] = SkillLevel.III
-            self.player.energy -= 400
-            return True
-        return False
+        return self.upgrade('虎')
 
     # ------------- 兔 - 玉兔疾行 ----------------
-    def use_tu(self, target_list=None, option=None):
+    def use_tu(self, target_list=None, option=None, game=None):
         skill = self.skills['兔']
         if skill['cooldown'] > 0:
             return False, "【玉兔疾行】冷却中"
@@ -407,28 +535,17 @@ class SkillManager:
         self.set_skill_cooldown()
         return True, f"{self.player.name} 发动【玉兔疾行】加速{skill['multiplier']}倍"
 
-    def upgrade_tu(self):
-        skill = self.skills['兔']
-        lvl, used, eng = skill['level'], skill['used'], self.player.energy
-        if lvl == SkillLevel.I and used >= 3 and eng >= 100:
-            skill['level'] = SkillLevel.II
-            self.player.energy -= 100
-            return True
-        if lvl == SkillLevel.II and used >= 6 and eng >= 200:
-            skill['level'] = SkillLevel.III
-            skill['multiplier'] = 3
-            self.player.energy -= 200
-            return True
-        return False
+    def upgrade_tu(self) -> bool:
+        return self.upgrade('兔')
 
     # ------------- 羊 - 灵羊出窍 ----------------
-    def use_yang(self, target_list, option=None):
+    def use_yang(self, target_list, option=None, game=None):
         skill = self.skills['羊']
 
         # 1. 灵魂已出窍 → 归位
-        if skill['soul_pos'] is not None:
-            self.player.position = skill['soul_pos']
-            skill['soul_pos'] = None
+        if self.player.soul_pos is not None:
+            self.player.position = self.player.soul_pos
+            self.player.soul_pos = None
             skill['soul_turns'] = 0
             self.set_skill_cooldown()
             return True, f"{fmt_name(self.player)} 灵魂归位，本体传送到 {self.player.position} 格"
@@ -437,7 +554,7 @@ class SkillManager:
         if skill['cooldown'] > 0:
             return False, "【灵羊出窍】冷却中"
 
-        skill['soul_pos'] = self.player.position
+        self.player.soul_pos = self.player.position
         skill['soul_turns'] = 3
         skill['cooldown'] = 0
         skill['used'] += 1
@@ -450,16 +567,16 @@ class SkillManager:
         返回日志字符串；无灵魂时返回 None。
         """
         skill = self.skills['羊']
-        if skill['soul_pos'] is None:
+        if self.player.soul_pos is None:
             return None
 
         level = skill['level']
         max_dist = {SkillLevel.I: 12, SkillLevel.II: 17, SkillLevel.III: 23}[level]
         steps = min(dice, max_dist)
-        board_len = 48
-        old = skill['soul_pos']
+        board_len = (game or self.player.game).board.size
+        old = self.player.soul_pos
         new = (old + steps) % board_len
-        skill['soul_pos'] = new
+        self.player.soul_pos = new
 
         # 触发“三阳开泰”
         dist = self._yang_distance(self.player.position, new, board_len)
@@ -484,12 +601,10 @@ class SkillManager:
         触发三阳开泰效果
         game: Game实例，通过参数传递
         """
-        from game_core import BuildingLevel
-
         if not game:
             return ""
 
-        path = self._shortest_path(self.player.position, distance)
+        path = self._shortest_path(self.player.position, distance, game.board.size)
 
         for idx in path[1:]:
             tile = game.board.tiles[idx]
@@ -505,8 +620,7 @@ class SkillManager:
                 return f"免费升级「{tile.name}」"
         return ""
 
-    def _shortest_path(self, start: int, dist: int) -> list[int]:
-        total = 48
+    def _shortest_path(self, start: int, dist: int, total: int) -> list[int]:
         forward = [(start + i) % total for i in range(dist + 1)]
         backward = [(start - i) % total for i in range(dist + 1)]
         return forward if len(forward) <= len(backward) else backward
@@ -537,48 +651,21 @@ class SkillManager:
         board = game.board
         total = len(board.tiles)
 
-        def is_public_or_special(tile):
-            return (
-                tile.special in ('start', 'encounter', 'hospital') or
-                (tile.owner is None and game._is_property_tile(tile))
-            )
-
-        level = skill['level']
-        # 规则表
-        rules = {
-            SkillLevel.I: {
-                'allow_start': lambda t: t.owner == self.player or is_public_or_special(t),
-                'allow_land' : lambda t: t.owner == self.player or is_public_or_special(t),
-                'max_corners': 0
-            },
-            SkillLevel.II: {
-                'allow_start': lambda t: t.owner == self.player or is_public_or_special(t),
-                'allow_land' : lambda t: t.owner is None and self.player.game._is_property_tile(t),
-                'max_corners': 1
-            },
-            SkillLevel.III: {
-                'allow_start': lambda t: t.owner == self.player or is_public_or_special(t),
-                'allow_land' : lambda t: True,
-                'max_corners': 2
-            }
-        }
-        rule = rules[level]
-
         # 边界与规则校验
         if not (0 <= from_idx < total and 0 <= to_idx < total):
             return False, "索引越界"
         if from_idx == to_idx:
             return False, "不能原地降落"
 
-        start_tile = board.tiles[from_idx]
-        land_tile  = board.tiles[to_idx]
-        if not rule['allow_start'](start_tile):
+        level = skill['level']
+        land_tile = board.tiles[to_idx]
+        if not self.ji_can_take_off(game, board.tiles[from_idx]):
             return False, "起飞点不符合规则"
-        if not rule['allow_land'](land_tile):
+        if not self._ji_allow_land(game, land_tile, level):
             return False, "降落点不符合规则"
 
-        corners = self._count_corners(from_idx, to_idx, total)
-        if corners > rule['max_corners']:
+        corners = self._count_corners(from_idx, to_idx, board)
+        if corners > JI_MAX_CORNERS[level]:
             return False, f"跨越拐角({corners})超限"
 
         # 执行飞行
@@ -596,36 +683,53 @@ class SkillManager:
         msg = f"{fmt_name(self.player)} 从 {from_idx} 腾翔至 {to_idx}{reward}"
         return True, msg
 
-    # 计算两格之间的“拐角”数
-    def _count_corners(self, a: int, b: int, total: int) -> int:
+    def ji_can_take_off(self, game, tile) -> bool:
+        """起飞点：自己的地皮、无主地皮或起点/奇遇/医馆"""
+        return tile.owner == self.player or self._ji_public_or_special(game, tile)
+
+    @staticmethod
+    def _ji_public_or_special(game, tile) -> bool:
+        return (tile.special in ('start', 'encounter', 'hospital') or
+                (tile.owner is None and game._is_property_tile(tile)))
+
+    def _ji_allow_land(self, game, tile, level: SkillLevel) -> bool:
+        """降落点：I 级同起飞点规则；II 级只能落在无主地皮；III 级任意格子"""
+        if level == SkillLevel.I:
+            return self.ji_can_take_off(game, tile)
+        if level == SkillLevel.II:
+            return tile.owner is None and game._is_property_tile(tile)
+        return True
+
+    def ji_landings(self, game, from_idx: int = None) -> list[int]:
+        """从 from_idx（默认当前位置）起飞时所有合法的降落点，起飞点不合法时为空"""
+        board = game.board
+        from_idx = self.player.position if from_idx is None else from_idx
+        if not self.ji_can_take_off(game, board.tiles[from_idx]):
+            return []
+        level = self.skills['鸡']['level']
+        max_corners = JI_MAX_CORNERS[level]
+        return [t.idx for t in board.tiles
+                if t.idx != from_idx
+                and self._ji_allow_land(game, t, level)
+                and self._count_corners(from_idx, t.idx, board) <= max_corners]
+
+    # 计算两格之间的“拐角”数：每走满一条边（board.side 格）算一个拐角
+    def _count_corners(self, a: int, b: int, board) -> int:
         skill = self.skills['鸡']
         level = skill['level']
+        total, side = board.size, board.side
 
         if level == SkillLevel.I:
             # 一级只能顺时针前进
             cw = (b - a) % total
-            return cw // 13
+            return cw // side
         else:
             # 二级和三级可以双向选择最优路径
             cw = (b - a) % total
             ccw = (a - b) % total
-            corners_cw = cw // 13
-            corners_ccw = ccw // 13
+            corners_cw = cw // side
+            corners_ccw = ccw // side
             return min(corners_cw, corners_ccw)
 
-    def upgrade_ji(self):
-        skill = self.skills['鸡']
-        lvl, used, eng = skill['level'], skill['used'], self.player.energy
-        if lvl == SkillLevel.I and used >= 3 and eng >= 200:
-            skill['level'] = SkillLevel.II
-            self.player.energy -= 200
-            return True
-        if lvl == SkillLevel.II and used >= 6 and eng >= 400:
-            skill['level'] = SkillLevel.III
-            self.player.energy -= 400
-            return True
-        return False
-
-    def tick_cooldown(self):
-        for v in self.skills.values():
-            v['cooldown'] = max(0, v['cooldown'] - 1)
\ No newline at end of file
+    def upgrade_ji(self) -> bool:
+        return self.upgrade('鸡')
@@ -0,0 +1,89 @@
+# game_constants.py
+# 共享的枚举与常量：只依赖标准库，任何模块都可以在模块级导入，不会形成循环引用
+
+from enum import Enum
+
+# 五行元素
+class Element(Enum):
+    GOLD = '金'
+    WOOD = '木'
+    WATER = '水'
+    FIRE = '火'
+    EARTH = '土'
+
+# 建筑等级
+class BuildingLevel(Enum):
+    EMPTY = 0
+    HUT = 1
+    TILE = 2
+    INN = 3
+    PALACE = 4
+
+# 技能等级
+class SkillLevel(Enum):
+    I = 1
+    II = 2
+    III = 3
+
+# 八卦枚举
+class Bagua(Enum):
+    QIAN = "乾"
+    KUN  = "坤"
+    ZHEN = "震"
+    XUN  = "巽"
+    KAN  = "坎"
+    LI   = "离"
+    GEN  = "艮"
+    DUI  = "兑"
+
+
+# 日志只保留最近的条数：界面会及时取走，无界面的长局也不会无限增长
+LOG_LIMIT = 500
+
+# 生肖→地支名称（用于日志及界面）
+EARTHLY_NAMES = {
+    '鼠': '子鼠', '牛': '丑牛', '虎': '寅虎', '兔': '卯兔',
+    '龙': '辰龙', '蛇': '巳蛇', '马': '午马', '羊': '未羊',
+    '猴': '申猴', '鸡': '酉鸡', '狗': '戌狗', '猪': '亥猪'
+}
+
+# 生肖→技能名称（用于日志及界面）
+SKILL_NAMES = {
+    '鼠': '灵鼠窃运',
+    '牛': '蛮牛冲撞',
+    '虎': '猛虎分身',
+    '兔': '玉兔疾行',
+    '龙': '真龙吐息',
+    '蛇': '灵蛇隐踪',
+    '马': '天马守护',
+    '羊': '灵羊出窍',
+    '猴': '灵猴百变',
+    '鸡': '金鸡腾翔',
+    '狗': '天狗护体',
+    '猪': '福猪破障',
+}
+
+# 所有负面效果
+class Negative(Enum):
+    """所有负面状态"""
+    SKIP_TURNS   = "skip_turns"                 # 跳过本回合
+    KARMA        = "karma"
+    PUPPET  = "puppet"
+    FIRE_DEBUFF  = "fire_debuff"
+    ZHEN_SHOCKED = "zhen_shocked"
+    LI_SKILL_DOWNGRADE = "li_skill_downgrade"
+    NO_MONEY_THIS_TURN = "no_money_this_turn"   # 本回合不会有经济收益
+    NO_ENERGY_THIS_TURN = "no_energy_this_turn" # 本回合不会有灵气收益
+    DEFENCE_SKILL_ONCE = "defence_skill_once"   # 免疫技能一次
+
+# 统一日志玩家名称
+def fmt_name(player, tag: str = "") -> str:
+    """
+    返回统一格式：[玩家名]角色名
+    寅虎分身回合时追加【阴】【阳】
+    """
+    base = f"[{player.name}]{EARTHLY_NAMES[player.zodiac]}"
+    if player.zodiac == '虎' and tag:          # 仅在分身回合
+        mark = '阳' if tag == 'main' else '阴'
+        return f"{base}【{mark}】"
+    return base
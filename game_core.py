@@ -1,79 +1,156 @@
 # game_core.py
 # 游戏核心逻辑模块
 
-from code import interact
-from pydoc import describe
 import random
-from enum import Enum
-from typing import Self, Optional
-from game_character_skill import SkillLevel, SkillManager
-
-# 五行元素
-class Element(Enum):
-    GOLD = '金'
-    WOOD = '木'
-    WATER = '水'
-    FIRE = '火'
-    EARTH = '土'
-
-# 建筑等级
-class BuildingLevel(Enum):
-    EMPTY = 0
-    HUT = 1
-    TILE = 2
-    INN = 3
-    PALACE = 4
-
-
-# 生肖→地支名称（用于日志及界面）
-EARTHLY_NAMES = {
-    '鼠': '子鼠', '牛': '丑牛', '虎': '寅虎', '兔': '卯兔',
-    '龙': '辰龙', '蛇': '巳蛇', '马': '午马', '羊': '未羊',
-    '猴': '申猴', '鸡': '酉鸡', '狗': '戌狗', '猪': '亥猪'
-}
-
-# 生肖→技能名称（用于日志及界面）
-SKILL_NAMES = {
-    '鼠': '灵鼠窃运',
-    '牛': '蛮牛冲撞',
-    '虎': '猛虎分身',
-    '兔': '玉兔疾行',
-    '龙': '真龙吐息',
-    '蛇': '灵蛇隐踪',
-    '马': '天马守护',
-    '羊': '灵羊出窍',
-    '猴': '灵猴百变',
-    '鸡': '金鸡腾翔',
-    '狗': '天狗护体',
-    '猪': '福猪破障',
-}
-
-# 所有负面效果
-class Negative(Enum):
-    """所有负面状态"""
-    SKIP_TURNS   = "skip_turns"                 # 跳过本回合
-    KARMA        = "karma"
-    PUPPET  = "puppet"
-    FIRE_DEBUFF  = "fire_debuff"
-    ZHEN_SHOCKED = "zhen_shocked"
-    LI_SKILL_DOWNGRADE = "li_skill_downgrade"
-    NO_MONEY_THIS_TURN = "no_money_this_turn"   # 本回合不会有经济收益
-    NO_ENERGY_THIS_TURN = "no_energy_this_turn" # 本回合不会有灵气收益
-    DEFENCE_SKILL_ONCE = "defence_skill_once"   # 免疫技能一次
-
-# 统一日志玩家名称
-def fmt_name(player, tag: str = "") -> str:
+from collections import deque
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Self, Optional, NamedTuple, Iterable, Callable
+from game_constants import (BuildingLevel, Bagua, Element, LOG_LIMIT, Negative, SKILL_NAMES,
+                            SkillLevel, fmt_name)
+from game_character_skill import SkillManager
+from game_tracking import Versioned, StatusDict, TrackedDict, TrackedList, rebind
+from game_scheduler import TurnScheduler
+from game_actions import LegalActions
+from game_events import EventBus
+from game_metrics import GameMetrics, MetricsRegistry
+from game_trace import traced
+from game_ledger import Ledger, MONEY, ENERGY
+from game_economy import (BuildOption, Leaderboard, LiquidationStep, MORTGAGE_LIMIT,
+                          mortgage_value, plan_builds, plan_liquidation, redeem_cost, sell_back_value, tile_value,
+                          upgrade_cost_at)
+from game_trigger_event import trigger_bagua_encounter
+from game_layout import BoardLayout, load_layout
+
+# ====== 金币 / 灵气修正器 ======
+# 每个修正器声明依赖的状态键（或 Player 属性名）、生效条件与结算函数；
+# Player 只在这些键增删时重新编译修正链，无修正器时直接加减。
+class Modifier(NamedTuple):
+    name: str
+    keys: tuple                 # 依赖的 status 键 / Player 属性
+    active: Callable            # active(player) -> bool，编译时判断
+    apply: Callable             # apply(player, amount) -> amount，结算时调用
+
+MONEY_MODIFIERS: list[Modifier] = []
+ENERGY_MODIFIERS: list[Modifier] = []
+MODIFIER_WATCH: set[str] = set()
+
+def register_modifier(modifier: Modifier, money: bool = True, energy: bool = True):
+    """注册修正器（按注册顺序结算）；新增被动技能只需在这里挂一个修正器"""
+    if money:
+        MONEY_MODIFIERS.append(modifier)
+    if energy:
+        ENERGY_MODIFIERS.append(modifier)
+    MODIFIER_WATCH.update(modifier.keys)
+
+def _game_log(player, msg):
+    if player.game is not None:
+        player.game.log.append(msg)
+
+def _blocked_gain(attr: str, label: str, unit: str):
+    """【鄙吝】/【鄙灵】：本回合无法获得金币/灵气"""
+    def apply(player, amount):
+        if amount <= 0:
+            return amount
+        if player.status.get(attr, 0) <= 0:
+            setattr(player, attr, False)
+            player.status.pop(attr, 0)
+        _game_log(player, f"{fmt_name(player)} 陷入【{label}】状态，本回合无法获得任何{unit}")
+        return 0
+    return apply
+
+def _gen_reduce_damage(label: str):
+    """【艮·艮止如山】：接下来 N 次损失减免"""
+    def apply(player, amount):
+        if amount >= 0:
+            return amount
+        discount = player.status.get("gen_damage_discount", 1.0)
+        amount = int(amount * discount)
+        _game_log(player, f"因【艮·艮止如山】本次{label}减免 {discount*100}%")
+        left = player.status.get("gen_reduce_damage", 0) - 1
+        if left > 0:
+            player.status["gen_reduce_damage"] = left
+        else:
+            player.status.pop("gen_reduce_damage", None)
+        return amount
+    return apply
+
+def _zhen_shocked(player, amount):
+    """【震·雷出地奋】：下一次灵气收益减半"""
+    if amount <= 0:
+        return amount
+    player.status.pop("zhen_shocked", None)
+    half = amount // 2
+    _game_log(player, f"{fmt_name(player)} 被【震慑】，本次灵气收益减半：{half}（原{amount}）")
+    return half
+
+# 午马·天马守护各等级：(负面效果减免百分比, 金币扣款免疫阈值)，见 rules.md §7
+TIAN_MA_GUARD = {SkillLevel.I: (30, 500), SkillLevel.II: (50, 1000), SkillLevel.III: (70, 1500)}
+TIAN_MA_DEFAULT_LEVEL = SkillLevel.II     # 天马守护暂无等级记录（被动技能未开放进阶），按 II 级结算
+
+def _tian_ma_level(player) -> SkillLevel:
+    skill = player.skill_mgr.skills.get('马')
+    return skill['level'] if skill is not None else TIAN_MA_DEFAULT_LEVEL
+
+def _tian_ma_guard(immune: bool):
+    """
+    午马·天马守护：罚款、租金、事件扣除等负面效果按等级减免，小额金币扣款完全免疫。
+    只作用于经过修正链的损失；兑换、交易、购买走 spend_money / spend_energy，不受影响。
+    灵气数值普遍只有几百，金币的免疫阈值套在灵气上等于灵气永不减少，故灵气只减免不免疫
     """
-    返回统一格式：[玩家名]角色名
-    寅虎分身回合时追加【阴】【阳】
+    def apply(player, amount):
+        if amount >= 0:
+            return amount
+        percent, threshold = TIAN_MA_GUARD[_tian_ma_level(player)]
+        if immune and -amount < threshold:
+            return 0
+        return -(-amount * (100 - percent) // 100)
+    return apply
+
+register_modifier(Modifier("鄙吝", ("no_money_this_turn",),
+                           lambda p: p.no_money_this_turn,
+                           _blocked_gain("no_money_this_turn", "鄙吝", "金币")), energy=False)
+register_modifier(Modifier("鄙灵", ("no_energy_this_turn",),
+                           lambda p: p.no_energy_this_turn,
+                           _blocked_gain("no_energy_this_turn", "鄙灵", "灵气")), money=False)
+register_modifier(Modifier("艮止如山", ("gen_reduce_damage",),
+                           lambda p: p.status.get("gen_reduce_damage", 0) > 0,
+                           _gen_reduce_damage("罚款")), energy=False)
+register_modifier(Modifier("艮止如山", ("gen_reduce_damage",),
+                           lambda p: p.status.get("gen_reduce_damage", 0) > 0,
+                           _gen_reduce_damage("灵气损失")), money=False)
+register_modifier(Modifier("震慑", ("zhen_shocked",),
+                           lambda p: "zhen_shocked" in p.status,
+                           _zhen_shocked), money=False)
+register_modifier(Modifier("天马守护", ("zodiac",),
+                           lambda p: p.zodiac == '马',
+                           _tian_ma_guard(immune=True)), energy=False)
+register_modifier(Modifier("天马守护", ("zodiac",),
+                           lambda p: p.zodiac == '马',
+                           _tian_ma_guard(immune=False)), money=False)
+
+class Piece:
     """
-    base = f"[{player.name}]{EARTHLY_NAMES[player.zodiac]}"
-    if player.zodiac == '虎' and tag:          # 仅在分身回合
-        mark = '阳' if tag == 'main' else '阴'
-        return f"{base}【{mark}】"
-    return base
+    棋盘上的一枚棋子：玩家主体、寅虎分身、未羊灵魂……
+    移动、占位、渲染与技能选目标统一遍历 Game.pieces，不再按生肖分支
+    """
+    __slots__ = ('owner', 'kind', 'position')
+    MAIN, CLONE, SOUL = 'main', 'clone', 'soul'
+
+    def __init__(self, owner, kind: str, position: int):
+        self.owner = owner          # 所属玩家
+        self.kind = kind            # 'main' / 'clone' / 'soul'
+        self.position = position    # 所在格子序号
 
-class Player:
+    @property
+    def is_body(self) -> bool:
+        """实体棋子（主体、分身）占位并可被技能/奇遇选为目标；灵魂不占位"""
+        return self.kind != Piece.SOUL
+
+    def __repr__(self):
+        return f"Piece({self.owner.name}, {self.kind}, {self.position})"
+
+class Player(Versioned):
     def __init__(self, name, zodiac, is_ai=False):
         self.name = name
         self.zodiac = zodiac
@@ -83,12 +160,16 @@ class Player:
         self.no_energy_this_turn = False    # 本回合不能获得任何灵气
         self.energy = 100                   # 初始灵气
         self._pending_return: list[tuple[int, int]] = []  # (剩余回合, 金额/灵气)
-        self.position = 0
+        self.pieces = [Piece(self, Piece.MAIN, 0)]  # 本玩家的棋子，[0] 为主体
+        self._active = self.pieces[0]               # 当前操控的棋子（寅虎【阴】回合为分身）
         self.remain_in_the_same_position = False    # 上回合是不是停留在同一个格子（不能重复触发奇遇）
         self.score = 0
         self.properties = []
+        self.property_value = 0                     # 名下地皮估值，由 GameBoard 增量维护
+        self.bankrupt = False                       # 已破产出局
         self.destroyed_tiles: set[int] = set()      # 曾被破坏的地皮索引
-        self.status = {}
+        self._chains = None                         # (金币修正链, 灵气修正链)，None 表示待编译
+        self.status = StatusDict(self)
         self.status.setdefault("energy_events", []) # [(剩余回合, 数值, 描述)]
         self.cooldowns = {}
         self.split = False
@@ -97,94 +178,182 @@ class Player:
         self.can_move = True                        # False 表示本轮不能转盘
         self.last_upgrade_turn = -1                 # 记录最近一次加盖的回合
         self.game: Optional["Game"] = None
-        self.clone_idx: Optional[int] = None        # 分身棋子的格子序号
 
-    def add_money(self, amount: int) -> int:
+    @classmethod
+    def from_prototype(cls, proto: "Player", name) -> "Player":
         """
-        统一给玩家增减金币。
+        以未开局的原型玩家为模板复制：标量直接共用，追踪容器、棋子与技能管理器新建一份挂到新玩家上。
+        结果与 Player(name, proto.zodiac) 相同，但不逐个属性走 __setattr__ 的追踪与回调
         """
-        actual = amount
-        if actual > 0:
-            if self.no_money_this_turn:
-                actual = 0
-                if self.status.get("no_money_this_turn", 0) > 0:
-                    self.no_money_this_turn = True
-                else:
-                    self.no_money_this_turn = False
-                    self.status.pop("no_money_this_turn", 0)
-                if self.game is not None and hasattr(self.game, "log"):
-                    self.game.log.append(f"{fmt_name(self)} 陷入【鄙吝】状态，本回合无法获得任何金币")
-        elif actual < 0:
-            # 【艮·艮止如山】——租金减免 50 %
-            gen_left_turn = self.status.get("gen_reduce_damage", 0)
-            if gen_left_turn > 0 :
-                discount = self.status.get("gen_damage_discount", 1.0)
-                actual = int(actual * discount)
-                if self.game is not None and hasattr(self.game, "log"):
-                    self.game.log.append(f"因【艮·艮止如山】本次罚款减免 {discount*100}%")
-                # 剩余次数 -1
-                left = self.status.get("gen_reduce_damage", 0)
-                if left > 0:
-                    left -= 1
-                    if left == 0:
-                        self.status.pop("gen_reduce_damage", None)
-                    else:
-                        self.status["gen_reduce_damage"] = left
-                else:
-                    self.status.pop("gen_reduce_damage", None)
-
-        self.money += actual
-        return actual
-
-    def add_energy(self, amount: int) -> int:
-            """
-            统一给玩家增减灵气。
-            """
-            actual = amount
-            if actual > 0:
-                if self.no_energy_this_turn:
-                    actual = 0
-                    if self.status.get("no_energy_this_turn", 0) > 0:
-                        self.no_energy_this_turn = True
-                    else:
-                        self.no_energy_this_turn = False
-                        self.status.pop("no_energy_this_turn", 0)
-                    if self.game is not None and hasattr(self.game, "log"):
-                        self.game.log.append(f"{fmt_name(self)} 陷入【鄙灵】状态，本回合无法获得任何灵气")
-            elif actual < 0:
-                # 【艮·艮止如山】——租金减免 50 %
-                gen_left_turn = self.status.get("gen_reduce_damage", 0)
-                if gen_left_turn > 0 :
-                    discount = self.status.get("gen_damage_discount", 1.0)
-                    actual = int(actual * discount)
-                    if self.game is not None and hasattr(self.game, "log"):
-                        self.game.log.append(f"因【艮·艮止如山】本次灵气损失减免 {discount*100}%")
-                    # 剩余次数 -1
-                    left = self.status.get("gen_reduce_damage", 0)
-                    if left > 0:
-                        left -= 1
-                        if left == 0:
-                            self.status.pop("gen_reduce_damage", None)
-                        else:
-                            self.status["gen_reduce_damage"] = left
-                    else:
-                        self.status.pop("gen_reduce_damage", None)
+        player = cls.__new__(cls)
+        d = player.__dict__
+        for k, v in proto.__dict__.items():
+            d[k] = rebind(v, player)
+        main = Piece(player, Piece.MAIN, 0)
+        d['name'] = name
+        d['pieces'] = TrackedList(player, [main])
+        d['_active'] = main
+        d['skill_mgr'] = proto.skill_mgr.clone_for(player)
+        d['game'] = None
+        return player
+
+    def _owning_game(self):
+        return self.__dict__.get('game')
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_chains'] = None     # 修正链是编译出的闭包，不入存档，读档后按需重新编译
+        return state
+
+    # ====== 棋子 ======
+    @property
+    def position(self) -> int:
+        """当前操控棋子的格子序号（通常为主体）"""
+        return self._active.position
+
+    @position.setter
+    def position(self, value: int):
+        self._active.position = value
+
+    def piece(self, kind: str) -> Optional[Piece]:
+        for pc in self.pieces:
+            if pc.kind == kind:
+                return pc
+        return None
+
+    def _set_piece(self, kind: str, position: Optional[int]):
+        """放置/移动/移除某类棋子，同步维护 Game.pieces"""
+        pc = self.piece(kind)
+        game = self.__dict__.get('game')
+        if position is None:
+            if pc is not None:
+                if self._active is pc:
+                    self._active = self.pieces[0]
+                self.pieces.remove(pc)
+                if game is not None and pc in game.pieces:
+                    game.pieces.remove(pc)
+        elif pc is None:
+            pc = Piece(self, kind, position)
+            self.pieces.append(pc)
+            if game is not None:
+                game.pieces.append(pc)
+        else:
+            pc.position = position
+            self.touch()
+
+    def control(self, kind: str = Piece.MAIN):
+        """切换当前操控的棋子，之后 position 读写都作用于它"""
+        self._active = self.piece(kind) or self.pieces[0]
+
+    @property
+    def clone_idx(self) -> Optional[int]:
+        """寅虎分身棋子的格子序号，无分身为 None"""
+        pc = self.piece(Piece.CLONE)
+        return pc.position if pc is not None else None
+
+    @clone_idx.setter
+    def clone_idx(self, value: Optional[int]):
+        self._set_piece(Piece.CLONE, value)
+
+    @property
+    def soul_pos(self) -> Optional[int]:
+        """未羊灵魂棋子的格子序号，未出窍为 None"""
+        pc = self.piece(Piece.SOUL)
+        return pc.position if pc is not None else None
+
+    @soul_pos.setter
+    def soul_pos(self, value: Optional[int]):
+        self._set_piece(Piece.SOUL, value)
+
+    # ====== 金币 / 灵气 统一入口：按修正链结算 ======
+    def __setattr__(self, name, value):
+        Versioned.__setattr__(self, name, value)
+        if name in MODIFIER_WATCH:
+            self._chains = None
+        elif name == 'money':
+            game = self.__dict__.get('game')
+            if game is not None:
+                game._money_changed(self)
+        elif name == 'property_value':
+            game = self.__dict__.get('game')
+            if game is not None:
+                game._worth_changed(self)
+
+    @property
+    def net_worth(self) -> int:
+        """净资产 = 现金 + 地产估值"""
+        return self.money + self.property_value
+
+    def _status_keys_changed(self, key):
+        """status 新增/移除键时由 StatusDict 回调"""
+        if key in MODIFIER_WATCH:
+            self._chains = None
+        game = self._owning_game()
+        if game is not None:
+            if key in self.status:
+                game.events.status_added(self, key)
+            else:
+                game.events.status_expired(self, key)
 
-            if self.status.pop("zhen_shocked", 0):
-                if amount > 0:
-                    actual = amount // 2
-                    if self.game is not None and hasattr(self.game, "log"):
-                        self.game.log.append(f"{fmt_name(self)} 被【震慑】，本次灵气收益减半：{actual}（原{amount}）")
+    def _compile_chains(self):
+        """只保留当前生效的修正器，状态增删时才会重新编译"""
+        self._chains = (
+            tuple(m.apply for m in MONEY_MODIFIERS if m.active(self)),
+            tuple(m.apply for m in ENERGY_MODIFIERS if m.active(self)),
+        )
+        return self._chains
 
-            self.energy += actual
-            return actual
+    def add_money(self, amount: int, source: str = "其他") -> int:
+        """
+        统一给玩家增减金币（收益、罚款、租金等），返回实际变化量。
+        source: 流水来源，记入 Game.ledger
+        """
+        amount = self._modified(MONEY, amount)
+        self._book(MONEY, amount, source)
+        return amount
+
+    def add_energy(self, amount: int, source: str = "其他") -> int:
+        """
+        统一给玩家增减灵气，返回实际变化量。
+        """
+        amount = self._modified(ENERGY, amount)
+        self._book(ENERGY, amount, source)
+        return amount
+
+    def _modified(self, kind: int, amount: int) -> int:
+        """经过修正链后的实际变化量，不记账；修正器可能消耗状态次数，每笔只能结算一次"""
+        chain = (self._chains or self._compile_chains())[kind]
+        for apply in chain:
+            amount = apply(self, amount)
+        return amount
+
+    def spend_money(self, cost: int, source: str):
+        """购地、加盖等主动花费：不经过修正链，按原价扣除并记账"""
+        self._book(MONEY, -cost, source)
+
+    def spend_energy(self, cost: int, source: str):
+        """技能进阶等主动消耗灵气"""
+        self._book(ENERGY, -cost, source)
+
+    def _book(self, kind: int, delta: int, source: str):
+        game = self.__dict__.get('game')
+        if game is not None and delta:
+            game.ledger.record(game.turn, self, delta, kind, source)
+        if kind == MONEY:
+            self.money += delta
+        else:
+            self.energy += delta
 
     def has_negative_status(self) -> bool:
         """只要存在任何一个负面状态就返回 True"""
         return any(ns.value in self.status for ns in Negative)
 
+    def skill_shielded(self) -> bool:
+        """只读判断：是否处于【巽·无孔不入】的技能免疫中（不消耗免疫次数）"""
+        return (self.status.get("defence_skill_once") or 0) > 0
+
     def can_be_skill_targeted(self) -> bool:
-        """是否可以被选为技能目标"""
+        """是否可以被选为技能目标（会消耗一次性免疫）"""
         # 免疫一次技能选定（【巽·无孔不入】）
         if self.status.get("defence_skill_once", None):
             if self.status["defence_skill_once"] == 1:  # 为什么要这么分类讨论，因为这样可以有效避免 defence_skill_once 最后始终等于 1 的“赛博鬼打墙”
@@ -195,6 +364,7 @@ class Player:
 
         return True
 
+    @traced(cat='game')
     def move_step(self, steps):
         """返回最终步数（含方向）"""
 
@@ -221,8 +391,7 @@ class Player:
 
         # 未羊灵魂期间本体不移动
         if self.zodiac == '羊':
-            skill = self.skill_mgr.skills['羊']
-            if skill['soul_pos'] is not None:
+            if self.soul_pos is not None:
                 # 灵魂移动由外部调用move_soul处理
                 return 0    # 本体不动，灵魂单独走
 
@@ -280,100 +449,360 @@ class Player:
         )
 
     def get_clone_position(self) -> int | None:
-        return self.skill_mgr.skills['虎']['clone_position'] if self.has_clone() else None
+        return self.clone_idx if self.has_clone() else None
 
-class Tile:
+class Tile(Versioned):
     def __init__(self, idx, name, element=None, price=0, special=None):
+        self._board   = None         # 所属棋盘（用于维护索引），由 GameBoard 绑定
         self.idx      = idx          # 格子序号
         self.name     = name         # 名称
-        self.element  = element      # 五行
+        self._element = element      # 五行
         self.bagua    = None         # 八卦
         self.price    = price        # 售价（空地）
-        self.owner    = None         # 所属玩家
-        self.level    = BuildingLevel.EMPTY  # 建筑等级
+        self._owner   = None         # 所属玩家
+        self._level   = BuildingLevel.EMPTY  # 建筑等级
         self.special  = special      # 特殊类型
         self.status = {}             # 格子状态
 
+    def _owning_game(self):
+        board = self.__dict__.get('_board')
+        return board.game if board is not None else None
+
+    # 等级 / 主人 / 五行 变化时通知棋盘更新索引
+    @property
+    def level(self) -> BuildingLevel:
+        return self._level
+
+    @level.setter
+    def level(self, value: BuildingLevel):
+        old = self._level
+        self._level = value
+        if self._board is not None and old is not value:
+            self._board._reindex(self, old, self._owner, self._element)
+
+    @property
+    def owner(self):
+        return self._owner
+
+    @owner.setter
+    def owner(self, value):
+        old = self._owner
+        self._owner = value
+        if self._board is not None and old is not value:
+            self._board._reindex(self, self._level, old, self._element)
+
+    @property
+    def element(self):
+        return self._element
+
+    @element.setter
+    def element(self, value):
+        old = self._element
+        self._element = value
+        if self._board is not None and old is not value:
+            self._board._reindex(self, self._level, self._owner, old)
+
+# 批量操作的单条变更记录（用于日志与回放）
+class TileChange(NamedTuple):
+    idx: int
+    old_owner: Optional["Player"]
+    new_owner: Optional["Player"]
+    old_level: BuildingLevel
+    new_level: BuildingLevel
+
+# select() 的 owner 参数默认值：不按主人筛选
+ANY_OWNER = object()
+
+# 格子索引桶：开局时全部无主、空地，只随五行不同
+_INDEX_BUCKETS = ('by_level', 'by_owner', 'by_element', '_free_by_element')
+
+class BoardTemplate(NamedTuple):
+    """未贴八卦的开局棋盘快照，只读，多局共用；由 board_template() 建一次"""
+    layout: BoardLayout
+    tiles: tuple        # 每格 Tile 属性表的只读视图（不含 _board 与 status）
+    indexes: tuple      # ((桶名, {键: frozenset}), ...)
+
 class GameBoard:
-    def __init__(self):
-        from game_trigger_event import Bagua  # 避免循环引用
+    def __init__(self, layout: Optional[BoardLayout] = None, rng: Optional[random.Random] = None):
+        self.game: Optional["Game"] = None   # 由 Game 绑定，用于登记变更
+        self.layout = layout or load_layout()
+        self.size = self.layout.size         # 外圈格子数
+        self.side = self.layout.side         # 每边格数（含拐角），拐角数按此折算
         self.tiles = self._init_tiles()
         self.bagua_tiles = {}
-        self.set_bagua_tiles()
+        self._build_indexes()
+        self.set_bagua_tiles(rng)
 
-    def _init_tiles(self):
-        # 使用48个外圈格子，与UI外圈一致
+    @classmethod
+    def from_template(cls, template: BoardTemplate, rng: Optional[random.Random] = None) -> "GameBoard":
+        """
+        按模板复制一张新棋盘：只新建格子对象、格子状态与索引桶，再随机贴八卦。
+        结果与 GameBoard(template.layout, rng) 相同
+        """
+        board = cls.__new__(cls)
+        board.game = None
+        board.layout = layout = template.layout
+        board.size = layout.size
+        board.side = layout.side
         tiles = []
-        # 元素分配：按金→木→水→火→土循环分配
-        element_cycle = [Element.GOLD, Element.WOOD, Element.WATER, Element.FIRE, Element.EARTH]
-        # 特殊格子：起点+若干奇遇与医院
-        special_indices = {0: 'start', 6: 'encounter', 12: 'encounter', 18: 'encounter', 24: 'hospital', 30: 'encounter', 36: 'encounter', 42: 'encounter'}
-        names_cycle = {
-            Element.GOLD: ['鎏金坊', '琉璃阁', '金玉堂', '鎏辉苑', '镀金街', '元金台', '金阙门', '金穹庐', '金辉里'],
-            Element.WOOD: ['青竹苑', '桃李斋', '沉香榭', '万木林', '翠微居', '竹影坊', '松风馆', '榕荫巷', '丹桂庭'],
-            Element.WATER: ['流觞曲水', '碧波潭', '清泉居', '涵碧湾', '沧浪里', '映月池', '涟漪港', '霁水坊', '澄心堂'],
-            Element.FIRE: ['赤焰楼', '丹霞阁', '炎阳宅', '离火坊', '焰影居', '炽明台', '红莲院', '火珠巷', '流火亭'],
-            Element.EARTH: ['黄土高坡', '陶然居', '坤厚院', '厚土坊', '土阜里', '黄壤居', '堰田埠', '垣阙巷', '载物台'],
-        }
-        price_map = {
-            Element.GOLD: 4000,
-            Element.WOOD: 2600,
-            Element.WATER: 3000,
-            Element.FIRE: 2200,
-            Element.EARTH: 3200,
-        }
-
-        name_counters = {e: 0 for e in element_cycle}
-
-        for idx in range(48):
-            if idx == 0:
-                tiles.append(Tile(0, '乾坤起始格', special='start'))
-                continue
-            element = element_cycle[(idx - 1) % len(element_cycle)]
-            name_list = names_cycle[element]
-            name = name_list[name_counters[element] % len(name_list)]
-            name_counters[element] += 1
-            special = special_indices.get(idx)
-            tiles.append(Tile(idx, name, element=element, price=price_map[element], special=special))
+        for attrs in template.tiles:
+            tile = Tile.__new__(Tile)
+            d = tile.__dict__
+            d.update(attrs)
+            d['_board'] = board
+            d['status'] = TrackedDict(tile)
+            tiles.append(tile)
+        board.tiles = tiles
+        board.bagua_tiles = {}
+        for name, buckets in template.indexes:
+            setattr(board, name, {key: set(idx) for key, idx in buckets.items()})
+        board._owner_levels = {}
+        board.set_bagua_tiles(rng)
+        return board
+
+    # ====== 增量索引：按等级 / 主人 / 五行分桶，只在买地、升级、破坏时更新 ======
+    def _build_indexes(self):
+        self.by_level: dict[BuildingLevel, set[int]] = {lv: set() for lv in BuildingLevel}
+        self.by_owner: dict = {None: set()}                              # 主人 → 格子（None = 无主）
+        self.by_element: dict = {e: set() for e in Element}
+        self.by_element[None] = set()
+        self._owner_levels: dict = {}                                    # 主人 → [每级格子集合]
+        self._free_by_element: dict = {e: set() for e in Element}       # 无主格子按五行分桶
+        self._free_by_element[None] = set()
+        for tile in self.tiles:
+            tile._board = self
+            self._index_add(tile.idx, tile.level, tile.owner, tile.element)
+
+    def _index_add(self, idx, level, owner, element):
+        self.by_level[level].add(idx)
+        self.by_owner.setdefault(owner, set()).add(idx)
+        self.by_element[element].add(idx)
+        if owner is None:
+            self._free_by_element[element].add(idx)
+        else:
+            self._owner_levels.setdefault(owner, [set() for _ in BuildingLevel])[level.value].add(idx)
+
+    def _index_remove(self, idx, level, owner, element):
+        self.by_level[level].discard(idx)
+        self.by_owner[owner].discard(idx)
+        self.by_element[element].discard(idx)
+        if owner is None:
+            self._free_by_element[element].discard(idx)
+        else:
+            self._owner_levels[owner][level.value].discard(idx)
+
+    def _reindex(self, tile, old_level, old_owner, old_element):
+        """Tile 的 setter 回调：旧桶移出，新桶加入，并同步双方的地产估值"""
+        self._index_remove(tile.idx, old_level, old_owner, old_element)
+        self._index_add(tile.idx, tile.level, tile.owner, tile.element)
+        if tile.price and (old_owner is not tile.owner or old_level is not tile.level):
+            # 抵押中的地皮估值要扣掉抵押所得（已计入现金）
+            held = mortgage_value(tile.price) if 'mortgaged' in tile.status else 0
+            if old_owner is not None:
+                old_owner.property_value -= tile_value(tile.price, old_level.value) - held
+            if tile.owner is not None:
+                tile.owner.property_value += tile_value(tile.price, tile.level.value) - held
+        if self.game is not None:
+            self.game.events.tile_changed(tile, old_level, old_owner)
+
+    def tiles_at_level(self, level: BuildingLevel) -> list[int]:
+        """该等级的全部格子，如“所有茅屋”"""
+        return sorted(self.by_level[level])
+
+    def owned_by(self, player, below: BuildingLevel | None = None) -> list[int]:
+        """
+        player 的全部地皮；below 不为空时只取等级低于 below 的
+        （如 below=PALACE 即“我的非宫殿地皮”）
+        """
+        buckets = self._owner_levels.get(player)
+        if not buckets:
+            return []
+        top = len(buckets) if below is None else below.value
+        result = []
+        for bucket in buckets[:top]:
+            result.extend(bucket)
+        return sorted(result)
+
+    def max_level_owned(self, player) -> BuildingLevel:
+        """player 名下最高的建筑等级，无地皮时为空地"""
+        buckets = self._owner_levels.get(player)
+        if buckets:
+            for lv in range(len(buckets) - 1, 0, -1):
+                if buckets[lv]:
+                    return BuildingLevel(lv)
+        return BuildingLevel.EMPTY
+
+    def free_tiles(self, element: Element | None = None) -> list[int]:
+        """无主格子（可按五行过滤）；是否可买仍需 Game._is_property_tile 判断"""
+        if element is not None:
+            return sorted(self._free_by_element[element])
+        return sorted(self.by_owner[None])
 
-        return tiles
+    def _init_tiles(self):
+        """按编译好的棋盘表建格子"""
+        lay = self.layout
+        return [Tile(idx, name, element=element, price=price, special=special)
+                for idx, (name, element, price, special)
+                in enumerate(zip(lay.names, lay.elements, lay.prices, lay.specials))]
 
-    def set_bagua_tiles(self) -> None:
+    def set_bagua_tiles(self, rng: Optional[random.Random] = None) -> None:
         """
-        为 48 格外圈棋盘随机贴上 8 个八卦标签。
-        每边（上、右、下、左）随机挑 2 格，共 8 格。
+        为外圈棋盘随机贴上八卦标签。
+        每边（上、右、下、左）随机挑 bagua_per_edge 格，经典棋盘共 8 格。
+        rng 为空时使用全局 random
         """
-        from game_trigger_event import Bagua  # 避免循环引用
-
-        GRID_SIZE = 13
-        edges = {
-            "top":    list(range(0, GRID_SIZE)),
-            "right":  list(range(GRID_SIZE, 2 * GRID_SIZE - 1)),
-            "bottom": list(range(2 * GRID_SIZE - 1, 3 * GRID_SIZE - 2))[::-1],
-            "left":   list(range(3 * GRID_SIZE - 2, 4 * GRID_SIZE - 4))[::-1],
-        }
-
+        rng = rng or random
         bagua_list = list(Bagua)
-        random.shuffle(bagua_list)
+        rng.shuffle(bagua_list)
         bagua_idx = 0
 
-        for idx_list in edges.values():
-            for tile_idx in random.sample(idx_list, 2):
+        for idx_list in self.layout.edges:
+            for tile_idx in rng.sample(idx_list, self.layout.bagua_per_edge):
                 self.tiles[tile_idx].special = "buff_bagua"
                 self.tiles[tile_idx].bagua = bagua_list[bagua_idx]
                 self.bagua_tiles[tile_idx] = bagua_list[bagua_idx]  # 将八卦信息存储到 self.bagua_tiles
                 bagua_idx += 1
 
+    # ====== 批量操作：按掩码筛选格子，一次性结算等级/归属 ======
+    def select(self, level=None, owner=ANY_OWNER, indices: Iterable[int] | None = None,
+               exclude_owner=None, min_level: BuildingLevel | None = None) -> list[int]:
+        """
+        按掩码筛选格子索引，各条件之间为“且”关系：
+        level         : BuildingLevel 或其集合
+        owner         : 指定主人（None 表示无主）；默认不筛选
+        indices       : 只在这些索引中筛选（如路径、destroyed_tiles）
+        exclude_owner : 排除该玩家的地皮
+        min_level     : 建筑等级下限
+        """
+        if isinstance(level, BuildingLevel):
+            level = (level,)
+        if indices is None:
+            # 无索引集合时先从最小的桶出发，避免全盘扫描
+            pools = []
+            if level is not None:
+                pools.append(set().union(*(self.by_level[lv] for lv in level)))
+            if owner is not ANY_OWNER:
+                pools.append(self.by_owner.get(owner, set()))
+            indices = sorted(min(pools, key=len)) if pools else range(len(self.tiles))
+        source = [self.tiles[i] for i in indices]
+        result = []
+        for tile in source:
+            if level is not None and tile.level not in level:
+                continue
+            if owner is not ANY_OWNER and tile.owner is not owner:
+                continue
+            if exclude_owner is not None and tile.owner is exclude_owner:
+                continue
+            if min_level is not None and tile.level.value < min_level.value:
+                continue
+            result.append(tile.idx)
+        return result
+
+    def shift_levels(self, indices: Iterable[int], delta: int, track_destroyed: bool = True) -> list[TileChange]:
+        """
+        把 indices 中每块地皮的建筑等级整体 +delta（夹在 空地~宫殿 之间）。
+        track_destroyed=True 时同步主人的 destroyed_tiles：降级则加入，升级则移出。
+        返回实际发生变化的格子列表。
+        """
+        top = BuildingLevel.PALACE.value
+        return self._apply_levels(
+            ((idx, min(top, max(0, self.tiles[idx].level.value + delta))) for idx in indices),
+            track_destroyed)
+
+    def set_levels(self, indices: Iterable[int], level: BuildingLevel, track_destroyed: bool = True) -> list[TileChange]:
+        """把 indices 中每块地皮的建筑等级直接设为 level，规则同 shift_levels"""
+        return self._apply_levels(((idx, level.value) for idx in indices), track_destroyed)
+
+    def _apply_levels(self, targets, track_destroyed: bool) -> list[TileChange]:
+        changes = []
+        for idx, new_value in targets:
+            tile = self.tiles[idx]
+            old = tile.level
+            if old.value == new_value:
+                continue
+            tile.level = BuildingLevel(new_value)
+            owner = tile.owner
+            if track_destroyed and owner is not None:
+                if new_value < old.value:
+                    owner.destroyed_tiles.add(idx)
+                else:
+                    owner.destroyed_tiles.discard(idx)
+            changes.append(TileChange(idx, owner, owner, old, tile.level))
+        return changes
+
+    def transfer(self, indices: Iterable[int], new_owner: Optional["Player"]) -> list[TileChange]:
+        """
+        批量变更地皮归属，同步新旧主人的 properties。
+        new_owner=None 表示收归公有。
+        """
+        changes = []
+        for idx in indices:
+            tile = self.tiles[idx]
+            old_owner = tile.owner
+            if old_owner is new_owner:
+                continue
+            if old_owner is not None:
+                if idx in old_owner.properties:
+                    old_owner.properties.remove(idx)
+                old_owner.destroyed_tiles.discard(idx)
+            tile.owner = new_owner
+            if new_owner is not None and idx not in new_owner.properties:
+                new_owner.properties.append(idx)
+            changes.append(TileChange(idx, old_owner, new_owner, tile.level, tile.level))
+        return changes
+
+@lru_cache(maxsize=None)
+def board_template(layout: BoardLayout) -> BoardTemplate:
+    """按 GameBoard 的正常流程建格子与索引（不贴八卦），再拍成只读快照；每种棋盘只建一次"""
+    board = GameBoard.__new__(GameBoard)
+    board.layout = layout
+    board.tiles = board._init_tiles()
+    board._build_indexes()
+    tiles = tuple(MappingProxyType({k: v for k, v in vars(t).items() if k not in ('_board', 'status')})
+                  for t in board.tiles)
+    indexes = tuple((name, MappingProxyType({key: frozenset(idx) for key, idx in getattr(board, name).items()}))
+                    for name in _INDEX_BUCKETS)
+    return BoardTemplate(layout, tiles, indexes)
+
+class EndConditions(NamedTuple):
+    """对局结束条件，任一满足即结束"""
+    bankruptcy: bool = True                 # 现金为负即破产出局，只剩一名玩家时结束（False 则允许负债）
+    max_turns: Optional[int] = None         # 独立回合上限
+    net_worth_target: Optional[int] = None  # 任一玩家净资产达到该值
+
 class Game:
-    def __init__(self, player_names, zodiacs):
-        self.board = GameBoard()
+    def __init__(self, player_names, zodiacs, end_conditions: Optional[EndConditions] = None,
+                 layout: Optional[BoardLayout] = None, board: Optional[GameBoard] = None,
+                 new_player: Callable[[str, str], Player] = Player):
+        self.dirty: set = set()             # 本回合发生变化的 Tile / Player / SkillManager
+        self.dirty_last_turn: set = set()   # 上一回合的变更集合（供自动存档、网络增量读取）
+        self.events = EventBus()                # 事件总线（回合阶段、租金、格子与状态变化）
+        self.metrics: Optional[GameMetrics] = None    # 运行指标，enable_metrics 后开启
+        # board / new_player 由 GameFactory 传入按模板复制的棋盘与玩家，给出 board 时忽略 layout
+        self.board = board if board is not None else GameBoard(layout)
+        self.board.game = self
         self.bagua_tiles = self.board.bagua_tiles
-        self.players = [Player(name, zodiac) for name, zodiac in zip(player_names, zodiacs)]
-        self.current_player_idx = 0
-        self.turn = 1       # 独立回合
-        self.game_turn = 1  # 游戏大回合
-        self.log = []
-        self.tiger_sub_turns = []  # [(player, "main"), (player, "clone")] 或空
+        self.players = [new_player(name, zodiac) for name, zodiac in zip(player_names, zodiacs)]
+        self.leaderboard = Leaderboard(self.players)     # 按净资产排名
+        # 对局结束
+        self.end_conditions = end_conditions or EndConditions()
+        self.game_over = False
+        self.winner: Optional[Player] = None
+        self.standings: list[Player] = []       # 最终名次
+        self.end_reason = ''                    # 结束原因
+        self.bankrupt_order: list[Player] = []  # 按破产先后
+        self._resolving: set[Player] = set()    # 正在变卖资产的玩家
+        self._build_plans: dict = {}            # 玩家 → (version, 现金, 可加盖地皮, {reserve: 建造建议})
+        for p in self.players:
+            p.game = self
+        # 棋盘上的所有棋子（主体、分身、灵魂），渲染与占位判断统一遍历
+        self.pieces: list[Piece] = [pc for p in self.players for pc in p.pieces]
+        # 经济流水账：每一笔金币 / 灵气变化
+        self.ledger = Ledger(self.players)
+        # 回合调度：独立回合 turn / 大回合 round / 寅虎分身子回合 / 额外回合
+        self.scheduler = TurnScheduler(self.players, self._pieces_of)
+        self.actions = LegalActions(self)       # 当前行动玩家的合法动作
+        self.log: deque[str] = deque(maxlen=LOG_LIMIT)
 
         # TEST MODE
         self.test_mode = False   # 默认关闭
@@ -381,24 +810,239 @@ class Game:
         self._test_l2_key: Optional[str] = None  # 测试模式下的二级菜单键，可为 str 或 None
         self._test_l3_case: Optional[int] = None # 测试模式下的三级用例编号，可为 int、str 或 None
 
-    def turn_start(self, player):
-        # 1. 选择是否发动技能或特殊机遇
-        pass  # UI层处理
+    def enable_metrics(self, registry: Optional[MetricsRegistry] = None) -> GameMetrics:
+        """开启指标采集；多局共用一个 registry 即可汇总"""
+        if self.metrics is None:
+            self.metrics = GameMetrics(self, registry)
+        return self.metrics
+
+    # ---------- 回合信息（由调度器维护） ----------
+    @property
+    def current_player_idx(self) -> int:
+        return self.scheduler.seat
+
+    @current_player_idx.setter
+    def current_player_idx(self, seat: int):
+        self.scheduler.set_seat(seat)
+
+    @property
+    def turn(self) -> int:
+        """独立回合"""
+        return self.scheduler.turn
+
+    @property
+    def game_turn(self) -> int:
+        """游戏大回合"""
+        return self.scheduler.round
+
+    @staticmethod
+    def _pieces_of(player) -> tuple:
+        """玩家轮到座次时需要操控的棋子：寅虎分身期间先【阳】后【阴】，破产出局则为空"""
+        if player.bankrupt:
+            return ()
+        return (Piece.MAIN, Piece.CLONE) if player.has_clone() else (Piece.MAIN,)
+
+    # ---------- 对局结束 ----------
+    @property
+    def active_players(self) -> list[Player]:
+        return [p for p in self.players if not p.bankrupt]
+
+    def _worth_changed(self, player):
+        """净资产变化回调：更新排行榜，并检查净资产目标"""
+        self.leaderboard.update(player)
+        target = self.end_conditions.net_worth_target
+        if (target is not None and not self.game_over and not player.bankrupt
+                and player.net_worth >= target):
+            self.finish(f"{fmt_name(player)} 净资产达到 {target}", player)
+
+    def _money_changed(self, player):
+        """现金变化回调：现金为负时进入欠款结算"""
+        self._worth_changed(player)
+        if (player.money < 0 and self.end_conditions.bankruptcy
+                and not player.bankrupt and not self.game_over):
+            self.resolve_shortfall(player)
+
+    def resolve_shortfall(self, player):
+        """
+        玩家现金为负：先按变卖方案拆除建筑、抵押地皮补足欠款，
+        地产全部变现仍不够时才破产
+        """
+        if player in self._resolving:
+            return      # 变卖过程中的入账不再重复结算
+        self._resolving.add(player)
+        try:
+            debt = -player.money
+            plan = self.liquidation_plan(player, debt)
+            if plan is None:
+                self.declare_bankrupt(player)
+                return
+            self.log.append(f"{fmt_name(player)} 欠款 {debt} 金币，开始变卖资产")
+            for step in plan:
+                tile = self.board.tiles[step.idx]
+                if step.action == 'sell':
+                    self.sell_building(player, tile)
+                else:
+                    self.mortgage(player, tile)
+            if player.money < 0:        # 方案中有步骤未能执行：不能留下既负债又未破产的玩家
+                self.declare_bankrupt(player)
+        finally:
+            self._resolving.discard(player)
+
+    def liquidation_plan(self, player, debt: int) -> Optional[list[LiquidationStep]]:
+        """补足 debt 的变卖方案；地产全部变现仍不够时为 None"""
+        return plan_liquidation(self.liquidation_options(player), debt,
+                                MORTGAGE_LIMIT - self.mortgaged_count(player))
+
+    def liquidation_options(self, player) -> list[list[LiquidationStep]]:
+        """
+        player 每块未抵押地皮的变卖步骤链：从当前等级逐级拆到茅屋，最后抵押。
+        抵押条件与 can_mortgage 一致：临时标成负面格子（险陷、租金被偷）的地皮只能拆建筑，不能抵押。
+        rent_lost 按标准租金估算
+        """
+        chains = []
+        for idx in self.board.owned_by(player):
+            tile = self.board.tiles[idx]
+            if 'mortgaged' in tile.status:
+                continue
+            chain = []
+            lv = tile.level.value
+            rent = self.base_rent(tile)
+            while lv > BuildingLevel.HUT.value:
+                lower = self.base_rent(tile, BuildingLevel(lv - 1))
+                chain.append(LiquidationStep(idx, 'sell', sell_back_value(tile.price, lv), rent - lower))
+                rent = lower
+                lv -= 1
+            if self._is_property_tile(tile):
+                chain.append(LiquidationStep(idx, 'mortgage', mortgage_value(tile.price), rent))
+            if chain:
+                chains.append(chain)
+        return chains
+
+    def mortgaged_count(self, player) -> int:
+        return sum('mortgaged' in self.board.tiles[i].status for i in self.board.owned_by(player))
+
+    def can_mortgage(self, player, tile: Tile) -> tuple[bool, str]:
+        """
+        能否抵押：1.自己的地皮 2.未抵押 3.只有茅屋或空地 4.抵押数未满
+        返回 (是否可抵押, 原因)
+        """
+        if tile.owner is not player or not self._is_property_tile(tile):
+            return False, "只能抵押自己的地皮"
+        if 'mortgaged' in tile.status:
+            return False, "该地皮已在抵押中"
+        if tile.level.value > BuildingLevel.HUT.value:
+            return False, "有建筑的地皮须先变卖建筑才能抵押"
+        if self.mortgaged_count(player) >= MORTGAGE_LIMIT:
+            return False, f"最多同时抵押 {MORTGAGE_LIMIT} 块地皮"
+        return True, ""
 
-    def after_move(self, player):
-        # 2. 移动后是否发动技能
-        pass  # UI层处理
+    def mortgage(self, player, tile: Tile) -> bool:
+        ok, msg = self.can_mortgage(player, tile)
+        if not ok:
+            self.log.append(msg)
+            return False
+        amount = mortgage_value(tile.price)
+        tile.status['mortgaged'] = self.turn        # 记录抵押回合
+        player.property_value -= amount
+        player._book(MONEY, amount, "抵押")
+        self.log.append(f"{fmt_name(player)} 抵押了「{tile.name}」，获得 {amount} 金币")
+        return True
+
+    def redeem(self, player, tile: Tile) -> bool:
+        """赎回抵押的地皮：支付抵押金额的 1.1 倍"""
+        if tile.owner is not player or 'mortgaged' not in tile.status:
+            self.log.append("该地皮没有抵押")
+            return False
+        cost = redeem_cost(tile.price)
+        if player.money < cost:
+            self.log.append(f"赎回需要 {cost} 金币，资金不足")
+            return False
+        player.spend_money(cost, "赎回")
+        del tile.status['mortgaged']
+        player.property_value += mortgage_value(tile.price)
+        self.log.append(f"{fmt_name(player)} 赎回了「{tile.name}」，花费 {cost} 金币")
+        return True
+
+    def sell_building(self, player, tile: Tile) -> bool:
+        """拆除一级建筑，退还该级加盖费用的一半"""
+        if tile.owner is not player or tile.level.value <= BuildingLevel.HUT.value:
+            self.log.append("没有可变卖的建筑")
+            return False
+        refund = sell_back_value(tile.price, tile.level.value)
+        tile.level = BuildingLevel(tile.level.value - 1)
+        player._book(MONEY, refund, "变卖建筑")
+        self.log.append(f"{fmt_name(player)} 变卖了「{tile.name}」的建筑，降为{tile.level.name}，获得 {refund} 金币")
+        return True
+
+    def declare_bankrupt(self, player):
+        """破产出局：地产收归公共并清空建筑，余下的回合跳过该玩家"""
+        player.bankrupt = True
+        self.bankrupt_order.append(player)
+        self.log.append(f"{fmt_name(player)} 资不抵债，宣告破产！")
+
+        released = self.board.transfer(self.board.owned_by(player), None)
+        for c in released:
+            self.board.tiles[c.idx].status.pop('mortgaged', None)   # 收归公共即解除抵押
+        self.board.set_levels([c.idx for c in released], BuildingLevel.EMPTY, track_destroyed=False)
+        player.destroyed_tiles.clear()
+        if player.money:
+            player._book(MONEY, -player.money, "破产清算")
+        for pc in player.pieces:
+            if pc in self.pieces:
+                self.pieces.remove(pc)
+        self.scheduler.drop(player)
+        self.events.bankrupt(player)
+
+        alive = self.active_players
+        if len(alive) <= 1:
+            self.finish("其余玩家全部破产", alive[0] if alive else None)
+
+    def finish(self, reason: str, winner: Optional[Player] = None):
+        """结束对局：确定胜者与最终名次（存活者按净资产，破产者按破产先后倒序）"""
+        if self.game_over:
+            return
+        self.game_over = True
+        self.end_reason = reason
+        alive = sorted(self.active_players, key=lambda p: p.net_worth, reverse=True)
+        if winner is not None and winner in alive:
+            alive.remove(winner)
+            alive.insert(0, winner)
+        self.standings = alive + self.bankrupt_order[::-1]
+        self.winner = self.standings[0] if self.standings else None
+
+        self.log.append(f"对局结束：{reason}")
+        for rank, p in enumerate(self.standings, 1):
+            tag = "（破产）" if p.bankrupt else f"净资产 {p.net_worth}"
+            self.log.append(f"第{rank}名 {fmt_name(p)} {tag}")
+        self.events.game_over(reason, self.winner)
+
+    def _begin_piece_turn(self, player, piece: str):
+        """子回合开始：切换操控的棋子，本回合的移动作用于该棋子"""
+        player.control(piece)
+
+    def _end_piece_turn(self, player, piece: str):
+        """子回合结束：交还主体控制；分身回合还需递减分身回合数"""
+        player.control(Piece.MAIN)
+        if piece != Piece.CLONE:
+            return
+        skill = player.skill_mgr.skills['虎']
+        if skill['split_turns'] > 0:
+            skill['split_turns'] -= 1
+            if skill['split_turns'] == 0 and player.clone_idx is not None:
+                self.log.append(f"{fmt_name(player)} 分身回合全部结束，请选择合体位置（点击高亮格子）")
+                player.status['tiger_force_merge'] = True
+
+    def pieces_at(self, idx: int, bodies_only: bool = True) -> list[Piece]:
+        """某格子上的棋子（默认只算主体和分身）"""
+        return [pc for pc in self.pieces if pc.position == idx and (pc.is_body or not bodies_only)]
 
     def after_trigger(self, player):
+        self.events.landed(player, self.current_tile(player))
         # 触发惩罚、奇遇、被动技能
         self.trigger_event(player)
         # 检查并支付租金
         self.pay_rent(player)
 
-    def turn_end(self, player):
-        # 4. 是否购房、加盖
-        pass  # UI层处理
-
     def choose_target_player(self, caster: Player) -> Player | None:
         """
         从当前游戏中随机选择一名目标玩家（不包括施法者）
@@ -406,6 +1050,7 @@ class Game:
         candidates = [p for p in self.players if p != caster]
         return random.choice(candidates) if candidates else None
 
+    @traced(cat='game')
     def spin_wheel(self):
         """
         统一转盘逻辑：
@@ -426,6 +1071,7 @@ class Game:
         return dice
 
     # 玩家移动
+    @traced(cat='game')
     def move_player(self, player, steps):
         """改进的移动逻辑，正确处理方向和过起点"""
         if steps == 0:
@@ -455,8 +1101,9 @@ class Game:
 
 
         if passed_start:
-            player.money += 5000
-            self.log.append(f'{fmt_name(player)} 经过起点，获得5000金币！')
+            gain = player.add_money(5000, "起点奖励")
+            if gain:
+                self.log.append(f'{fmt_name(player)} 经过起点，获得{gain}金币！')
 
         # 处理丑牛冲撞效果
         self.handle_niu_rampage(player)
@@ -465,20 +1112,30 @@ class Game:
         tile = self.board.tiles[player.position]
         assert isinstance(tile, Tile)
         if tile.status.get("cracked", 0):
-            if random.random() < 0.5:   # 塌陷概率为 0.5
+            trapped = random.random() < 0.5     # 塌陷概率为 0.5
+            if trapped:
                 player.status["skip_turns"] = max(player.status.get("skip_turns", 0), 1)
                 self.log.append(f"{fmt_name(player)} 踏入险陷区域，被困原地 1 回合！")
             else:
                 self.log.append(f"{fmt_name(player)} 侥幸通过险陷区域。")
+            self.events.collapse(player, tile, trapped)
 
+        self.events.moved(player, old_pos, player.position, steps)
         return player.position
 
+    @traced(cat='game')
     def next_turn(self):
         """
         统一处理回合结束逻辑：
-        1. 若处于寅虎分身子回合，仅消耗当前子回合；
+        1. 若当前座次还有未进行的子回合（寅虎分身、额外回合），只切换到下一个子回合；
         2. 否则进入正常轮换。
         """
+        if self.game_over:
+            return
+
+        # 变更集合按回合轮换
+        self.dirty_last_turn, self.dirty = self.dirty, set()
+
         # TEST MODE
         if getattr(self, 'test_mode', False):
             test_l2_key  = getattr(self, '_test_l2_key',  None)
@@ -487,38 +1144,17 @@ class Game:
                 player = self.players[self.current_player_idx]
                 self._run_earthquake_test(player)
 
-        for p in self.players:
-            if p.zodiac == '虎':
-                sk = p.skill_mgr.skills['虎']
-                if sk['split_turns'] > 0 and not self.tiger_sub_turns:
-                    # 本轮尚未生成，补齐全套：【阳】【阴】
-                    self.tiger_sub_turns = [(p, "main"), (p, "clone")]
-
-        # 1. 寅虎分身子回合
-        if self.tiger_sub_turns:
-            player, tag = self.tiger_sub_turns.pop(0)
-            self.current_player_idx = self.players.index(player)
-            self.log.append(f"{fmt_name(player, tag)} 回合开始")
-
-            if tag == 'clone':
-                # 分身回合：把当前格子临时换成分身格子
-                if player.clone_idx is not None:
-                    tmp = player.position
-                    player.position = player.clone_idx
-                    player.clone_idx = tmp
-
-                # 【阴】回合结束：递减计数
-                skill = player.skill_mgr.skills['虎']
-                if skill['split_turns'] > 0:
-                    skill['split_turns'] -= 1
-                    if skill['split_turns'] == 0:
-                        self.log.append(f"{fmt_name(player)} 分身回合全部结束，请选择合体位置（点击高亮格子）")
-                        player.status['tiger_force_merge'] = True
-                else:
-                    # 已经到 0，不再插入，等正常轮换
-                    pass
+        ended = self.scheduler.current
+        self._end_piece_turn(ended.actor, ended.piece)
+        self.events.turn_end(ended.actor, ended.piece)
 
+        # 1. 同一座次的子回合 / 额外回合
+        if self.scheduler.pending:
+            player, piece, _ = self.scheduler.advance()
+            self._begin_piece_turn(player, piece)
+            self.log.append(f"{fmt_name(player, piece if player.has_clone() else '')} 回合开始")
             player.can_move = True
+            self.events.turn_start(player, piece)
             return
 
         p = self.players[self.current_player_idx]
@@ -531,15 +1167,14 @@ class Game:
                     p.status.pop('puppet')
                     self.log.append(f"{fmt_name(p)} 摆脱了【灵鼠窃运】的控制，不再沦为【傀儡】状态")
 
-        p.skill_mgr.tick_cooldown()     # 减 CD
-
         # 正常轮换
-        self.current_player_idx = (self.current_player_idx + 1) % len(self.players)
-        self.turn += 1
-        self.game_turn = (self.turn - 1) // len(self.players) + 1
+        new_current, piece, _ = self.scheduler.advance()
+        max_turns = self.end_conditions.max_turns
+        if max_turns is not None and self.turn > max_turns:
+            self.finish(f"达到回合上限 {max_turns}")
+            return
 
         # 清理上一位玩家状态
-        new_current = self.players[self.current_player_idx]
         new_current.status.pop('just_bought', None)
 
         # 特殊格子状态清理
@@ -549,7 +1184,7 @@ class Game:
             if turns_left:
                 turns_left -= 1
                 if turns_left <= 0:
-                    t.special = None    # TODO
+                    self._restore_special(t)
                     self.log.append(f"{t.idx} 号格子的险陷已被修复，可安全通行。")
                 else:
                     t.status["cracked"] = turns_left   # 继续倒计时
@@ -558,7 +1193,7 @@ class Game:
             if turns_left:
                 turns_left -= 1
                 if turns_left <= 0:
-                    t.special = None    # TODO
+                    self._restore_special(t)
                     self.log.append(f"{t.idx} 号格子的建筑等级已恢复。")
                     self.log.append(f"{t.idx} 号格子安全升级，租金将不再被偷。")
                 else:
@@ -585,18 +1220,18 @@ class Game:
             # 未羊灵魂
             elif p.zodiac == '羊':
                 sk = p.skill_mgr.skills['羊']
-                if sk['soul_pos'] is not None:
+                if p.soul_pos is not None:
                     sk['soul_turns'] -= 1
                     max_range = {1: 12, 2: 17, 3: 23}[sk['level'].value]
-                    too_far = SkillManager._yang_distance(p.position, sk['soul_pos'], 48) > max_range
+                    too_far = SkillManager._yang_distance(p.position, p.soul_pos, self.board.size) > max_range
                     if sk['soul_turns'] <= 0 or too_far:
-                        p.position = sk['soul_pos']
-                        sk['soul_pos'] = None
+                        p.position = p.soul_pos
+                        p.soul_pos = None
                         sk['cooldown'] = 5
                         reason = "灵魂出窍回合数超出最长回合数" if sk['soul_turns'] <= 0 else "灵魂出窍超出最远距离"
                         self.log.append(f"{fmt_name(p)} {reason}，强制传送到 {p.position}")
 
-        self.log.append(f'轮到 {fmt_name(new_current)}')
+        self.log.append(f'轮到 {fmt_name(new_current, piece if new_current.has_clone() else "")}')
 
         # 八卦灵气值奇遇结算
         # 只处理当前回合玩家的状态
@@ -658,12 +1293,12 @@ class Game:
                     # 震·震惧致福专属：必须存在负面状态才触发
                     elif desc == "震·震惧致福":
                         if p.has_negative_status():
-                            p.add_energy(value)
+                            p.add_energy(value, desc)
                             self.log.append(f"{fmt_name(p)} 在【震·震惧致福】回合内受负面效果，补偿 50 灵气")
                         # 无论触发与否，该事件一次性消耗
                     else:
                         # 普通事件直接结算
-                        p.add_energy(value)
+                        p.add_energy(value, desc)
                         if value > 0:
                             self.log.append(f"{fmt_name(p)} 因【{desc}】获得 {abs(value)} 灵气")
                         elif value < 0:
@@ -703,8 +1338,8 @@ class Game:
                     elif desc == "艮·时行则行":
                         self.log.append(f"{fmt_name(p)} 本回合处于【蛰伏】状态")
                         self.log.append(f"每回合获得 1000 金币和 100 灵气")
-                        gain_1 = p.add_money(1000)
-                        gain_2 = p.add_energy(100)
+                        gain_1 = p.add_money(1000, desc)
+                        gain_2 = p.add_energy(100, desc)
                         self.log.append(f"{fmt_name(p)} 本回合获得 {gain_1} 金币和 {gain_2} 灵气")
                 else:
                     remain.append((turns_left, type, *payload))
@@ -713,6 +1348,21 @@ class Game:
 
         # 重新写回玩家状态
         p.status["energy_events"] = remain
+        self.events.turn_start(new_current, piece)
+
+    @staticmethod
+    def mark_negative(tile: Tile):
+        """临时把格子标成负面格子（险陷、租金被偷），原来的 special 留待效果结束后恢复"""
+        if tile.special != "negative":
+            tile.status["orig_special"] = tile.special
+        tile.special = "negative"
+
+    @staticmethod
+    def _restore_special(tile: Tile):
+        """负面效果全部结束后恢复格子原来的 special"""
+        if "cracked" in tile.status or "stolen_rent" in tile.status:
+            return
+        tile.special = tile.status.pop("orig_special", None)
 
     def player_properties(self, player):
         """返回该玩家拥有的所有地皮对象"""
@@ -720,81 +1370,59 @@ class Game:
 
     def public_tiles(self):
         """返回所有无主且可买地皮"""
-        return [t for t in self.board.tiles if self._is_property_tile(t) and t.owner is None]
+        tiles = self.board.tiles
+        return [tiles[i] for i in self.board.free_tiles() if self._is_property_tile(tiles[i])]
 
+    @traced(cat='game')
     def handle_niu_rampage(self, player):
         """处理丑牛冲撞的建筑破坏效果"""
         if 'niu_rampage' not in player.status:
             return
 
         rampage_info = player.status['niu_rampage']
-        level = rampage_info['level']
+        level = SkillLevel(rampage_info['level'])
         path_tiles = rampage_info['path_tiles']
-        destroyed = []
-
-        for tile_idx in path_tiles:
-            tile = self.board.tiles[tile_idx]
-            if tile.owner and tile.level.value > 0:
-                damage = 0
-                if level == SkillLevel.I.value:
-                    damage = 1
-                elif level == SkillLevel.II.value:
-                    damage = 1 if tile.owner != player else 0
-                elif level == SkillLevel.III.value:
-                    damage = 2 if tile.owner != player else 0
-
-                if damage > 0:
-                    old = tile.level.value
-                    new = max(0, old - damage)
-                    tile.level = BuildingLevel(new)
-                    tile.owner.destroyed_tiles.add(tile_idx)
-                    destroyed.append({
-                        'name': tile.name,
-                        'owner': tile.owner,
-                        'old': old,
-                        'new': new
-                    })
+        board = self.board
+
+        # I 级不分敌我 -1；II 级他人 -1；III 级他人 -2
+        exclude = None if level == SkillLevel.I else player
+        damage = 2 if level == SkillLevel.III else 1
+        hit = board.select(indices=path_tiles, min_level=BuildingLevel.HUT, exclude_owner=exclude)
+        hit = [i for i in hit if board.tiles[i].owner is not None]
+        destroyed = board.shift_levels(hit, -damage)
 
         # 终点额外破坏（II/III级）
+        extra = []
         if level in [SkillLevel.II, SkillLevel.III] and path_tiles:
-            end_tile = self.board.tiles[path_tiles[-1]]
+            end_tile = board.tiles[path_tiles[-1]]
             if end_tile.owner and end_tile.owner != player:
                 chance = 0.5 if level == SkillLevel.II else 1.0
                 if random.random() < chance and end_tile.level.value > 0:
-                    old = end_tile.level.value
-                    end_tile.level = BuildingLevel.EMPTY
-                    end_tile.owner.destroyed_tiles.add(path_tiles[-1])
-                    destroyed.append({
-                        'name': end_tile.name,
-                        'owner': end_tile.owner,
-                        'old': old,
-                        'new': 0,
-                        'extra': True
-                    })
+                    extra = board.set_levels([end_tile.idx], BuildingLevel.EMPTY)
 
         # 日志输出
         level_names = {0: '空地', 1: '茅屋', 2: '瓦房', 3: '客栈', 4: '宫殿'}
-        for d in destroyed:
-            owner_name = fmt_name(d['owner'])
-            old_name = level_names.get(d['old'], '建筑')
-            new_name = level_names.get(d['new'], '空地')
-            if d.get('extra'):
-                self.log.append(f"【终点冲击】{d['name']} 被完全摧毁！")
-            else:
-                self.log.append(f"摧毁 {owner_name} 的{d['name']}：{old_name} → {new_name}")
+        for c in destroyed:
+            name = board.tiles[c.idx].name
+            self.log.append(f"摧毁 {fmt_name(c.old_owner)} 的{name}："
+                            f"{level_names[c.old_level.value]} → {level_names[c.new_level.value]}")
+        for c in extra:
+            self.log.append(f"【终点冲击】{board.tiles[c.idx].name} 被完全摧毁！")
 
         del player.status['niu_rampage']
 
-    # 预留：技能、事件、经济、建筑升级等接口
-    def use_skill(self, player, skill_name):
-        pass
+    def use_skill(self, player, target_list=None, option=None) -> tuple[bool, str]:
+        """发动 player 的主动技能（参数含义见 SkillManager.use_active_skill）"""
+        ok, msg = player.skill_mgr.use_active_skill(target_list, option, self)
+        self.events.skill_used(player, ok, msg)
+        return ok, msg
 
+    @traced(cat='game')
     def trigger_event(self, player):
         assert isinstance(player, Player)
         if player.remain_in_the_same_position:
             player.remain_in_the_same_position = False
             return
-        from game_trigger_event import trigger_bagua_encounter
         # 简易奇遇系统：根据格子五行或特殊类型触发效果
         tile = self.board.tiles[player.position]
         if tile.special == 'start':
@@ -802,15 +1430,15 @@ class Game:
             # player.money += 500
             return
         if tile.special == 'hospital':
-            self.log.append(f'{fmt_name(player)} 进入太医院，休养生息，支付800金币。')
-            player.money -= 800
+            cost = -player.add_money(-800, "太医院")
+            self.log.append(f'{fmt_name(player)} 进入太医院，休养生息，支付{cost}金币。')
             player.status['skip_turns'] = max(player.status.get('skip_turns', 0), 1)
             return
         if tile.special == 'encounter' or tile.special == 'buff_bagua':
             # 五行奇遇
             e = tile.element
             if e == Element.GOLD:
-                gain = player.add_money(3000)
+                gain = player.add_money(3000, "五行奇遇")
                 if gain:
                     self.log.append(f'{fmt_name(player)} 点石成金，获得3000金币！')
             elif e == Element.WOOD:
@@ -823,8 +1451,8 @@ class Game:
                 player.position = (player.position + 3) % len(self.board.tiles)
                 self.log.append(f'{fmt_name(player)} 顺水推舟，额外前进3格至 {player.position}。')
             elif e == Element.FIRE:
-                player.money -= 1000
-                self.log.append(f'{fmt_name(player)} 玩火自焚，损失1000金币。')
+                lost = -player.add_money(-1000, "五行奇遇")
+                self.log.append(f'{fmt_name(player)} 玩火自焚，损失{lost}金币。')
             elif e == Element.EARTH:
                 player.status['shield'] = max(player.status.get('shield', 0), 2)
                 self.log.append(f'{fmt_name(player)} 稳如磐石，获得2回合保护。')
@@ -867,7 +1495,7 @@ class Game:
             return False
 
         tile = self.current_tile(player)
-        player.money -= tile.price
+        player.spend_money(tile.price, "购地")
         tile.owner = player
         tile.level = BuildingLevel.HUT
         player.properties.append(tile.idx)
@@ -878,18 +1506,21 @@ class Game:
         player.status['just_bought'] = 1
         return True
 
-    def can_upgrade(self, player) -> tuple[bool, str]:
+    def can_upgrade(self, player, tile: Optional[Tile] = None) -> tuple[bool, str]:
         """
         能否升级：1.格子可买卖 2.拥有地皮 3.等级未到最高 4.有钱
+        tile 为空时取玩家所在格子
         返回 (是否可升级, 原因)
         """
-        tile = self.current_tile(player)
+        tile = tile or self.current_tile(player)
         if not self._is_property_tile(tile):
             return False, "特殊地区不可升级"
         elif tile.owner != player:
             return False, "公共/他人财产不可升级"
         elif tile.level == BuildingLevel.PALACE:
             return False, "已是最高等级"
+        elif 'mortgaged' in tile.status:
+            return False, "抵押中的地皮不能加盖"
         if player.status.get('just_bought'):
             return False, "刚购买本地皮，不能立即加盖"
         cost = self.upgrade_cost(tile)
@@ -899,12 +1530,12 @@ class Game:
 
     def upgrade_cost(self, tile):
         # 简化版升级费用：基础价 × (当前等级+1) × 0.5
-        return int(tile.price * (tile.level.value + 1) * 0.5)
+        return upgrade_cost_at(tile.price, tile.level.value)
         # 高级版升级费用（TODO）
 
     def upgrade_building(self, player, tile=None) -> bool:
         tile = tile or self.current_tile(player)
-        ok, msg = self.can_upgrade(player)
+        ok, msg = self.can_upgrade(player, tile)
         if not ok:
             self.log.append(msg)
             return False
@@ -915,34 +1546,58 @@ class Game:
             return False
 
         cost = self.upgrade_cost(tile)
-        player.money -= cost
+        player.spend_money(cost, "加盖")
         tile.level = BuildingLevel(tile.level.value + 1)
         player.last_upgrade_turn = self.turn    # 记录加盖回合
 
         self.log.append(f'{fmt_name(player)} 升级了「{tile.name}」至等级{tile.level.value}。')
         return True
 
-    def calculate_rent(self, tile: Tile, player: Player) -> int:
+    def plan_builds(self, player, reserve: int = 0) -> list[BuildOption]:
         """
-        计算指定地皮的租金
-        :param tile: 地皮对象
-        :param player: 停留的玩家（用于判断五行相克等效果）
-        :return: 租金金额
+        建造建议：在保留 reserve 现金的前提下，名下各地皮分别加盖到几级，标准租金总和最高。
+        按玩家缓存：version 未变直接返回（UI 逐帧调用）；version 随状态倒计时、位置、灵气等任何变化而变，
+        所以变了之后再比较规划实际用到的输入——现金与可加盖地皮的序号、等级、地价、五行（摊平成一个元组），相同则沿用。
+        UI 用它提示加盖，模拟对局的电脑玩家用它决定是否加盖
         """
-        if tile.owner is None or tile.owner == player:
-            return 0  # 无主或自己领地无需支付
-
-        base_price = tile.price
-        owner = tile.owner
-
-        # 【坤·含弘光大】——孕育状态触发房屋升级
-        if (owner is not None and owner.status.get("kun_pregnancy", 0) > 0 and tile.level != BuildingLevel.PALACE):
-            if random.random() < 0.1:
-                old_lv = tile.level
-                tile.level = BuildingLevel(tile.level.value + 1)
-                self.log.append(f"【孕育】{fmt_name(tile.owner)} 的【{tile.name}】")
-                self.log.append(f"由 【{old_lv.name}】 升为 【{tile.level.name}】")
-
+        entry = self._build_plans.get(player)
+        if entry is None or entry[0] != player.version:
+            tiles = tuple(v for t in self._buildable_tiles(player) for v in (t.idx, t.level, t.price, t.element))
+            if entry is None or entry[1] != player.money or entry[2] != tiles:
+                entry = (player.version, player.money, tiles, {})
+            else:
+                entry = (player.version,) + entry[1:]
+            self._build_plans[player] = entry
+        plans = entry[3]
+        plan = plans.get(reserve)
+        if plan is None:
+            plan = plans[reserve] = plan_builds(self._build_options(player), player.money - reserve)
+        return plan
+
+    def _buildable_tiles(self, player) -> list[Tile]:
+        """名下可加盖的地皮：普通地皮、未抵押、未到宫殿"""
+        tiles = (self.board.tiles[idx] for idx in self.board.owned_by(player, below=BuildingLevel.PALACE))
+        return [t for t in tiles if self._is_property_tile(t) and 'mortgaged' not in t.status]
+
+    def _build_options(self, player) -> list[list[BuildOption]]:
+        """每块可加盖地皮一组：加盖到各等级的总费用与标准租金增量"""
+        groups = []
+        for tile in self._buildable_tiles(player):
+            options, cost = [], 0
+            rent = self.base_rent(tile)
+            for lv in range(tile.level.value, BuildingLevel.PALACE.value):
+                cost += upgrade_cost_at(tile.price, lv)
+                options.append(BuildOption(tile.idx, lv + 1, cost,
+                                           self.base_rent(tile, BuildingLevel(lv + 1)) - rent))
+            groups.append(options)
+        return groups
+
+    def base_rent(self, tile: Tile, level: Optional[BuildingLevel] = None) -> int:
+        """
+        地皮在某等级下的标准租金（等级倍数 × 五行系数 × 宫殿加成），不含停留玩家的状态修正。
+        level 为空时取当前等级；变卖求解、建造规划用它估算租金潜力
+        """
+        level = tile.level if level is None else level
         # 基础租金倍数
         rent_multipliers = {
             BuildingLevel.EMPTY: 0.25,
@@ -951,7 +1606,7 @@ class Game:
             BuildingLevel.INN: 1.5,
             BuildingLevel.PALACE: 3.0,
         }
-        base_rent = int(base_price * rent_multipliers[tile.level])
+        base_rent = int(tile.price * rent_multipliers[level])
 
         # 五行属性系数（默认水属性为基准）
         element_effects = {
@@ -970,11 +1625,37 @@ class Game:
         rent = int(base_rent * effects['rent'])
 
         # 宫殿额外加成
-        if tile.level == BuildingLevel.PALACE:
+        if level == BuildingLevel.PALACE:
             if element == Element.GOLD:
                 rent = int(rent * effects['palace_bonus'])
             elif element == Element.FIRE:
                 rent = int(rent * effects['palace_bonus'])
+        return rent
+
+    def calculate_rent(self, tile: Tile, player: Player) -> int:
+        """
+        计算指定地皮的租金
+        :param tile: 地皮对象
+        :param player: 停留的玩家（用于判断五行相克等效果）
+        :return: 租金金额
+        """
+        if tile.owner is None or tile.owner == player:
+            return 0  # 无主或自己领地无需支付
+
+        if 'mortgaged' in tile.status:
+            return 0  # 抵押期间停止产生租金
+
+        owner = tile.owner
+
+        # 【坤·含弘光大】——孕育状态触发房屋升级
+        if (owner is not None and owner.status.get("kun_pregnancy", 0) > 0 and tile.level != BuildingLevel.PALACE):
+            if random.random() < 0.1:
+                old_lv = tile.level
+                tile.level = BuildingLevel(tile.level.value + 1)
+                self.log.append(f"【孕育】{fmt_name(tile.owner)} 的【{tile.name}】")
+                self.log.append(f"由 【{old_lv.name}】 升为 【{tile.level.name}】")
+
+        rent = self.base_rent(tile)
 
         # 检查玩家是否有业障（牛的技能）
         if 'karma' in player.status and player.status['karma'] > 0:
@@ -987,25 +1668,11 @@ class Game:
             rent = int(rent * discount)
             self.log.append(f"因【艮·山止灵滞】本次租金减免 30%")
 
-        # 【艮·艮止如山】——租金减免 50 %
-        gen_left_turn = player.status.get("gen_reduce_damage", 0)
-        if gen_left_turn > 0 :
-            discount = player.status.get("gen_damage_discount", 1.0)
-            rent = int(rent * discount)
-            self.log.append(f"因【艮·艮止如山】本次租金减免 {discount*100}%")
-
-            left = player.status.get("gen_reduce_damage", 0)
-            if left > 0:
-                left -= 1
-                if left == 0:
-                    player.status.pop("gen_reduce_damage", None)
-                else:
-                    player.status["gen_reduce_damage"] = left
-            else:
-                player.status.pop("gen_reduce_damage", None)
+        # 【艮·艮止如山】的减免由 Player.add_money 的修正链在实际扣款时结算
 
         return max(0, rent)  # 确保租金非负
 
+    @traced(cat='game')
     def pay_rent(self, player: Player):
         """处理玩家停留时的租金支付"""
         tile = self.current_tile(player)
@@ -1023,6 +1690,7 @@ class Game:
                         f"【火灾】{fmt_name(tile.owner)} 的「{tile.name}」"
                         f"从 {old_level.name} 降为 {tile.level.name}"
                     )
+                    self.events.fire(tile, old_level)
                 return  # 火灾后跳过租金支付
 
         if rent > 0:
@@ -1030,15 +1698,22 @@ class Game:
             owner = tile.owner
             assert isinstance(rent_owner, Player)
             assert isinstance(owner, Player)
-            if player.money >= rent:
-                rent = -player.add_money(-rent)     # 实际支付租金
-                rent_owner.add_money(rent)
-                self.log.append(f"{fmt_name(player)} 停留在 {fmt_name(owner)} 的【{tile.name}】")
-                self.log.append(f"（{tile.element.value} - {tile.level.name}），")
-                self.log.append(f"向{fmt_name(rent_owner)}支付 {rent} 金币租金")
+            available = max(0, player.money)
+            rent = -player._modified(MONEY, -rent)     # 修正链（天马守护、艮止如山）后的实付租金
+            if (rent > available and self.end_conditions.bankruptcy and not self.game_over
+                    and self.liquidation_plan(player, rent - player.money) is None):
+                rent = available                        # 地产全部变现也付不清：只交出剩余现金，随即破产
+                player._book(MONEY, -rent, "租金")
+                self.declare_bankrupt(player)
             else:
-                # 资金不足时的处理（可扩展破产逻辑）
-                self.log.append(f"{fmt_name(player)} 资金不足，无法支付 {rent} 金币租金给 {fmt_name(rent_owner)}")
+                player._book(MONEY, -rent, "租金")      # 现金不足时为负，进入欠款结算
+                if player.bankrupt:
+                    rent = available                    # 变卖未能补足而破产：房东只收到原有现金
+            rent_owner.add_money(rent, "租金")
+            self.events.rent_paid(player, rent_owner, tile, rent)
+            self.log.append(f"{fmt_name(player)} 停留在 {fmt_name(owner)} 的【{tile.name}】")
+            self.log.append(f"（{tile.element.value} - {tile.level.name}），")
+            self.log.append(f"向{fmt_name(rent_owner)}支付 {rent} 金币租金")
 
     def rent_owner(self, tile:Tile):
         """确定租金拥有者"""
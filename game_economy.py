@@ -0,0 +1,215 @@
+# game_economy.py
+# 资产估值与排行榜、抵押变卖、建造规划
+# 净资产 = 现金 + 名下地皮（地价 + 历次加盖花费）
+
+import heapq
+import math
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+
+def upgrade_cost_at(price: int, level: int) -> int:
+    """从等级 level 加盖一级的费用：基础价 × (当前等级+1) × 0.5"""
+    return int(price * (level + 1) * 0.5)
+
+
+@lru_cache(maxsize=None)
+def tile_value(price: int, level: int) -> int:
+    """
+    地皮估值：购地价 + 从茅屋加盖到 level 的全部费用。
+    被破坏成空地的自有地皮按地价计。
+    """
+    value = price
+    for lv in range(1, level):
+        value += upgrade_cost_at(price, lv)
+    return value
+
+
+class Leaderboard:
+    """
+    按净资产从高到低排好的玩家列表。
+    玩家现金或地产估值变化时调用 update，只把该玩家向前/向后挪到正确位置，
+    领先者、名次查询都是 O(1)。
+    """
+
+    def __init__(self, players):
+        self.ranking = sorted(players, key=lambda p: p.net_worth, reverse=True)
+        self._rank = {id(p): i for i, p in enumerate(self.ranking)}
+
+    # 按 id 建的名次表在读档后失效，只存排名，复原时重建
+    def __getstate__(self):
+        return {'ranking': self.ranking}
+
+    def __setstate__(self, state):
+        self.ranking = state['ranking']
+        self._rank = {id(p): i for i, p in enumerate(self.ranking)}
+
+    @property
+    def leader(self):
+        return self.ranking[0] if self.ranking else None
+
+    def rank_of(self, player) -> int:
+        """名次，从 1 开始"""
+        return self._rank[id(player)] + 1
+
+    def standings(self) -> list[tuple]:
+        """[(玩家, 净资产), ...]，按名次排列"""
+        return [(p, p.net_worth) for p in self.ranking]
+
+    def update(self, player):
+        i = self._rank.get(id(player))
+        if i is None:
+            return
+        ranking, rank = self.ranking, self._rank
+        worth = player.net_worth
+        # 向前挪
+        while i > 0 and ranking[i - 1].net_worth < worth:
+            ranking[i] = ranking[i - 1]
+            rank[id(ranking[i])] = i
+            i -= 1
+        # 向后挪
+        while i < len(ranking) - 1 and ranking[i + 1].net_worth > worth:
+            ranking[i] = ranking[i + 1]
+            rank[id(ranking[i])] = i
+            i += 1
+        ranking[i] = player
+        rank[id(player)] = i
+
+
+# ===== 抵押与变卖 =====
+MORTGAGE_LIMIT = 3          # 同一时间最多抵押 3 块地皮
+
+
+def mortgage_value(price: int) -> int:
+    """抵押所得：地皮原价的 50%"""
+    return price // 2
+
+
+def redeem_cost(price: int) -> int:
+    """赎回价格：抵押金额 × 1.1"""
+    return int(mortgage_value(price) * 1.1)
+
+
+def sell_back_value(price: int, level: int) -> int:
+    """拆除一级建筑（level → level-1）退还该级加盖费用的一半"""
+    return upgrade_cost_at(price, level - 1) // 2
+
+
+class LiquidationStep(NamedTuple):
+    idx: int            # 格子序号
+    action: str         # 'sell' 拆除一级建筑 / 'mortgage' 抵押
+    cash: int           # 这一步筹得的金币
+    rent_lost: int      # 这一步损失的标准租金
+
+
+def plan_liquidation(chains: list[list[LiquidationStep]], debt: int,
+                     mortgage_slots: int = MORTGAGE_LIMIT) -> Optional[list[LiquidationStep]]:
+    """
+    求凑够 debt 金币、且损失租金尽量少的变卖方案。
+    chains: 每块地皮的变卖步骤，必须按顺序执行（先逐级拆除建筑，最后抵押）
+    mortgage_slots: 还能抵押的地皮数
+    做法：用小顶堆每次取“每金币损失租金”最少的可执行步骤，凑够后再倒序剔除多余步骤。
+    凑不够时返回 None（只能破产）。
+    """
+    if debt <= 0:
+        return []
+
+    heap = []
+    for ci, chain in enumerate(chains):
+        if chain:
+            step = chain[0]
+            heapq.heappush(heap, (step.rent_lost / max(step.cash, 1), ci, 0))
+
+    taken: list[tuple[int, int]] = []     # (chain 下标, 步骤下标)
+    raised = 0
+    while heap and raised < debt:
+        _, ci, si = heapq.heappop(heap)
+        step = chains[ci][si]
+        if step.action == 'mortgage':
+            if mortgage_slots <= 0:
+                continue
+            mortgage_slots -= 1
+        taken.append((ci, si))
+        raised += step.cash
+        if si + 1 < len(chains[ci]):
+            nxt = chains[ci][si + 1]
+            heapq.heappush(heap, (nxt.rent_lost / max(nxt.cash, 1), ci, si + 1))
+
+    if raised < debt:
+        return None
+
+    # 剔除多余步骤：只能去掉每块地皮链上最后执行的那一步
+    last = {}
+    for ci, si in taken:
+        last[ci] = si
+    for ci, si in reversed(taken):
+        if last.get(ci) != si:
+            continue
+        cash = chains[ci][si].cash
+        if raised - cash >= debt:
+            raised -= cash
+            last[ci] = si - 1 if si > 0 else None
+    return [chains[ci][si] for ci, si in taken if last.get(ci) is not None and si <= last[ci]]
+
+
+# ===== 建造规划 =====
+class BuildOption(NamedTuple):
+    idx: int            # 格子序号
+    level: int          # 加盖到的等级
+    cost: int           # 从当前等级加盖到 level 的总费用
+    gain: int           # 标准租金增量
+
+
+# 背包表的最大格数：经典棋盘（地价为整百）实测最多八百余格，不受影响
+PLAN_CELLS = 1024
+
+
+def plan_builds(groups: list[list[BuildOption]], budget: int) -> list[BuildOption]:
+    """
+    分组背包：每块地皮（一组）至多选一个目标等级，总费用不超过 budget，标准租金增量最大。
+    费用按全部费用的最大公约数缩放，格子数 = budget / gcd。
+    地价不是整百（如 JSON 棋盘的 2601）时 gcd 会退化到 1，格子数等于预算本身；
+    因此格子数超过 PLAN_CELLS 时改用更粗的单位并把费用向上取整，
+    结果仍在预算之内，只是可能略逊于精确最优，耗时上限为 PLAN_CELLS × 选项数。
+    """
+    groups = [[o for o in g if o.cost <= budget] for g in groups]
+    groups = [g for g in groups if g]
+    if budget <= 0 or not groups:
+        return []
+
+    # 钱够把每块地都盖满：直接取各组收益最大的选项
+    if sum(max(o.cost for o in g) for g in groups) <= budget:
+        return [max(g, key=lambda o: (o.gain, -o.cost)) for g in groups]
+
+    unit = 0
+    for g in groups:
+        for o in g:
+            unit = math.gcd(unit, o.cost)
+    unit = max(unit, -(-budget // PLAN_CELLS))
+    cap = budget // unit
+
+    # tables[i][b]：前 i 组、容量 b 时的最大租金增量；整段列表推导，比逐格比较少分配大量临时整数
+    tables = [[0] * (cap + 1)]
+    for g in groups:
+        best = tables[-1]
+        new = best[:]
+        for o in g:
+            w = -(-o.cost // unit)
+            new[w:] = [a if a >= c else c for a, c in zip(new[w:], map(o.gain.__add__, best))]
+        tables.append(new)
+
+    chosen = []
+    b = cap
+    for i in range(len(groups) - 1, -1, -1):
+        before, after = tables[i], tables[i + 1]
+        if after[b] == before[b]:
+            continue
+        # 与逐格比较“严格更大才替换”一致：取组内第一个达到最优值的选项
+        for o in groups[i]:
+            w = -(-o.cost // unit)
+            if w <= b and before[b - w] + o.gain == after[b]:
+                chosen.append(o)
+                b -= w
+                break
+    chosen.reverse()
+    return chosen
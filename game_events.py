@@ -0,0 +1,73 @@
+# game_events.py
+# 事件总线：回合阶段、移动、租金、格子与状态变化的订阅/派发
+# 统计、日志、UI 动画、联网广播、成就等功能订阅事件即可，不必在 next_turn / pay_rent 里加分支
+
+from enum import Enum
+from typing import Callable
+
+
+class Event(Enum):
+    """事件类型，值即 EventBus 上的派发方法名；注释为订阅者收到的参数"""
+    TURN_START = 'turn_start'           # (player, piece)         子回合开始
+    TURN_END = 'turn_end'               # (player, piece)         子回合结束
+    MOVED = 'moved'                     # (player, old_pos, new_pos, steps)
+    LANDED = 'landed'                   # (player, tile)          停留结算前
+    RENT_PAID = 'rent_paid'             # (payer, receiver, tile, amount)
+    TILE_CHANGED = 'tile_changed'       # (tile, old_level, old_owner)
+    STATUS_ADDED = 'status_added'       # (player, key)
+    STATUS_EXPIRED = 'status_expired'   # (player, key)
+    SKILL_USED = 'skill_used'           # (player, ok, msg)
+    BAGUA = 'bagua'                     # (player, 卦名, 事件名)  八卦奇遇
+    FIRE = 'fire'                       # (tile, old_level)       火灾降级
+    COLLAPSE = 'collapse'               # (player, tile, trapped) 踏入险陷：被困 / 侥幸通过
+    BANKRUPT = 'bankrupt'               # (player,)
+    GAME_OVER = 'game_over'             # (reason, winner)
+
+
+def _noop(*args):
+    pass
+
+
+class EventBus:
+    """
+    每个事件在总线上有一个同名派发方法，如 bus.rent_paid(payer, receiver, tile, amount)。
+    订阅变化时重新“编译”该方法：
+    - 无订阅者：空函数，调用处不做任何判断；
+    - 一个订阅者：直接就是该订阅者本身；
+    - 多个订阅者：依次调用的闭包。
+    """
+
+    def __init__(self):
+        self._handlers: dict[Event, list[Callable]] = {e: [] for e in Event}
+        for e in Event:
+            setattr(self, e.value, _noop)
+
+    def subscribe(self, event: Event, handler: Callable) -> Callable:
+        self._handlers[event].append(handler)
+        self._compile(event)
+        return handler
+
+    def unsubscribe(self, event: Event, handler: Callable):
+        handlers = self._handlers[event]
+        if handler in handlers:
+            handlers.remove(handler)
+            self._compile(event)
+
+    def on(self, event: Event):
+        """装饰器写法：@game.events.on(Event.RENT_PAID)"""
+        return lambda handler: self.subscribe(event, handler)
+
+    def has_subscribers(self, event: Event) -> bool:
+        return bool(self._handlers[event])
+
+    def _compile(self, event: Event):
+        handlers = tuple(self._handlers[event])
+        if not handlers:
+            emit = _noop
+        elif len(handlers) == 1:
+            emit = handlers[0]
+        else:
+            def emit(*args, _handlers=handlers):
+                for handler in _handlers:
+                    handler(*args)
+        setattr(self, event.value, emit)
@@ -0,0 +1,40 @@
+# game_factory.py
+# 批量建局：棋盘模板与各生肖的原型玩家只建一次，之后每局只复制可变部分（格子、状态、索引桶、棋子），
+# 供锦标赛、蒙特卡洛搜索等需要成千上万局的场景使用
+
+import random
+from typing import Optional
+
+from game_core import EndConditions, Game, GameBoard, Player, board_template
+from game_layout import BoardLayout, load_layout
+
+
+class GameFactory:
+    """
+    一种棋盘一个工厂：
+        factory = GameFactory()
+        game = factory.new_game(["a", "b"], ['鼠', '牛'], seed=1)
+    seed 只决定八卦布局，用独立的 random.Random，不动全局随机状态；
+    不给 seed 时与 Game() 一样使用全局 random，同样的全局种子得到同样的对局。
+    """
+
+    def __init__(self, layout: Optional[BoardLayout] = None, end_conditions: Optional[EndConditions] = None):
+        self.layout = layout or load_layout()
+        self.template = board_template(self.layout)
+        self.end_conditions = end_conditions
+        self._prototypes: dict[str, Player] = {}     # 生肖 → 原型玩家，从不绑定对局
+
+    def new_board(self, seed: Optional[int] = None) -> GameBoard:
+        rng = random.Random(seed) if seed is not None else None
+        return GameBoard.from_template(self.template, rng)
+
+    def new_player(self, name, zodiac: str) -> Player:
+        proto = self._prototypes.get(zodiac)
+        if proto is None:
+            proto = self._prototypes[zodiac] = Player('', zodiac)
+        return Player.from_prototype(proto, name)
+
+    def new_game(self, player_names, zodiacs, seed: Optional[int] = None,
+                 end_conditions: Optional[EndConditions] = None) -> Game:
+        return Game(player_names, zodiacs, end_conditions or self.end_conditions,
+                    board=self.new_board(seed), new_player=self.new_player)
@@ -0,0 +1,154 @@
+# game_footprint.py
+# 单局内存占用基准：一个 Game 实例占多少字节，按玩家 / 技能管理器 / 格子 / 棋盘索引 / 日志 / 其余拆分，
+# 超出预算即以非零退出码失败，防止新功能悄悄把每个房间的占用抬上去
+#
+# 两种口径：
+#   tracemalloc  同时建 rooms 局后的净增量 ÷ rooms，即每多开一个房间真实新增的内存
+#   getsizeof    从各部分的根对象出发遍历引用图，每个对象只计一次，给出拆分；
+#                共享的小整数、驻留字符串也会被计入，所以合计略高于 tracemalloc
+#
+# 用法：
+#   python game_footprint.py                     全部场景，检查预算
+#   python game_footprint.py --rooms 200 -o footprint.json
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from collections import deque
+from enum import Enum
+from types import BuiltinFunctionType, CodeType, FunctionType, ModuleType
+
+from game_layout import BoardLayout
+from game_sim import new_game, play
+
+# 不属于任何一局的共享对象：类、模块、函数、枚举成员、编译好的棋盘表
+_SHARED = (type, ModuleType, FunctionType, BuiltinFunctionType, CodeType, Enum, BoardLayout)
+
+# 预算（KiB / 局）；合计之外分项也检查，便于定位是哪部分变大了
+BUDGET_KIB = {
+    'new': {'total': 72, 'players': 8, 'skill_mgrs': 3, 'tiles': 24, 'board_index': 20, 'logs': 12, 'other': 10},
+    'midgame': {'total': 92, 'players': 11, 'skill_mgrs': 4, 'tiles': 24, 'board_index': 30, 'logs': 12,
+                'other': 12},
+    'long': {'total': 172, 'players': 12, 'skill_mgrs': 4, 'tiles': 26, 'board_index': 34, 'logs': 84,
+             'other': 14},
+}
+
+
+def _children(obj):
+    if isinstance(obj, dict):
+        yield from obj.keys()
+        yield from obj.values()
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        yield from obj
+    d = getattr(obj, '__dict__', None)
+    if d is not None and not isinstance(obj, _SHARED):
+        yield d
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if name not in ('__dict__', '__weakref__'):
+                yield getattr(obj, name, None)
+    if hasattr(obj, '__self__') and not isinstance(obj, BuiltinFunctionType):
+        yield obj.__self__              # 绑定方法（事件总线上的订阅者）
+
+
+def deep_sizeof(roots, seen: set, stop: set) -> int:
+    """从 roots 出发累加 sys.getsizeof；seen 中的对象已计入别的部分，stop 中的对象属于别的部分，都不再进入"""
+    total = 0
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        oid = id(obj)
+        if oid in seen or oid in stop or obj is None or isinstance(obj, (bool, *_SHARED)):
+            continue
+        seen.add(oid)
+        total += sys.getsizeof(obj)
+        stack.extend(_children(obj))
+    return total
+
+
+def breakdown(game) -> dict:
+    """按部分拆分一局的占用（字节）；先走的部分先认领共享到的对象"""
+    board = game.board
+    players = game.players
+    mgrs = [p.skill_mgr for p in players]
+    stop = {id(game), id(board), *map(id, players), *map(id, mgrs)}
+    seen = set()
+    parts = {}
+    parts['logs'] = deep_sizeof([game.log, game.ledger], seen, stop)
+    parts['skill_mgrs'] = deep_sizeof([vars(m) for m in mgrs], seen, stop) + sum(map(sys.getsizeof, mgrs))
+    parts['players'] = deep_sizeof([vars(p) for p in players], seen, stop) + sum(map(sys.getsizeof, players))
+    parts['tiles'] = deep_sizeof(board.tiles, seen, stop)
+    parts['board_index'] = deep_sizeof([vars(board)], seen, stop) + sys.getsizeof(board)
+    parts['other'] = deep_sizeof([vars(game)], seen, stop) + sys.getsizeof(game)
+    parts['total'] = sum(parts.values())
+    return parts
+
+
+SCENARIOS = {
+    'new': lambda seed: new_game(seed),
+    'midgame': lambda seed: play(new_game(seed), 60, random.Random(seed)),
+    'long': lambda seed: play(new_game(seed), 400, random.Random(seed), keep_log=True),
+}
+
+
+def measure(scenario: str, rooms: int) -> dict:
+    """同时持有 rooms 局：tracemalloc 净增量求平均，getsizeof 拆分取各局平均"""
+    build = SCENARIOS[scenario]
+    build(0)                                # 预热：导入期缓存等一次性分配不计入
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [build(seed) for seed in range(rooms)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    parts = {}
+    for game in games:
+        for name, size in breakdown(game).items():
+            parts[name] = parts.get(name, 0) + size
+    return {
+        'tracemalloc': (after - before) / rooms,
+        'getsizeof': {name: size / rooms for name, size in parts.items()},
+        'turns': sum(g.turn for g in games) / rooms,
+    }
+
+
+def over_budget(scenario: str, result: dict) -> list[str]:
+    budget = BUDGET_KIB.get(scenario, {})
+    measured = dict(result['getsizeof'], total=max(result['tracemalloc'], result['getsizeof']['total']))
+    return [f"[{scenario}] {name} {measured[name] / 1024:,.1f} KiB 超出预算 {limit} KiB"
+            for name, limit in budget.items() if measured[name] > limit * 1024]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="单局内存占用基准")
+    parser.add_argument('--rooms', type=int, default=50, help="同时持有的对局数")
+    parser.add_argument('-k', '--scenario', choices=sorted(SCENARIOS), action='append',
+                        help="只测指定场景（可多次指定）")
+    parser.add_argument('-o', '--output', help="结果 JSON 路径")
+    args = parser.parse_args(argv)
+
+    names = ('players', 'skill_mgrs', 'tiles', 'board_index', 'logs', 'other', 'total')
+    print(f"{'场景':<10}{'tracemalloc':>12}" + ''.join(f"{n:>12}" for n in names) + "   (KiB / 局)")
+    results, errors = {}, []
+    for scenario in args.scenario or SCENARIOS:
+        results[scenario] = r = measure(scenario, args.rooms)
+        print(f"{scenario:<10}{r['tracemalloc'] / 1024:>12,.1f}"
+              + ''.join(f"{r['getsizeof'][n] / 1024:>12,.1f}" for n in names))
+        errors.extend(over_budget(scenario, r))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'rooms': args.rooms, 'budget_kib': BUDGET_KIB, 'results': results, 'errors': errors},
+                      f, ensure_ascii=False, indent=2)
+    for err in errors:
+        print(err)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,327 @@
+# game_fuzz.py
+# 随机动作模糊测试：随机技能等级、八卦奇遇、寅虎合体、酉鸡腾翔、测试模式场景，
+# 每一步之后检查不变量与倒计时状态，每局结束时检查存档（pickle）往返，并统计每秒步数，吞吐量低于下限同样判为失败
+#
+# 用法：
+#   python game_fuzz.py --games 2000 --steps 500            约一百万步
+#   python game_fuzz.py --seed 123 --games 1 -v             复现单个种子
+#   python game_fuzz.py --min-steps-per-sec 0               不检查吞吐量（经典棋盘默认门槛见 MIN_STEPS_PER_SEC）
+#   python game_fuzz.py --board-size 1000                   大棋盘
+
+import argparse
+import pickle
+import random
+import sys
+import traceback
+from collections import Counter
+from numbers import Real
+from time import perf_counter
+
+from game_character_skill import SkillLevel
+from game_core import BuildingLevel, Game
+from game_layout import BoardLayout, load_layout
+from game_sim import new_game, play_turn
+from game_test import trigger_test_encounter
+from game_tracking import TrackedDict, TrackedList, TrackedSet
+from game_trigger_event import trigger_bagua_encounter
+
+# 经典棋盘的吞吐量门槛：参考机实测约 6,000 步/秒，留出机器差异的余量；自定义棋盘默认不检查
+MIN_STEPS_PER_SEC = 2000
+
+# 原本就是特殊格子的类型；“险陷”等临时效果结束后必须恢复
+PERMANENT_SPECIALS = ('start', 'hospital', 'encounter', 'buff_bagua')
+
+# 计数类状态：非负整数
+_COUNTERS = ('skip_turns', 'karma', 'hibernate', 'kun_pregnancy', 'no_energy_this_turn',
+             'no_money_this_turn', 'rent_discount', 'defence_skill_once', 'just_bought',
+             'zhen_shocked', 'shield', 'gen_reduce_damage')
+_EVENT_TYPES = ('energy', 'money', 'skill', 'move', 'land', 'defence')
+
+
+def _is_count(v) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool) and v >= 0
+
+
+def _valid_puppet(v) -> bool:
+    return (isinstance(v, dict) and v.get('direction') in ('backward', 'stay')
+            and isinstance(v.get('turns'), int) and v['turns'] > 0)
+
+
+def _valid_events(v) -> bool:
+    return isinstance(v, list) and all(
+        isinstance(e, tuple) and len(e) >= 2 and isinstance(e[0], int) and e[1] in _EVENT_TYPES
+        for e in v)
+
+
+# Player.status 的键 → 校验函数
+STATUS_SCHEMA = {key: _is_count for key in _COUNTERS}
+STATUS_SCHEMA.update({
+    'puppet': _valid_puppet,
+    'energy_events': _valid_events,
+    'niu_rampage': lambda v: isinstance(v, dict) and 'level' in v,
+    'tiger_split': lambda v: isinstance(v, dict) and 'level' in v,
+    'tiger_force_merge': lambda v: isinstance(v, bool),
+    'gen_rent_discount': lambda v: isinstance(v, Real) and 0 <= v <= 1,
+    'gen_damage_discount': lambda v: isinstance(v, Real) and 0 <= v <= 1,
+})
+
+
+def check_invariants(game: Game, specials: dict) -> list[str]:
+    """返回违反的不变量描述；specials 为开局时各格子的 special"""
+    errors = []
+    board = game.board
+    n = len(board.tiles)
+
+    for pc in game.pieces:
+        if not (0 <= pc.position < n):
+            errors.append(f"[位置] 棋子越界：{pc!r}")
+
+    for p in game.players:
+        owned = board.owned_by(p)
+        if sorted(p.properties) != owned or len(set(p.properties)) != len(p.properties):
+            errors.append(f"[地产] {p.name} properties {sorted(p.properties)} 与 Tile.owner {owned} 不一致")
+        for key, value in p.status.items():
+            check = STATUS_SCHEMA.get(key)
+            if check is None:
+                errors.append(f"[状态] {p.name} 未登记的状态键 {key!r}")
+            elif not check(value):
+                errors.append(f"[状态] {p.name} {key}={value!r} 不合法")
+        if p.bankrupt and p.properties:
+            errors.append(f"[地产] {p.name} 已破产但仍持有地皮")
+        if game.end_conditions.bankruptcy and p.money < 0 and not p.bankrupt:
+            errors.append(f"[现金] {p.name} 现金 {p.money} 为负却未破产")
+
+    for t in board.tiles:
+        if not isinstance(t.level, BuildingLevel):
+            errors.append(f"[等级] 格子 {t.idx} 等级类型错误：{t.level!r}")
+        elif t.owner is None and t.level.value > 0:
+            errors.append(f"[等级] 格子 {t.idx} 无主但有建筑 {t.level.name}")
+        original = specials[t.idx]
+        temporary = 'cracked' in t.status or 'stolen_rent' in t.status
+        if original in PERMANENT_SPECIALS and t.special != original and not temporary:
+            errors.append(f"[special] 格子 {t.idx} 由 {original!r} 变成了 {t.special!r}")
+    return errors
+
+
+class Countdowns:
+    """
+    步与步之间跟踪倒计时状态。座次轮换一次（game.turn 加 1，每步至多一次）时：
+        【傀儡】       刚结束回合的玩家剩余回合减 1，减到 0 即移除；按字典对象跟踪，重新施放会换成新字典
+        energy_events  新轮到的玩家每条剩余回合减 1，仍大于 0 的必须以新值出现；
+                       到期的除 move 类（留给 move_step）和【蛰伏】中的 energy 类外必须已经结算
+    其余时候已有的条目保持不变；到期条目可能被 move_step 取走，不作要求
+    """
+
+    def __init__(self, game: Game):
+        self.game = game
+        self.rotations = [0] * len(game.players)   # 各座次累计轮换次数
+        self.puppets = {}                           # 座次 → (傀儡字典, 起始回合数, 起始轮换次数)
+        self._record()
+
+    def _record(self):
+        self.seat, self.turn = self.game.current_player_idx, self.game.turn
+        self.events = [list(p.status.get('energy_events', ())) for p in self.game.players]
+
+    def check(self) -> list[str]:
+        game = self.game
+        rotated = game.turn - self.turn
+        self.rotations[self.seat] += rotated
+        errors = []
+        for i, p in enumerate(game.players):
+            errors += self._check_events(p, self.events[i], rotated if i == game.current_player_idx else 0)
+            errors += self._check_puppet(i, p)
+        self._record()
+        return errors
+
+    def _check_events(self, p, before: list, rotated: int) -> list[str]:
+        after = p.status.get('energy_events', ())
+        need = Counter((t - rotated, *rest) for t, *rest in before if t - rotated > 0)
+        errors = [f"[倒计时] {p.name} 事件 {e!r} 没有按轮换递减" for e in need - Counter(after)]
+        if rotated:
+            hibernating = p.status.get('hibernate', 0) > 0
+            errors += [f"[倒计时] {p.name} 事件 {e!r} 到期未结算" for e in after
+                       if e[0] <= 0 and e[1] != 'move' and not (hibernating and e[1] == 'energy')]
+        return errors
+
+    def _check_puppet(self, i: int, p) -> list[str]:
+        ctrl = p.status.get('puppet')
+        tracked = self.puppets.get(i)
+        if ctrl is None:
+            self.puppets.pop(i, None)
+            return []
+        if tracked is None or tracked[0] is not ctrl:
+            self.puppets[i] = (ctrl, ctrl['turns'], self.rotations[i])
+            return []
+        expected = tracked[1] - (self.rotations[i] - tracked[2])
+        if ctrl['turns'] != expected:
+            return [f"[倒计时] {p.name} 傀儡剩余 {ctrl['turns']} 回合，按轮换应为 {expected}"]
+        return []
+
+
+def _snapshot(game: Game) -> list:
+    """比较存档往返用：玩家、技能、格子的状态与版本号（玩家以座次代替对象）"""
+    seat = {id(p): i for i, p in enumerate(game.players)}
+    def plain(v):
+        if isinstance(v, dict):
+            return {k: plain(x) for k, x in v.items()}
+        if isinstance(v, (list, tuple)):
+            return [plain(x) for x in v]
+        return seat.get(id(v), v)
+    snap = [game.turn, game.current_player_idx, [(pc.kind, pc.position, seat[id(pc.owner)]) for pc in game.pieces]]
+    for p in game.players:
+        skills = {z: repr(st) for z, st in p.skill_mgr.skills.items()}
+        snap.append((p.money, p.energy, p.version, sorted(p.properties), plain(dict(p.status)), skills,
+                     p.skill_mgr.version))
+    for t in game.board.tiles:
+        snap.append((seat.get(id(t.owner)), t.level, t.special, t.bagua, plain(dict(t.status)), t.version))
+    return snap
+
+
+def _owner_errors(game: Game) -> list[str]:
+    """追踪容器必须挂在复原后的对象上，否则修改不会登记到这一局"""
+    errors = []
+    owners = [(p, v) for p in game.players for v in vars(p).values()]
+    owners += [(p.skill_mgr, v) for p in game.players for v in vars(p.skill_mgr).values()]
+    owners += [(t, t.status) for t in game.board.tiles]
+    for owner, v in owners:
+        if isinstance(v, (TrackedDict, TrackedList, TrackedSet)) and v._owner is not owner:
+            errors.append(f"[存档] {type(owner).__name__} 的追踪容器没有挂在复原后的对象上")
+    for p in game.players:
+        errors += [f"[存档] {p.name} 的技能状态没有挂在复原后的管理器上"
+                   for st in p.skill_mgr.skills.values() if st._mgr is not p.skill_mgr]
+    return errors
+
+
+def check_pickle(game: Game, rng: random.Random, turns: int = 20) -> list[str]:
+    """
+    存档往返：pickle 复原后状态与版本号不变、复原过程不登记变更，
+    且两局用同样的随机数继续走 turns 个子回合后仍然一致
+    """
+    try:
+        copy = pickle.loads(pickle.dumps(game))
+    except Exception as e:
+        return [f"[存档] pickle 往返失败 {type(e).__name__}: {e}"]
+    if _snapshot(copy) != _snapshot(game):
+        return ["[存档] 复原后的状态或版本号与原局不同"]
+    errors = _owner_errors(copy)
+    if errors:
+        return errors
+    state, seed = random.getstate(), rng.random()
+    results = []
+    for g in (game, copy):
+        random.setstate(state)
+        sub = random.Random(seed)
+        try:
+            for _ in range(turns):
+                if g.game_over:
+                    break
+                play_turn(g, sub)
+        except Exception as e:
+            return [f"[存档] {'复原后' if g is copy else '原局'}继续对局异常 {type(e).__name__}: {e}"]
+        g.log.clear()
+        results.append(_snapshot(g))
+    if results[0] != results[1]:
+        return [f"[存档] 复原后继续 {turns} 个子回合与原局不一致"]
+    return []
+
+
+def _randomize_levels(game: Game, rng: random.Random):
+    """开局随机技能等级，覆盖 I~III 级的全部分支"""
+    for p in game.players:
+        skill = p.skill_mgr.skills.get(p.zodiac)
+        if skill is not None:
+            skill['level'] = rng.choice(list(SkillLevel))
+
+
+def fuzz_step(game: Game, rng: random.Random):
+    """在正常回合之外随机插入奇遇、测试场景与合体"""
+    player = game.players[game.current_player_idx]
+    roll = rng.random()
+    if roll < 0.08:
+        tiles = [t for t in game.board.tiles if getattr(t, 'bagua', None)]
+        if tiles:
+            trigger_bagua_encounter(game, player, rng.choice(tiles))
+    elif roll < 0.10:
+        tile = rng.choice([t for t in game.board.tiles if t.owner is not None] or game.board.tiles)
+        if tile.owner is not None and tile.element is not None:
+            trigger_test_encounter(game, player, tile)
+    elif roll < 0.11:
+        game.test_mode = True                   # 回合末地震场景
+        game._test_l2_key, game._test_l3_case = 'upgrade', 4
+    elif roll < 0.12:
+        game.test_mode = False
+    play_turn(game, rng, skill_rate=0.6)
+
+
+def fuzz_game(seed: int, steps: int, verbose: bool = False,
+              layout: BoardLayout = None) -> tuple[int, list[str]]:
+    """跑一局，返回 (实际步数, 失败描述)；第一次失败即停止"""
+    rng = random.Random(seed)
+    game = new_game(seed, rng.randint(2, 4), layout=layout)
+    _randomize_levels(game, rng)
+    game.enable_metrics()                       # 指标订阅者随局存档，check_pickle 一并覆盖
+    specials = {t.idx: t.special for t in game.board.tiles}
+    countdowns = Countdowns(game)
+    for step in range(steps):
+        if game.game_over:
+            return step, [f"seed={seed} step={step} {err}" for err in check_pickle(game, rng)]
+        try:
+            fuzz_step(game, rng)
+        except Exception as e:
+            tb = traceback.extract_tb(e.__traceback__)[-1]
+            return step, [f"seed={seed} step={step} [异常] {type(e).__name__}: {e} "
+                          f"({tb.filename.rsplit('/', 1)[-1]}:{tb.lineno} {tb.name})"]
+        game.log.clear()
+        errors = check_invariants(game, specials)
+        if not game.game_over:                  # 达到回合上限时结束在倒计时结算之前
+            errors += countdowns.check()
+        if errors:
+            return step + 1, [f"seed={seed} step={step} {err}" for err in errors]
+        if verbose and step % 100 == 0:
+            print(f"seed={seed} step={step} turn={game.turn}")
+    return steps, [f"seed={seed} step={steps} {err}" for err in check_pickle(game, rng)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="随机动作模糊测试")
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=500, help="每局最多步数")
+    parser.add_argument('--seed', type=int, default=0, help="起始种子")
+    parser.add_argument('--min-steps-per-sec', type=float,
+                        help=f"吞吐量下限（0 为不检查；经典棋盘默认 {MIN_STEPS_PER_SEC}，自定义棋盘默认不检查）")
+    parser.add_argument('--board', help="棋盘配置 JSON（默认 boards/classic.json）")
+    parser.add_argument('--board-size', type=int, help="覆盖棋盘格子数")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+    layout = load_layout(args.board, args.board_size)
+    min_rate = args.min_steps_per_sec
+    if min_rate is None:
+        min_rate = 0 if args.board or args.board_size else MIN_STEPS_PER_SEC
+
+    total = 0
+    failures = []
+    start = perf_counter()
+    for seed in range(args.seed, args.seed + args.games):
+        done, errors = fuzz_game(seed, args.steps, args.verbose, layout)
+        total += done
+        failures.extend(errors)
+    elapsed = perf_counter() - start
+    rate = total / elapsed if elapsed else 0.0
+
+    kinds = Counter(f.split(' ', 3)[2] for f in failures)
+    for f in failures[:20]:
+        print(f)
+    if len(failures) > 20:
+        print(f"... 共 {len(failures)} 条")
+    print(f"{args.games} 局 {total} 步，{elapsed:.1f} 秒，{rate:,.0f} 步/秒；失败 {len(failures)} 条 {dict(kinds)}")
+
+    if failures:
+        return 1
+    if min_rate and rate < min_rate:
+        print(f"吞吐量 {rate:,.0f} 低于下限 {min_rate:,.0f}")
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# game_layout.py
+# 棋盘定义：从 boards/*.json 读取尺寸、五行循环、地价、名称与特殊格规则，
+# 编译成按格子序号排列的只读表，GameBoard 直接按表建格子
+#
+# 配置字段：
+#   size            外圈格子数（≥ 8；24 ~ 1000+ 均可）
+#   start_name      0 号起点格的名称
+#   elements        1 号格起按此顺序循环分配五行
+#   prices / names  各五行的空地售价与名称表（名称按出现次序循环取用）
+#   specials        特殊格规则，后面的覆盖前面的：
+#                     {"type": "encounter", "every": 6}   每隔 6 格（不含起点）
+#                     {"type": "hospital", "at": 0.5}     外圈一半处
+#                     {"type": "encounter", "idx": [3, 9]} 指定序号
+#   bagua_per_edge  每条边随机贴几张八卦
+
+import json
+import os
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from game_constants import Bagua, Element
+
+BOARD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boards')
+DEFAULT_BOARD = os.path.join(BOARD_DIR, 'classic.json')
+
+
+class BoardLayout(NamedTuple):
+    """编译后的棋盘：各列表按格子序号排列"""
+    name: str
+    size: int
+    side: int                       # 方形外圈每边的格数（含两端拐角），经典棋盘为 13
+    corners: tuple                  # 四个拐角的格子序号
+    names: tuple
+    elements: tuple                 # Element 或 None（起点）
+    prices: tuple
+    specials: tuple                 # 'start' / 'encounter' / 'hospital' / None
+    edges: tuple                    # 上、右、下、左四条边的格子序号，八卦从中抽取
+    cells: tuple                    # 每格在方形外圈上的 (行, 列)，供界面绘制
+    bagua_per_edge: int
+
+
+def _special_indices(rule: dict, size: int) -> list[int]:
+    if 'every' in rule:
+        return list(range(rule['every'], size, rule['every']))
+    if 'at' in rule:
+        return [round(rule['at'] * size) % size]
+    if 'idx' in rule:
+        return [i for i in rule['idx'] if 0 < i < size]
+    raise ValueError(f"特殊格规则缺少 every / at / idx：{rule}")
+
+
+def compile_layout(config: dict, size: Optional[int] = None) -> BoardLayout:
+    """把配置编译成 BoardLayout；size 覆盖配置里的格子数"""
+    size = size or config['size']
+    per_edge = config.get('bagua_per_edge', 2)
+    if size < 8:
+        raise ValueError(f"棋盘至少 8 格，收到 {size}")
+    if per_edge * 4 > len(Bagua):
+        raise ValueError(f"八卦只有 {len(Bagua)} 张，每边最多 {len(Bagua) // 4} 张")
+
+    cycle = [Element(e) for e in config['elements']]
+    prices = {Element(e): p for e, p in config['prices'].items()}
+    name_lists = {Element(e): names for e, names in config['names'].items()}
+
+    names, elements, tile_prices = [config['start_name']], [None], [0]
+    counters = dict.fromkeys(cycle, 0)
+    for idx in range(1, size):
+        element = cycle[(idx - 1) % len(cycle)]
+        pool = name_lists[element]
+        names.append(pool[counters[element] % len(pool)])
+        counters[element] += 1
+        elements.append(element)
+        tile_prices.append(prices[element])
+
+    specials = [None] * size
+    for rule in config.get('specials', ()):
+        for idx in _special_indices(rule, size):
+            specials[idx] = rule['type']
+    specials[0] = 'start'
+
+    # 方形外圈：四个拐角均分，各边长度最多差 1
+    c1, c2, c3 = (k * size // 4 for k in (1, 2, 3))
+    side = max(c1, c2 - c1, c3 - c2, size - c3) + 1
+    edges = (tuple(range(0, c1 + 1)), tuple(range(c1 + 1, c2 + 1)),
+             tuple(range(c2 + 1, c3 + 1))[::-1], tuple(range(c3 + 1, size))[::-1])
+    if min(map(len, edges)) < per_edge:
+        raise ValueError(f"{size} 格棋盘的边太短，放不下每边 {per_edge} 张八卦")
+    cells = ([(0, i) for i in range(0, c1 + 1)]
+             + [(i - c1, side - 1) for i in range(c1 + 1, c2 + 1)]
+             + [(side - 1, side - 1 - (i - c2)) for i in range(c2 + 1, c3 + 1)]
+             + [(side - 1 - (i - c3), 0) for i in range(c3 + 1, size)])
+
+    return BoardLayout(config.get('name', ''), size, side, (0, c1, c2, c3), tuple(names), tuple(elements),
+                       tuple(tile_prices), tuple(specials), edges, tuple(cells), per_edge)
+
+
+@lru_cache(maxsize=None)
+def load_layout(path: Optional[str] = None, size: Optional[int] = None) -> BoardLayout:
+    """读取并编译棋盘配置；同一 (path, size) 只编译一次"""
+    with open(path or DEFAULT_BOARD, encoding='utf-8') as f:
+        return compile_layout(json.load(f), size)
@@ -0,0 +1,128 @@
+# game_ledger.py
+# 经济流水账：记录每一笔金币 / 灵气变化，供统计“钱去哪了”
+
+from array import array
+from itertools import compress
+
+# 流水类型
+MONEY = 0
+ENERGY = 1
+
+
+class Ledger:
+    """
+    只追加的经济流水账，按列存放在预分配的定长数组里：
+        turn    独立回合
+        player  玩家座次
+        delta   变化量（正为收入，负为支出）
+        kind    MONEY / ENERGY
+        source  来源编号（对应 sources 中的名称，如 "租金"、"起点奖励"）
+    容量不足时按倍数扩容；汇总查询直接在列上筛选求和，不解析日志文本。
+    """
+
+    def __init__(self, players, capacity: int = 256):
+        self.players = players
+        self._seat = {id(p): i for i, p in enumerate(players)}
+        self.sources: list[str] = []            # 来源编号 → 名称
+        self._source_ids: dict[str, int] = {}   # 名称 → 来源编号
+        self.size = 0
+        self._capacity = 0
+        self.turn = array('l')
+        self.player = array('h')
+        self.delta = array('q')
+        self.kind = array('b')
+        self.source = array('h')
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.size
+
+    # 按 id 建的座次表在读档后失效，不入存档，复原时按 players 重建
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_seat']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._seat = {id(p): i for i, p in enumerate(self.players)}
+
+    def _grow(self, extra: int):
+        for col in (self.turn, self.player, self.delta, self.kind, self.source):
+            col.frombytes(bytes(extra * col.itemsize))
+        self._capacity += extra
+
+    def source_id(self, name: str) -> int:
+        sid = self._source_ids.get(name)
+        if sid is None:
+            sid = self._source_ids[name] = len(self.sources)
+            self.sources.append(name)
+        return sid
+
+    def record(self, turn: int, player, delta: int, kind: int, source: str):
+        """追加一条流水"""
+        i = self.size
+        if i == self._capacity:
+            self._grow(self._capacity or 256)
+        self.turn[i] = turn
+        self.player[i] = self._seat[id(player)]
+        self.delta[i] = delta
+        self.kind[i] = kind
+        self.source[i] = self.source_id(source)
+        self.size = i + 1
+
+    # ---------- 查询 ----------
+    def _mask(self, kind=MONEY, player=None, source=None):
+        """按条件生成筛选掩码（与各列等长的布尔迭代器）"""
+        n = self.size
+        cols, wants = [self.kind[:n]], [kind]
+        if player is not None:
+            cols.append(self.player[:n])
+            wants.append(self._seat[id(player)])
+        if source is not None:
+            sid = self._source_ids.get(source)
+            if sid is None:
+                return None
+            cols.append(self.source[:n])
+            wants.append(sid)
+        if len(cols) == 1:
+            return (k == kind for k in cols[0])
+        return (all(v == w for v, w in zip(row, wants)) for row in zip(*cols))
+
+    def total(self, kind=MONEY, player=None, source=None) -> int:
+        """满足条件的流水净额"""
+        mask = self._mask(kind, player, source)
+        if mask is None:
+            return 0
+        return sum(compress(self.delta[:self.size], mask))
+
+    def rent_paid(self, player=None) -> int:
+        """累计支付的租金（正数）"""
+        mask = self._mask(MONEY, player, "租金")
+        if mask is None:
+            return 0
+        return -sum(d for d in compress(self.delta[:self.size], mask) if d < 0)
+
+    def by_source(self, kind=MONEY, player=None) -> dict[str, int]:
+        """按来源汇总净额：{来源: 净额}"""
+        totals = [0] * len(self.sources)
+        n = self.size
+        mask = self._mask(kind, player)
+        for sid, d in compress(zip(self.source[:n], self.delta[:n]), mask):
+            totals[sid] += d
+        return {name: totals[sid] for sid, name in enumerate(self.sources) if totals[sid]}
+
+    def cash_flow(self, kind=MONEY, player=None) -> dict[int, int]:
+        """按独立回合汇总净额：{回合: 净额}"""
+        flow: dict[int, int] = {}
+        n = self.size
+        mask = self._mask(kind, player)
+        for t, d in compress(zip(self.turn[:n], self.delta[:n]), mask):
+            flow[t] = flow.get(t, 0) + d
+        return flow
+
+    def entries(self, start: int = 0):
+        """逐条读取流水：(回合, 玩家, 变化量, 类型, 来源名)"""
+        for i in range(start, self.size):
+            yield (self.turn[i], self.players[self.player[i]], self.delta[i],
+                   self.kind[i], self.sources[self.source[i]])
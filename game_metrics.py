@@ -0,0 +1,176 @@
+# game_metrics.py
+# 运行指标：计数器与直方图，导出为 Prometheus 文本格式（写文件或进程内 HTTP 端点）
+# 指标全部通过事件总线采集，不解析日志文本
+
+from bisect import bisect_left
+from time import perf_counter
+
+from game_events import Event
+
+
+def _labels_text(names: tuple, values: tuple, extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    """只增计数器，可带标签：counter.inc('乾', '云行雨施')"""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for values, v in sorted(self.values.items()):
+            lines.append(f'{self.name}{_labels_text(self.labels, values)} {v:g}')
+        return lines
+
+
+class Histogram:
+    """固定分桶直方图（桶上界升序），渲染时输出累计计数"""
+
+    def __init__(self, name: str, help: str, buckets: tuple):
+        self.name, self.help = name, help
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)     # 最后一格为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f'{self.name}_sum {self.sum:g}')
+        lines.append(f'{self.name}_count {self.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表：同名指标只创建一次"""
+
+    def __init__(self):
+        self.metrics: dict[str, object] = {}
+        self._server = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_server'] = None     # HTTP 端点是运行中的线程与套接字，不入存档
+        return state
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, buckets: tuple) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+
+    def serve(self, port: int = 9464, host: str = '127.0.0.1'):
+        """在后台线程开启 /metrics 端点，返回 HTTP 服务对象（shutdown() 关闭）"""
+        import threading        # 只有开端点时才需要，模拟进程导入本模块不必加载 http.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+class GameMetrics:
+    """订阅 Game 的事件总线，采集对局指标"""
+
+    def __init__(self, game, registry: MetricsRegistry = None):
+        self.game = game
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.bagua = r.counter('game_bagua_events_total', '八卦奇遇触发次数', ('bagua', 'event'))
+        self.skills = r.counter('game_skill_casts_total', '主动技能发动次数', ('zodiac', 'ok'))
+        self.fires = r.counter('game_fires_total', '火灾降级次数', ('element',))
+        self.collapses = r.counter('game_collapses_total', '踏入险陷次数', ('outcome',))
+        self.bankruptcies = r.counter('game_bankruptcies_total', '破产人数')
+        self.rent = r.histogram('game_rent_amount', '单次租金金额',
+                                (100, 500, 1000, 2000, 5000, 10000, 20000, 50000))
+        self.turn_seconds = r.histogram('game_turn_duration_seconds', '子回合耗时（秒）',
+                                        (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, 120))
+        self.game_turns = r.histogram('game_length_turns', '整局独立回合数',
+                                      (10, 25, 50, 100, 200, 400, 800))
+        self._turn_began = perf_counter()
+
+        events = game.events        # 只订阅绑定方法：lambda 闭包无法存档，深拷贝后也仍指向原对象
+        events.subscribe(Event.BAGUA, self._on_bagua)
+        events.subscribe(Event.SKILL_USED, self._on_skill_used)
+        events.subscribe(Event.FIRE, self._on_fire)
+        events.subscribe(Event.COLLAPSE, self._on_collapse)
+        events.subscribe(Event.BANKRUPT, self._on_bankrupt)
+        events.subscribe(Event.RENT_PAID, self._on_rent_paid)
+        events.subscribe(Event.TURN_START, self._on_turn_start)
+        events.subscribe(Event.TURN_END, self._on_turn_end)
+        events.subscribe(Event.GAME_OVER, self._on_game_over)
+
+    def _on_bagua(self, player, bagua, name):
+        self.bagua.inc(bagua, name)
+
+    def _on_skill_used(self, player, ok, msg):
+        self.skills.inc(player.zodiac, str(ok).lower())
+
+    def _on_fire(self, tile, old_level):
+        self.fires.inc(tile.element.value)
+
+    def _on_collapse(self, player, tile, trapped):
+        self.collapses.inc('trapped' if trapped else 'passed')
+
+    def _on_bankrupt(self, player):
+        self.bankruptcies.inc()
+
+    def _on_rent_paid(self, payer, receiver, tile, amount):
+        self.rent.observe(amount)
+
+    def _on_turn_start(self, player, piece):
+        self._turn_began = perf_counter()
+
+    def _on_turn_end(self, player, piece):
+        self.turn_seconds.observe(perf_counter() - self._turn_began)
+
+    def _on_game_over(self, reason, winner):
+        self.game_turns.observe(self.game.turn)
@@ -3,9 +3,14 @@
 
 import pygame
 import sys
-from game_core import Game, Element, BuildingLevel, Player, EARTHLY_NAMES
-from game_character_skill import SkillLevel
-from game_test import run_buy_test_case, run_upgrade_test_case
+from collections import deque
+from itertools import islice
+from game_core import Game, Element, BuildingLevel, Player
+from game_constants import LOG_LIMIT, fmt_name
+from game_economy import mortgage_value, redeem_cost
+from game_actions import Action
+from game_trace import traced
+from game_character_skill import SkillLevel, SKILL_REGISTRY
 import os
 import math
 
@@ -66,6 +71,9 @@ SPECIAL_BORDER_COLORS = {
 # Board parameters
 GRID_SIZE = 13
 CELL_SIZE = 60      # 稍微减小，避免与顶部/设置重叠
+# 棋盘区按经典 13×13 外圈留出像素；更大的棋盘缩小格子，格子太小时不画编号与名称
+MIN_CELL_SIZE = 2
+LABEL_CELL_SIZE = 40
 MARGIN = 60         # 更大边距
 INFO_WIDTH = 500    # 信息区宽
 Y_OFFSET = 20
@@ -93,7 +101,7 @@ SKILL_DETAILS = {
     '兔': '玉兔疾行：下一次转盘结果×2，加速期间无法购买地皮。冷却3回合。',
     '龙': '真龙吐息：直线喷火，路径玩家强制入“太医院”，火焰被建筑阻挡。每局最多3次。冷却4回合。',
     '蛇': '灵蛇隐踪：隐身3回合，不可被锁定或影响；期间不能购地和用攻击技能。冷却5回合。',
-    '马': '天马守护：常驻被动，负面效果减半，小于1000的扣款免疫，每回合恢复500元气。',
+    '马': '天马守护：常驻被动，负面效果减半，小于1000的金币扣款免疫，每回合恢复500元气。',
     '羊': '灵羊出窍：灵魂移动3回合，本体留原地；灵魂不触发格效，期间可传送本体。步数减半。冷却5回合。',
     '猴': '灵猴百变：复制一名玩家当前可用技能（一次性），可复制冷却中的技能，使用后原冷却不变。冷却2回合。',
     '鸡': '金鸡腾翔：从自有/公共地皮起飞降落至另一处自有/公共地皮，跨越≤1拐角。冷却3回合。',
@@ -109,8 +117,6 @@ TEST_LEVEL2_BUTTONS = [("地皮购买", "buy"),
         ("租金测试", "rent"),
         ("八卦灵气奇遇测试", "bagua_lingqi")]
 
-pygame.init()
-pygame.font.init()
 # 中文字体加载，优先项目目录下字体
 def get_chinese_font(size):
     font_paths = [
@@ -123,22 +129,35 @@ def get_chinese_font(size):
         if os.path.exists(path):
             return pygame.font.Font(path, size)
     return pygame.font.SysFont('Arial', size)  # 兜底英文
-FONT = get_chinese_font(28)
-FONT_SMALL = get_chinese_font(20)
-FONT_BOLD_NAME = get_chinese_font(20)
-try:
-    FONT_BOLD_NAME.set_bold(True)
-except Exception:
-    pass
-FONT_INDEX = get_chinese_font(16)
-try:
-    FONT_INDEX.set_bold(True)
-except Exception:
-    pass
+
+# 常用字体：init_pygame() 时才加载，导入本模块不初始化 pygame
+FONT = FONT_SMALL = FONT_BOLD_NAME = FONT_INDEX = None
+
+
+def init_pygame():
+    """创建窗口前初始化 pygame 并加载常用字体；重复调用只加载一次"""
+    global FONT, FONT_SMALL, FONT_BOLD_NAME, FONT_INDEX
+    pygame.init()
+    pygame.font.init()
+    if FONT is not None:
+        return
+    FONT = get_chinese_font(28)
+    FONT_SMALL = get_chinese_font(20)
+    FONT_BOLD_NAME = get_chinese_font(20)
+    try:
+        FONT_BOLD_NAME.set_bold(True)
+    except Exception:
+        pass
+    FONT_INDEX = get_chinese_font(16)
+    try:
+        FONT_INDEX.set_bold(True)
+    except Exception:
+        pass
+
 
 def choose_players_ui():
     """简单的人数/生肖选择界面，返回 (人数, [生肖])"""
-    pygame.init()
+    init_pygame()
     screen = pygame.display.set_mode((500, 400))
     font = get_chinese_font(24)
     clock = pygame.time.Clock()
@@ -192,19 +211,10 @@ def choose_players_ui():
         pygame.display.flip()
         clock.tick(60)
 
-def fmt_name(player, tag: str = "") -> str:
-    """
-    返回统一格式：[玩家名]角色名
-    寅虎分身回合时追加【阴】【阳】
-    """
-    base = f"[{player.name}]{EARTHLY_NAMES[player.zodiac]}"
-    if player.zodiac == '虎' and tag:          # 仅在分身回合
-        mark = '阳' if tag == 'main' else '阴'
-        return f"{base}【{mark}】"
-    return base
-
 class GameUI:
     def __init__(self):
+        init_pygame()
+
         ### TEST MODE ###
         self.test_mode = False   # 是否处于测试模式
         self.test_dice = 0       # 测试模式下的固定骰点
@@ -252,7 +262,9 @@ class GameUI:
         self.clock = pygame.time.Clock()
         self.game = Game(['玩家一', '玩家二'], ['鼠', '牛'])    #不要初始化为None，会炸！
         self.selected_skill = None
-        self.log = []
+        self.log: deque[str] = deque(maxlen=LOG_LIMIT)
+        self._wrap_cache: dict[str, list[str]] = {}    # 日志原文 → 按宽度拆好的行
+        self._grid_board = None                         # _grid() 缓存对应的棋盘
         self.tile_props = self._build_tile_props()
         self.base_dir = os.path.dirname(__file__)
         self.player_sprites = self._load_player_sprites()
@@ -281,10 +293,34 @@ class GameUI:
             }
         return props
 
+    def _grid(self):
+        """
+        当前棋盘的 格子序号 → (行, 列)，按棋盘对象缓存；
+        同时按棋盘边长算出 self.grid_size 与 self.cell_size，总尺寸不超过经典棋盘
+        """
+        board = self.game.board
+        if self._grid_board is not board:
+            self._grid_board = board
+            self.grid_size = board.side
+            self.cell_size = max(MIN_CELL_SIZE, min(CELL_SIZE, GRID_SIZE * CELL_SIZE // board.side))
+            self._cell_of = dict(enumerate(board.layout.cells))
+            self._tile_at = {cell: idx for idx, cell in self._cell_of.items()}
+        return self._cell_of
+
+    def _tile_at_pos(self, pos):
+        """屏幕坐标 → 格子序号，不在格子上时为 None"""
+        self._grid()
+        x, y = pos
+        col = (x - self.margin) // self.cell_size
+        row = (y - self.margin - Y_OFFSET) // self.cell_size
+        return self._tile_at.get((row, col))
+
     def _load_player_sprites(self):
         folder = os.path.join(self.base_dir, 'assets', 'Character')
         os.makedirs(folder, exist_ok=True)
         sprites = []
+        self._grid()
+        sprite_size = (max(1, int(self.cell_size * 0.8)),) * 2
 
         # 1. 先把所有生肖的普通图读出来，顺序与 players 一一对应
         for player in self.game.players:
@@ -293,7 +329,7 @@ class GameUI:
             if path and os.path.exists(path):
                 img = pygame.image.load(path).convert_alpha()
                 img = pygame.transform.smoothscale(
-                    img, (int(CELL_SIZE * 0.8), int(CELL_SIZE * 0.8))
+                    img, sprite_size
                 )
                 sprites.append(img)
             else:
@@ -313,7 +349,7 @@ class GameUI:
             if os.path.exists(normal_path):
                 self.tiger_normal_img = pygame.image.load(normal_path).convert_alpha()
                 self.tiger_normal_img = pygame.transform.smoothscale(
-                self.tiger_normal_img, (int(CELL_SIZE * 0.8), int(CELL_SIZE * 0.8))
+                self.tiger_normal_img, sprite_size
                 )
             else:
                 # 使用通用虎图作为普通状态
@@ -324,7 +360,7 @@ class GameUI:
             if os.path.exists(main_path):
                 self.tiger_main_img = pygame.image.load(main_path).convert_alpha()
                 self.tiger_main_img = pygame.transform.smoothscale(
-                    self.tiger_main_img, (int(CELL_SIZE * 0.8), int(CELL_SIZE * 0.8))
+                    self.tiger_main_img, sprite_size
                 )
             else:
                 # 没有专用主体图，使用普通图
@@ -335,7 +371,7 @@ class GameUI:
             if os.path.exists(clone_path):
                 self.tiger_clone_img = pygame.image.load(clone_path).convert_alpha()
                 self.tiger_clone_img = pygame.transform.smoothscale(
-                    self.tiger_clone_img, (int(CELL_SIZE * 0.8), int(CELL_SIZE * 0.8))
+                    self.tiger_clone_img, sprite_size
                 )
             else:
                 # 没有专用分身图，使用普通图加蓝色滤镜
@@ -395,25 +431,9 @@ class GameUI:
                     self.screen.blit(img, img.get_rect(center=(cx, cy)))
                     return
 
-            # 检查寅虎是否处于分身状态
-            tiger_in_split = player.has_clone()
-
-            if tiger_in_split:
-                # 检查当前是否处于寅虎子回合中
-                is_in_tiger_subturn = hasattr(self.game, 'tiger_sub_turns') and self.game.tiger_sub_turns
-                current_subturn_tag = None
-                if is_in_tiger_subturn and self.game.tiger_sub_turns:
-                    current_subturn_tag = self.game.tiger_sub_turns[0][1]  # "main" 或 "clone"
-
-                # 根据当前回合和位置决定图片显示
-                if current_subturn_tag == "clone":
-                    # 当前是【阴】回合（分身回合）
-                    # position现在是分身的当前位置，clone_idx是主体位置
-                    img = self.tiger_clone_img if not is_clone else self.tiger_main_img
-                else:
-                    # 当前是【阳】回合（主体回合）或正常状态
-                    # position是主体的当前位置，clone_idx是分身位置
-                    img = self.tiger_main_img if not is_clone else self.tiger_clone_img
+            # 检查寅虎是否处于分身状态：主体、分身各自是独立棋子
+            if player.clone_idx is not None:
+                img = self.tiger_clone_img if is_clone else self.tiger_main_img
             else:
                 # 非分身状态：使用普通图
                 img = self.tiger_normal_img
@@ -432,7 +452,7 @@ class GameUI:
             self.screen.blit(img, img.get_rect(center=(cx, cy)))
         else:
             color = PLAYER_COLORS[idx % 4]
-            radius = int(CELL_SIZE * 0.32)
+            radius = max(1, int(self.cell_size * 0.32))
             pygame.draw.circle(self.screen, (*color, alpha), (cx, cy), radius)
 
     def _draw_star(self, center, outer_r, color):
@@ -466,32 +486,33 @@ class GameUI:
             rect = img.get_rect(center=(cx, cy))
             self.screen.blit(img, rect)
 
-    def _draw_bagua_tiles(self, grid_map):
+    def _draw_bagua_tiles(self, cell_of):
         """
         在所有八卦灵气奇遇格子外侧绘制突出的八卦字。
-        grid_map 来自 draw_board()，用于把 tile_idx ↔ (r,c) 映射
+        cell_of 来自 _grid()，tile_idx → (r,c)
         """
         font_bagua = get_chinese_font(20)
         gold_color = (255, 215, 0)
         black_color = (0, 0, 0)
 
         for tile_idx, bagua in self.game.bagua_tiles.items():
-            pos = [(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE) if grid_map[r][c] == tile_idx]
-            if not pos:
+            if tile_idx not in cell_of:
                 continue
-            r, c = pos[0]
-            cx = self.margin + c * CELL_SIZE + CELL_SIZE // 2
-            cy = self.margin + r * CELL_SIZE + CELL_SIZE // 2 + Y_OFFSET  # 向下偏移20像素
+            r, c = cell_of[tile_idx]
+            cs = self.cell_size
+            cx = self.margin + c * cs + cs // 2
+            cy = self.margin + r * cs + cs // 2 + Y_OFFSET  # 向下偏移20像素
 
             # 偏移到格子外侧
-            offset = CELL_SIZE // 2 + 15
+            offset = cs // 2 + 15
+            last = self.grid_size - 1
             if r == 0:  # 上边
                 x, y = cx, cy - offset
-            elif r == GRID_SIZE - 1:  # 下边
+            elif r == last:  # 下边
                 x, y = cx, cy + offset
             elif c == 0:  # 左边
                 x, y = cx - offset, cy
-            elif c == GRID_SIZE - 1:  # 右边
+            elif c == last:  # 右边
                 x, y = cx + offset, cy
             else:
                 continue
@@ -506,39 +527,40 @@ class GameUI:
                 self.screen.blit(outline, outline.get_rect(center=(x + dx, y + dy)))
             self.screen.blit(fill, fill.get_rect(center=(x, y)))
 
+    def _draw_hu_merge_overlay(self, cell_of):
+        """暗化整个棋盘，仅高亮主体 & 分身格子"""
+        overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        self.screen.blit(overlay, (0, 0))
+        cs = self.cell_size
+        for idx in self.hu_merge_cells:
+            if idx not in cell_of:
+                continue
+            r, c = cell_of[idx]
+            rect = pygame.Rect(self.margin + c * cs, self.margin + r * cs + Y_OFFSET, cs, cs)
+            pygame.draw.rect(self.screen, (0, 255, 0, 180), rect, 5)  # 绿色高亮边框
+
     def _draw_tile_cracks(self):
         """在格子上绘制裂纹（仅裂纹，不负责别的）"""
-        crack_size = int(CELL_SIZE * 0.8)          # 占 80 %
-        crack_img = self.crack_img                 # 已在 _load_building_imgs 里加载
-        crack_img = pygame.transform.smoothscale(crack_img, (crack_size, crack_size))
-
-        # 全局坐标映射（与 draw_board 保持一致）
-        grid_map = [[-1 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        idx = 0
-        for i in range(GRID_SIZE):
-            grid_map[0][i] = idx; idx += 1
-        for i in range(1, GRID_SIZE):
-            grid_map[i][GRID_SIZE-1] = idx; idx += 1
-        for i in range(GRID_SIZE-2, -1, -1):
-            grid_map[GRID_SIZE-1][i] = idx; idx += 1
-        for i in range(GRID_SIZE-2, 0, -1):
-            grid_map[i][0] = idx; idx += 1
-
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                tile_idx = grid_map[row][col]
-                if tile_idx == -1:
-                    continue
-                tile = self.game.board.tiles[tile_idx]
-                if not tile.status.get("cracked"):
-                    continue
-
-                # 计算中心坐标
-                x = self.margin + col * CELL_SIZE + CELL_SIZE // 2
-                y = self.margin + row * CELL_SIZE + CELL_SIZE // 2 + Y_OFFSET
-                rect = crack_img.get_rect(center=(x, y))
-                self.screen.blit(crack_img, rect)
+        cell_of = self._grid()
+        cs = self.cell_size
+        crack_size = max(1, int(cs * 0.8))          # 占 80 %
+        crack_img = None                            # 有裂纹时才缩放
+
+        for tile in self.game.board.tiles:
+            if not tile.status.get("cracked"):
+                continue
+            if crack_img is None:
+                crack_img = pygame.transform.smoothscale(self.crack_img, (crack_size, crack_size))  # 已在 _load_building_imgs 里加载
+
+            # 计算中心坐标
+            row, col = cell_of[tile.idx]
+            x = self.margin + col * cs + cs // 2
+            y = self.margin + row * cs + cs // 2 + Y_OFFSET
+            rect = crack_img.get_rect(center=(x, y))
+            self.screen.blit(crack_img, rect)
 
+    @traced(cat='ui')
     def draw_board(self):
         # 背景
         self.screen.fill(BG_COLOR)
@@ -546,173 +568,104 @@ class GameUI:
         # 顶部菜单栏
         self._draw_top_menu()
 
-        # 1. 生成格子编号映射
-        grid_map = [[-1 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        idx = 0
-        # 上边
-        for i in range(GRID_SIZE):
-            grid_map[0][i] = idx; idx += 1
-        # 右边
-        for i in range(1, GRID_SIZE):
-            grid_map[i][GRID_SIZE-1] = idx; idx += 1
-        # 下边
-        for i in range(GRID_SIZE-2, -1, -1):
-            grid_map[GRID_SIZE-1][i] = idx; idx += 1
-        # 左边
-        for i in range(GRID_SIZE-2, 0, -1):
-            grid_map[i][0] = idx; idx += 1
+        # 1. 格子编号 → (行, 列)，格子边长随棋盘大小缩放
+        cell_of = self._grid()
+        cs = self.cell_size
+        labels = cs >= LABEL_CELL_SIZE
+        hu_merging = self.hu_merge_mode == 'selecting_merge'
+        ji_valid = {t.idx for t in self.ji_valid_tiles} if self.ji_mode == 'selecting_to' and not hu_merging else None
 
         # 2. 画格子
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                idx = grid_map[row][col]
-                if idx == -1:
-                    continue
-                x = self.margin + col * CELL_SIZE
-                y = self.margin + row * CELL_SIZE + Y_OFFSET  # 向下偏移20像素
-                rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-
-                # 填充颜色 & 边框
-                tile_info = self.tile_props.get(idx, None)
-                base_color = WHITE if tile_info is None else tile_info['color']
-
-                # 寅虎技能模式下合体的暗化效果
-                if self.hu_merge_mode == 'selecting_merge':
-                    # 暗化整个棋盘
-                    overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-                    overlay.fill((0, 0, 0, 180))
-                    self.screen.blit(overlay, (0, 0))
-
-                    # 仅高亮主体 & 分身格子
-                    for idx in self.hu_merge_cells:
-                        pos = [(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE) if grid_map[r][c] == idx]
-                        if not pos:
-                            continue
-                        r, c = pos[0]
-                        x = self.margin + c * CELL_SIZE
-                        y = self.margin + r * CELL_SIZE + Y_OFFSET    # 向下偏移20像素
-                        rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-                        pygame.draw.rect(self.screen, (0, 255, 0, 180), rect, 5)  # 绿色高亮边框
-                # 酉鸡技能模式下的暗化效果
-                elif self.ji_mode == 'selecting_to':
-                    if idx in [t.idx for t in self.ji_valid_tiles]:
-                        # 可选择的地皮保持原色
-                        final_color = base_color
-                        # 添加高亮边框
-                        pygame.draw.rect(self.screen, base_color, rect)
-                        pygame.draw.rect(self.screen, (255, 255, 0), rect, 3)  # 金色高亮边框
-                    else:
-                        # 其他地皮暗化（降低亮度约1/3）
-                        dark_color = tuple(int(c * 0.4) for c in base_color)
-                        pygame.draw.rect(self.screen, dark_color, rect)
-                        pygame.draw.rect(self.screen, GRID_COLOR, rect, 1)
-                else:
-                    # 正常模式
+        for idx, (row, col) in cell_of.items():
+            x = self.margin + col * cs
+            y = self.margin + row * cs + Y_OFFSET  # 向下偏移20像素
+            rect = pygame.Rect(x, y, cs, cs)
+
+            # 填充颜色 & 边框
+            tile_info = self.tile_props.get(idx, None)
+            base_color = WHITE if tile_info is None else tile_info['color']
+
+            # 酉鸡技能模式下的暗化效果（寅虎合体的暗化在所有格子画完后统一处理）
+            if ji_valid is not None:
+                if idx in ji_valid:
+                    # 可选择的地皮保持原色，添加高亮边框
                     pygame.draw.rect(self.screen, base_color, rect)
+                    pygame.draw.rect(self.screen, (255, 255, 0), rect, 3)  # 金色高亮边框
+                else:
+                    # 其他地皮暗化（降低亮度约1/3）
+                    dark_color = tuple(int(c * 0.4) for c in base_color)
+                    pygame.draw.rect(self.screen, dark_color, rect)
                     pygame.draw.rect(self.screen, GRID_COLOR, rect, 1)
+            else:
+                # 正常模式
+                pygame.draw.rect(self.screen, base_color, rect)
+                pygame.draw.rect(self.screen, GRID_COLOR, rect, 1)
 
-                # 特殊边框
-                if tile_info and tile_info.get('special'):
-                    border_color = SPECIAL_BORDER_COLORS.get(tile_info['special'], (255, 0, 255))
-                    pygame.draw.rect(self.screen, border_color, rect, 4)
-
-                # 绘制特殊格子状态
-                # “裂缝”状态
-                self._draw_tile_cracks()
+            # 特殊边框
+            if tile_info and tile_info.get('special'):
+                border_color = SPECIAL_BORDER_COLORS.get(tile_info['special'], (255, 0, 255))
+                pygame.draw.rect(self.screen, border_color, rect, 4)
 
-                # 左上角编号
+            # 左上角编号
+            if labels:
                 pygame.draw.circle(self.screen, BLACK, (x + 13, y + 13), 10)
                 idx_text = FONT_INDEX.render(str(idx), True, WHITE)
                 self.screen.blit(idx_text, idx_text.get_rect(center=(x + 13, y + 13)))
 
-                # 底部名称
-                if tile_info and tile_info.get('name'):
-                    name = tile_info['name']
-                    max_w = CELL_SIZE - 8
-                    size = 18
-                    min_size = 10
-                    while size >= min_size:
-                        f = get_chinese_font(size)
-                        try: f.set_bold(True)
-                        except: pass
-                        test = f.render(name, True, (40, 40, 40))
-                        if test.get_width() <= max_w: break
-                        size -= 1
-                    name_text = test
-                    name_rect = name_text.get_rect(midbottom=(x + CELL_SIZE//2, y + CELL_SIZE - 4))
-                    self.screen.blit(name_text, name_rect)
-
-                # 所有权五角星
-                tile_obj = self.game.board.tiles[idx]
-                if tile_obj.owner:
-                    star_color = ZODIAC_COLORS.get(tile_obj.owner.zodiac, GOLD)
-                    self._draw_owner_mark((x + CELL_SIZE - 14, y + 14), tile_obj)
+            # 底部名称
+            if labels and tile_info and tile_info.get('name'):
+                name = tile_info['name']
+                max_w = cs - 8
+                size = 18
+                min_size = 10
+                while size >= min_size:
+                    f = get_chinese_font(size)
+                    try: f.set_bold(True)
+                    except: pass
+                    test = f.render(name, True, (40, 40, 40))
+                    if test.get_width() <= max_w: break
+                    size -= 1
+                name_text = test
+                name_rect = name_text.get_rect(midbottom=(x + cs//2, y + cs - 4))
+                self.screen.blit(name_text, name_rect)
+
+            # 所有权五角星
+            tile_obj = self.game.board.tiles[idx]
+            if tile_obj.owner:
+                self._draw_owner_mark((x + cs - 14, y + 14), tile_obj)
+
+        # 绘制特殊格子状态：“裂缝”状态，所有格子画完后统一画一遍
+        self._draw_tile_cracks()
 
         # ---------- 绘制八卦字 ----------
-        self._draw_bagua_tiles(grid_map)
-
-        # 3. 画玩家棋子
-        for i, player in enumerate(self.game.players):
-            # 1. 画主体
-            pos = [(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE) if grid_map[r][c] == player.position]
-            if not pos: continue
-            row, col = pos[0]
-            cx = self.margin + col * CELL_SIZE + CELL_SIZE // 2
-            cy = self.margin + row * CELL_SIZE + CELL_SIZE // 2 + Y_OFFSET    # 高度增加20个像素
-            self._draw_player_sprite(i, cx, cy, alpha=255, player=player, is_clone=False)
-
-            # 2. 画分身
-            # ========== 寅虎分身绘制 ==========
-            if player.zodiac == '虎' and player.has_clone():
-                if player.clone_idx is not None:
-                    pos2 = [(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE)
-                            if grid_map[r][c] == player.clone_idx]
-                    if pos2:
-                        row2, col2 = pos2[0]
-                        cx2 = self.margin + col2*CELL_SIZE + CELL_SIZE//2
-                        cy2 = self.margin + row2*CELL_SIZE + CELL_SIZE//2 + Y_OFFSET    # 高度增加20个像素
-                        self._draw_player_sprite(i, cx2, cy2, alpha=255, player=player, is_clone=True)
-
-            # ========== 寅虎强制合体模式下的特殊绘制 ==========
-            elif player.zodiac == '虎' and self.hu_merge_mode == 'selecting_merge' and self.hu_merge_player == player:
-                # 强制合体模式：确保两个位置都显示图片
-                if player.clone_idx is not None:
-                    pos2 = [(r, c) for r in range(GRID_SIZE) for c in range(GRID_SIZE)
-                            if grid_map[r][c] == player.clone_idx]
-                    if pos2:
-                        row2, col2 = pos2[0]
-                        cx2 = self.margin + col2*CELL_SIZE + CELL_SIZE//2
-                        cy2 = self.margin + row2*CELL_SIZE + CELL_SIZE//2 + Y_OFFSET    # 高度增加20个像素
-                        self._draw_player_sprite(i, cx2, cy2, alpha=255, player=player, is_clone=True)
-
-            # ========== 未羊灵魂出窍半透明灵魂绘制 ==========
-            elif player.zodiac == '羊':
-                skill = player.skill_mgr.skills['羊']
-                soul = skill['soul_pos']
-                if soul is not None and soul != player.position:
-                    soul_pos = [(r, c) for r in range(GRID_SIZE)
-                                        for c in range(GRID_SIZE)
-                                        if grid_map[r][c] == soul]
-                    if soul_pos:
-                        sr, sc = soul_pos[0]
-                        sx = self.margin + sc * CELL_SIZE + CELL_SIZE // 2
-                        sy = self.margin + sr * CELL_SIZE + CELL_SIZE // 2 + Y_OFFSET    # 高度增加20个像素
-                        self._draw_player_sprite(i, sx, sy, alpha=200)
+        self._draw_bagua_tiles(cell_of)
+
+        # 寅虎技能模式下合体的暗化效果：每帧暗化一次，棋子画在其上方
+        if hu_merging:
+            self._draw_hu_merge_overlay(cell_of)
+
+        # 3. 画棋子：主体、寅虎分身、未羊灵魂统一遍历 Game.pieces
+        seat_of = {id(p): i for i, p in enumerate(self.game.players)}
+        for piece in self.game.pieces:
+            cell = cell_of.get(piece.position)
+            if cell is None: continue
+            owner = piece.owner
+            # 灵魂与本体重合时不单独绘制
+            if piece.kind == 'soul' and piece.position == owner.position: continue
+            row, col = cell
+            cx = self.margin + col * cs + cs // 2
+            cy = self.margin + row * cs + cs // 2 + Y_OFFSET    # 高度增加20个像素
+            if piece.kind == 'soul':
+                # 未羊灵魂：半透明
+                self._draw_player_sprite(seat_of[id(owner)], cx, cy, alpha=200)
+            else:
+                self._draw_player_sprite(seat_of[id(owner)], cx, cy, alpha=255,
+                                         player=owner, is_clone=(piece.kind == 'clone'))
 
         # 4. === 地皮悬停检测 ===
-        mouse_pos = pygame.mouse.get_pos()
-        self.hovered_tile = None
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                idx = grid_map[row][col]
-                if idx == -1: continue
-                x = self.margin + col * CELL_SIZE
-                y = self.margin + row * CELL_SIZE + Y_OFFSET  # 向下偏移20像素
-                rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-                if rect.collidepoint(mouse_pos):
-                    self.hovered_tile = idx
-                    break   # 找到一块即可
+        self.hovered_tile = self._tile_at_pos(pygame.mouse.get_pos())
 
+    @traced(cat='ui')
     def draw_info(self):
         # Info area background
         info_x = GRID_SIZE * CELL_SIZE + self.margin * 2
@@ -729,12 +682,8 @@ class GameUI:
 
         # 罗盘按钮
         cur_player = self.game.players[self.game.current_player_idx]
-        is_controlled = 'puppet' in cur_player.status and cur_player.status['puppet'].get('direction') == 'stay'
-        can_spin = (
-            not self.has_rolled
-            and cur_player.can_move
-            and not is_controlled
-        )
+        legal = self.game.actions
+        can_spin = legal.is_legal(Action.ROLL, rolled=self.has_rolled)
         color_spin = (255, 222, 173) if can_spin else (200, 200, 200)
         text_spin  = (139, 69, 19)   if can_spin else (120, 120, 120)
         self.spin_btn_rect = pygame.Rect(info_x+24, btn_y, 140, 44)
@@ -744,16 +693,12 @@ class GameUI:
 
         # 技能按钮
         cur_player = self.game.players[self.game.current_player_idx]
-        can_skill = (
-            not self.has_rolled
-            and cur_player.skill_mgr.can_use_active_skill()
-            and not (cur_player.status.get('puppet', {}).get('direction') == 'stay')
-        )
+        can_skill = legal.skill_available(self.has_rolled)
         color_skill = (176, 224, 230) if can_skill else (200, 200, 200)
         text_skill  = (25, 25, 112)   if can_skill else (120, 120, 120)
         self.skill_btn_rect = pygame.Rect(info_x+24+160, btn_y, 140, 44)
         pygame.draw.rect(self.screen, color_skill, self.skill_btn_rect, border_radius=12)
-        skill_text = '灵魂归位' if cur_player.zodiac == '羊' and cur_player.skill_mgr.skills['羊']['soul_pos'] else '符咒潜能'
+        skill_text = '灵魂归位' if cur_player.zodiac == '羊' and cur_player.soul_pos is not None else '符咒潜能'
         self.screen.blit(FONT.render(skill_text, True, text_skill),
                         (self.skill_btn_rect.x+6, self.skill_btn_rect.y+4))
 
@@ -766,7 +711,7 @@ class GameUI:
 
         # 1. 购地
         self.buy_btn_rect = pygame.Rect(start_x, buy_y, btn_w, 40)
-        buy_ok, reason = self.game.can_buy(cur_player)
+        buy_ok = legal.is_legal(Action.BUY, rolled=self.has_rolled)
         color_buy = (208,240,192) if buy_ok else (200,200,200)
         text_buy  = (0,100,0)     if buy_ok else (120,120,120)
         pygame.draw.rect(self.screen, color_buy, self.buy_btn_rect, border_radius=10)
@@ -780,10 +725,13 @@ class GameUI:
 
         # 2. 加盖
         self.upgrade_btn_rect = pygame.Rect(start_x + btn_w + gap, buy_y, btn_w, 40)
-        up_ok, reason = self.game.can_upgrade(cur_player)
+        up_ok = legal.is_legal(Action.UPGRADE, rolled=self.has_rolled)
         color_up = (255,228,196) if up_ok else (200,200,200)
         text_up  = (139,69,19)   if up_ok else (120,120,120)
         pygame.draw.rect(self.screen, color_up, self.upgrade_btn_rect, border_radius=10)
+        # 建造建议里包含脚下这块地：金边提示
+        if up_ok and any(o.idx == cur_player.position for o in self.game.plan_builds(cur_player)):
+            pygame.draw.rect(self.screen, (218,165,32), self.upgrade_btn_rect, width=3, border_radius=10)
         self.screen.blit(
             FONT_SMALL.render('加盖', True, text_up),
             (
@@ -794,7 +742,7 @@ class GameUI:
 
         # 3. 进阶（技能升级）
         self.advance_btn_rect = pygame.Rect(start_x + (btn_w + gap) * 2, buy_y, btn_w, 40)
-        can_adv = self._can_advance_skill(cur_player)   # 暂未开发进阶功能
+        can_adv = legal.is_legal(Action.ADVANCE, rolled=self.has_rolled)
         color_advance = (220,220,220) if can_adv else (200,200,200)
         text_advance  = (100,50,50)   if can_adv else (120,120,120)
         pygame.draw.rect(self.screen, color_advance, self.advance_btn_rect, border_radius=10)
@@ -859,7 +807,7 @@ class GameUI:
             pygame.draw.rect(self.screen, base_color, box_rect, border_radius=10)
             pygame.draw.rect(self.screen, (180,180,210), box_rect, width=2, border_radius=10)
             # Title
-            title = f"{player.name}（{player.zodiac}）"
+            title = f"{player.name}（{player.zodiac}）· 第{self.game.leaderboard.rank_of(player)}名"
             title_surf = render_fit(title, col_w - 2*box_pad, PLAYER_COLORS[idx%4], bold=True, base=20)
             self.screen.blit(title_surf, (bx + box_pad, by + box_pad - 5))  # 上移 5 像素
             # Lines
@@ -921,17 +869,7 @@ class GameUI:
         max_w = log_rect.width - 48          # 留边距
         lines = []
         for raw in self.log:
-            # 按宽度拆行
-            remain = raw
-            while remain:
-                for i in range(len(remain), 0, -1):
-                    if log_font.render(remain[:i], True, (80, 80, 80)).get_width() <= max_w:
-                        lines.append(remain[:i])
-                        remain = remain[i:]
-                        break
-                else:       # 太长单词，强制拆
-                    lines.append(remain[:1])
-                    remain = remain[1:]
+            lines.extend(self._wrap_log_line(raw, log_font, max_w))
         # 计算可显示行数
         visible_lines = log_rect.height // line_h
         total_lines = len(self.log)
@@ -940,7 +878,7 @@ class GameUI:
 
         # 绘制可见日志
         y = log_rect.y + 4
-        for line in self.log[self.log_scroll:self.log_scroll + visible_lines]:
+        for line in islice(self.log, self.log_scroll, self.log_scroll + visible_lines):
             self.screen.blit(log_font.render(line, True, (80, 80, 80)),
                             (log_rect.x + 8, y))
             y += line_h
@@ -991,7 +929,10 @@ class GameUI:
         effect = effects.get(tile.element, '无')
 
         # 抵押
-        mortgage = price // 2
+        if 'mortgaged' in tile.status:
+            mortgage_line = f'已抵押（赎回 {redeem_cost(price)} 金币）'
+        else:
+            mortgage_line = f'抵押: {mortgage_value(price)} 金币'
 
         # 文本列表
         lines = [
@@ -1006,7 +947,7 @@ class GameUI:
             f'  瓦房: {rent_tile}',
             f'  客栈: {rent_inn}',
             f'  宫殿: {rent_pal}',
-            f'抵押: {mortgage} 金币',
+            mortgage_line,
             f'特效: {effect}'
         ]
         lines = [l for l in lines if l]
@@ -1115,7 +1056,7 @@ class GameUI:
         panel = pygame.Rect(x, y, w, h)
         pygame.draw.rect(self.screen, (250,250,255), panel, border_radius=12)
         pygame.draw.rect(self.screen, (150,150,200), panel, 2, border_radius=12)
-        title_map = {'rules': '规则', 'heroes': '英雄', 'settings': '设置', 'test': '测试'}
+        title_map = {'rules': '规则', 'heroes': '英雄', 'settings': '设置', 'test': '测试', 'game_over': '对局结束'}
         key = self.active_modal if isinstance(self.active_modal, str) else ''
         title = title_map.get(key, '')
         self.screen.blit(FONT.render(title, True, (60,60,90)), (x+16, y+10))
@@ -1124,6 +1065,8 @@ class GameUI:
             self._render_modal_text(content_rect, self._load_modal_text(self.active_modal))
         elif self.active_modal == 'settings':
             self._render_settings(content_rect)
+        elif self.active_modal == 'game_over':
+            self._render_game_over(content_rect)
         # TESTMODE
         elif self.active_modal == 'test':
             self._draw_test_level2_modal()
@@ -1134,6 +1077,27 @@ class GameUI:
         elif self.active_modal == 'shu_skill':
             self._render_shu_skill_modal(content_rect)
 
+    def _wrap_log_line(self, raw: str, font, max_w: int) -> list[str]:
+        """按宽度拆行，结果按原文缓存：每帧只渲染新增的日志"""
+        lines = self._wrap_cache.get(raw)
+        if lines is not None:
+            return lines
+        lines = []
+        remain = raw
+        while remain:
+            for i in range(len(remain), 0, -1):
+                if font.size(remain[:i])[0] <= max_w:
+                    lines.append(remain[:i])
+                    remain = remain[i:]
+                    break
+            else:       # 太长单词，强制拆
+                lines.append(remain[:1])
+                remain = remain[1:]
+        if len(self._wrap_cache) >= LOG_LIMIT * 2:
+            self._wrap_cache.clear()
+        self._wrap_cache[raw] = lines
+        return lines
+
     def _scroll_to_bottom(self):
         """把日志滚动条拉到最底，始终显示最新"""
         log_font = get_chinese_font(18)
@@ -1142,33 +1106,7 @@ class GameUI:
 
     def _get_clicked_tile(self, pos):
         """根据点击位置获取地皮索引"""
-        # 生成格子编号映射（与draw_board中的逻辑一致）
-        grid_map = [[-1 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        idx = 0
-        # 上边
-        for i in range(GRID_SIZE):
-            grid_map[0][i] = idx; idx += 1
-        # 右边
-        for i in range(1, GRID_SIZE):
-            grid_map[i][GRID_SIZE-1] = idx; idx += 1
-        # 下边
-        for i in range(GRID_SIZE-2, -1, -1):
-            grid_map[GRID_SIZE-1][i] = idx; idx += 1
-        # 左边
-        for i in range(GRID_SIZE-2, 0, -1):
-            grid_map[i][0] = idx; idx += 1
-
-        # 检查点击位置
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                idx = grid_map[row][col]
-                if idx == -1: continue
-                x = self.margin + col * CELL_SIZE
-                y = self.margin + row * CELL_SIZE + Y_OFFSET  # 向下偏移20像素
-                rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-                if rect.collidepoint(pos):
-                    return idx
-        return None
+        return self._tile_at_pos(pos)
 
     def handle_click(self, pos):
         # 模态框点击优先
@@ -1225,7 +1163,7 @@ class GameUI:
                     self.log.append(f'{fmt_name(cur)} 本回合已转动罗盘，无法再使用技能')
                     self._scroll_to_bottom()
                     return
-                ok, msg = cur.skill_mgr.use_active_skill(game=self.game)
+                ok, msg = self.game.use_skill(cur)
                 self.log.append(msg)
                 if ok:
                     level = cur.skill_mgr.skills['牛']['level']
@@ -1256,7 +1194,7 @@ class GameUI:
                     self._scroll_to_bottom()
                     return
 
-                ok, msg = cur.skill_mgr.use_active_skill(game=self.game)
+                ok, msg = self.game.use_skill(cur)
                 self.log.append(msg)
                 if ok:
                     level = cur.skill_mgr.skills['虎']['level']
@@ -1270,7 +1208,7 @@ class GameUI:
                     self.log.append(f"{fmt_name(cur, 'main')} 回合开始")
             elif cur.zodiac == '兔':
                 # 卯兔无目标
-                ok, msg = cur.skill_mgr.use_active_skill()
+                ok, msg = self.game.use_skill(cur)
                 self.log.append(msg)
             elif cur.zodiac == '羊':
                 # 未羊的技能只能在转动罗盘前使用
@@ -1279,7 +1217,7 @@ class GameUI:
                     self._scroll_to_bottom()
                     return
                 # 未羊无目标
-                ok, msg = cur.skill_mgr.use_active_skill()
+                ok, msg = self.game.use_skill(cur)
                 self.log.append(msg)
             elif cur.zodiac == '鸡':
                 # 酉鸡的技能只能在转动罗盘前使用
@@ -1297,33 +1235,12 @@ class GameUI:
             self._scroll_to_bottom()
             self.draw_info()    # 立即更新
 
-        # ---------------- 技能升级按钮 ----------------
-        elif hasattr(self, 'upgrade_skill_btn_rect') and self.upgrade_btn_rect.collidepoint(pos):
-            if cur.zodiac == '鼠':
-                if cur.skill_mgr.upgrade_shu():
-                    self.log.append(f'{fmt_name(cur)} 升级【灵鼠窃运】成功！')
-                else:
-                    self.log.append(f'{fmt_name(cur)} 灵气不足或条件未满足')
-            elif cur.zodiac == '牛':
-                if cur.skill_mgr.upgrade_niu():
-                    level = cur.skill_mgr.skills['牛']['level']
-                    self.log.append(f'{fmt_name(cur)} 升级【蛮牛冲撞】至{level.name}级成功！')
-                    upgraded = True
-            elif cur.zodiac == '虎':
-                if cur.skill_mgr.upgrade_hu():
-                    level = cur.skill_mgr.skills['虎']['level']
-                    level_name = {SkillLevel.II: 'II', SkillLevel.III: 'III'}[level]
-                    self.log.append(f'{fmt_name(cur)} 升级【猛虎分身】至{level_name}级成功！')
-                    upgraded = True
-            elif cur.zodiac == '兔':
-                if cur.skill_mgr.upgrade_tu():
-                    self.log.append(f'{fmt_name(cur)} 升级【玉兔疾行】成功！')
-                    upgraded = True
-            elif cur.zodiac == '鸡':
-                if cur.skill_mgr.upgrade_ji():
-                    self.log.append(f'{fmt_name(cur)} 升级【金鸡腾翔】成功！')
-                    upgraded = True
-            if not upgraded:
+        # ---------------- 技能进阶按钮 ----------------
+        elif hasattr(self, 'advance_btn_rect') and self.advance_btn_rect.collidepoint(pos):
+            if cur.skill_mgr.upgrade():
+                level = cur.skill_mgr.skills[cur.zodiac]['level']
+                self.log.append(f'{fmt_name(cur)} 升级【{SKILL_REGISTRY[cur.zodiac].name}】至{level.name}级成功！')
+            else:
                 self.log.append(f'{fmt_name(cur)} 灵气不足或条件未满足')
             self._scroll_to_bottom()
             self.draw_info()    # 立即更新
@@ -1338,7 +1255,7 @@ class GameUI:
                 self.log.append(reason)
             # 同步日志
             while self.game.log:
-                self.log.append(self.game.log.pop(0))
+                self.log.append(self.game.log.popleft())
             self._scroll_to_bottom()
             self.draw_info()    # 立即更新
 
@@ -1351,7 +1268,7 @@ class GameUI:
                 self.log.append(reason)
             # 同步日志
             while self.game.log:
-                self.log.append(self.game.log.pop(0))
+                self.log.append(self.game.log.popleft())
             self._scroll_to_bottom()
             self.draw_info()    # 立即更新
 
@@ -1362,16 +1279,15 @@ class GameUI:
 
             # 把游戏日志同步到 UI 日志
             while self.game.log:
-                self.log.append(self.game.log.pop(0))
+                self.log.append(self.game.log.popleft())
 
-            # 检查寅虎是否需要强制合体
-            cur = self.game.players[self.game.current_player_idx]
-            if cur.status.pop('tiger_force_merge', False):
-                # 分身回合已结束，但 clone_idx 还在 → 需要玩家手动合体
-                self.hu_merge_player = cur
-                self.hu_merge_cells  = [cur.position, cur.clone_idx]
-                self.hu_merge_mode   = 'selecting_merge'
-                # return
+            # 检查寅虎是否需要强制合体（最后一个分身子回合刚结束）
+            for p in self.game.players:
+                if p.status.pop('tiger_force_merge', False):
+                    # 分身回合已结束，但 clone_idx 还在 → 需要玩家手动合体
+                    self.hu_merge_player = p
+                    self.hu_merge_cells  = [p.position, p.clone_idx]
+                    self.hu_merge_mode   = 'selecting_merge'
 
             self._scroll_to_bottom()
             self.draw_info()
@@ -1474,12 +1390,12 @@ class GameUI:
 
         # 将游戏日志同步到UI日志
         while self.game.log:
-            self.log.append(self.game.log.pop(0))
+            self.log.append(self.game.log.popleft())
         self._scroll_to_bottom()
 
         # 详细的移动日志
         if final_steps == 0:
-            if player.zodiac == '羊' and player.skill_mgr.skills['羊']['soul_pos'] is not None:
+            if player.soul_pos is not None:
                 self.log.append(f'{fmt_name(player)} 本体留在原地')
             else:
                 self.log.append(f'{fmt_name(player)} 被迫停留在原地')
@@ -1492,7 +1408,7 @@ class GameUI:
         # 触发格子效果
         self.game.after_trigger(player)
         while self.game.log:
-            self.log.append(self.game.log.pop(0))
+            self.log.append(self.game.log.popleft())
         self._scroll_to_bottom()
 
     def use_skill(self):
@@ -1678,6 +1594,15 @@ class GameUI:
             self.screen.blit(font.render(ln, True, (30,30,30)), (rect.x, y))
             y += line_h
 
+    def _render_game_over(self, rect):
+        """结算面板：结束原因、胜者与最终名次"""
+        game = self.game
+        lines = [game.end_reason, f"胜者：{fmt_name(game.winner)}" if game.winner else "无人胜出", '']
+        for rank, p in enumerate(game.standings, 1):
+            tag = "（破产）" if p.bankrupt else f"净资产 {p.net_worth}"
+            lines.append(f"第{rank}名 {fmt_name(p)} {tag}")
+        self._render_modal_text(rect, '\n'.join(lines))
+
     def _render_settings(self, rect):
         # 简易音量滑条
         label = FONT_SMALL.render('音量', True, (40,40,40))
@@ -1791,45 +1716,14 @@ class GameUI:
     def _start_ji_landing_selection(self):
         """开始酉鸡技能降落点选择模式"""
         cur = self.game.players[self.game.current_player_idx]
-        level = cur.skill_mgr.skills['鸡']['level']
-
         # 检查当前位置是否符合起飞条件
         current_tile = self.game.board.tiles[cur.position]
-
-        def allow_start(t):
-            return t.owner == cur or (t.owner is None and self.game._is_property_tile(t)) or t.special in ('start', 'encounter', 'hospital')
-
-        # 添加对特殊格子（公共格子）的支持
-        def is_public_special(t):
-            return t.special in ('start', 'encounter', 'hospital')
-
-        if not (allow_start(current_tile) or is_public_special(current_tile)):
+        if not cur.skill_mgr.ji_can_take_off(self.game, current_tile):
             self.log.append(f'{fmt_name(cur)} 当前位置无法起飞')
             return
 
-        # 根据技能等级确定可降落的地皮，包含特殊格子
-        if level == SkillLevel.I:
-            valid_tiles = [t for t in self.game.board.tiles
-                        if allow_start(t) or is_public_special(t)]
-        elif level == SkillLevel.II:
-            valid_tiles = [t for t in self.game.board.tiles
-                        if (t.owner is None and self.game._is_property_tile(t)) or is_public_special(t)]
-        else:  # SkillLevel.III
-            valid_tiles = [t for t in self.game.board.tiles
-                        if self.game._is_property_tile(t) or is_public_special(t)]
-
-        # 过滤掉当前位置
-        self.ji_valid_tiles = [t for t in valid_tiles if t.idx != cur.position]
-
-        # 验证距离限制（拐角数）
-        final_valid_tiles = []
-        max_corners = {SkillLevel.I: 0, SkillLevel.II: 1, SkillLevel.III: 2}[level]
-        for tile in self.ji_valid_tiles:
-            corners = cur.skill_mgr._count_corners(cur.position, tile.idx, 48)
-            if corners <= max_corners:
-                final_valid_tiles.append(tile)
-
-        self.ji_valid_tiles = final_valid_tiles
+        # 按技能等级筛选可降落的格子（含拐角数限制）
+        self.ji_valid_tiles = [self.game.board.tiles[i] for i in cur.skill_mgr.ji_landings(self.game)]
 
         if not self.ji_valid_tiles:
             self.log.append(f'{fmt_name(cur)} 当前等级下无可降落地点')
@@ -1846,10 +1740,7 @@ class GameUI:
         cur = self.game.players[self.game.current_player_idx]
 
         # 执行技能
-        ok, msg = cur.skill_mgr.use_active_skill(
-            option={'from_idx': cur.position, 'to_idx': tile_idx},
-            game=self.game
-        )
+        ok, msg = self.game.use_skill(cur, option={'from_idx': cur.position, 'to_idx': tile_idx})
         self.log.append(msg)
         self._scroll_to_bottom()
 
@@ -1862,6 +1753,8 @@ class GameUI:
         self.ji_valid_tiles = []
 
     def _modal_handle_click(self, pos):
+        if self.active_modal == 'game_over':
+            return True         # 对局已结束：结算面板不关闭，棋盘不再接受操作
         if self.active_modal == 'settings':
             w = int(self.width * 0.66)
             h = int(self.height * 0.7)
@@ -1898,14 +1791,14 @@ class GameUI:
                 for key in ('backward', 'stay'):
                     btn = getattr(self, f'_shu_dir_btn_{key}', None)
                     if btn and btn.collidepoint(pos):
-                        ok, msg = cur.skill_mgr.use_shu([self.shu_target], key)
+                        ok, msg = self.game.use_skill(cur, [self.shu_target], key)
 
                         # 把游戏日志同步到 UI 日志
                         self.log.append(msg)
 
                         if ok:
                             # 立即追加详细日志
-                            if cur.skill_mgr.skills['鼠']['level'] != SkillLevel.III.value:
+                            if cur.skill_mgr.skills['鼠']['level'] != SkillLevel.III:
                                 turn = 1
                             else:
                                 turn = 2
@@ -1953,7 +1846,7 @@ class GameUI:
                         self.ji_sub_modal = next_phase
                         return True
                     elif k == 'to_idx':
-                        ok, msg = cur.skill_mgr.use_active_skill(option={'from_idx': self.ji_from, 'to_idx': tile.idx})
+                        ok, msg = self.game.use_skill(cur, option={'from_idx': self.ji_from, 'to_idx': tile.idx})
                         self.log.append(msg)
                         self._scroll_to_bottom()
                         self.active_modal = None
@@ -1979,6 +1872,7 @@ class GameUI:
                 for case_id in range(1, 5):  # 1~4
                     btn = getattr(self, f'_test_l3_btn_{case_id}', None)
                     if btn and btn.collidepoint(pos):
+                        from game_test import run_buy_test_case
                         run_buy_test_case(case_id, self)
                         self.active_modal = None
                         return True
@@ -1986,6 +1880,7 @@ class GameUI:
                 for case_id in range(1, 5):
                     btn = getattr(self, f'_test_l3_btn_{case_id}', None)
                     if btn and btn.collidepoint(pos):
+                        from game_test import run_upgrade_test_case
                         run_upgrade_test_case(case_id, self)
                         self.active_modal = None
                         return True
@@ -2001,8 +1896,8 @@ class GameUI:
             elif l2_key == "bagua_lingqi":
                 for idx, (label, case_id) in enumerate([("乾",1),("坤",2),("震",3),("巽",4),("坎",5),("离",6),("艮",7),("兑",8)], 1):
                     btn = getattr(self, f'_test_l3_btn_{case_id}', None)
-                    from game_test import run_bagua_test_case
                     if btn and btn.collidepoint(pos):
+                        from game_test import run_bagua_test_case
                         if label == "乾":
                             run_bagua_test_case("乾", self)
                         elif label == "坤":
@@ -2052,31 +1947,6 @@ class GameUI:
             return '\n'.join(lines)
         return ''
 
-    def _can_advance_skill(self, player):
-        if not hasattr(player, 'skill_mgr'):
-            return False
-        z = player.zodiac
-        if z not in player.skill_mgr.skills:
-            return False
-        sk = player.skill_mgr.skills[z]
-        lvl, used, eng = sk['level'], sk['used'], player.energy
-        if z == '鼠':
-            return (lvl == SkillLevel.I and used >= 3 and eng >= 100) or \
-                (lvl == SkillLevel.II and used >= 6 and eng >= 250)
-        elif z == '牛':
-            return (lvl == SkillLevel.I and used >= 2 and eng >= 150) or \
-                (lvl == SkillLevel.II and used >= 4 and eng >= 300)
-        elif z == '虎':
-            return (lvl == SkillLevel.I and used >= 2 and eng >= 200) or \
-                (lvl == SkillLevel.II and used >= 4 and eng >= 400)
-        elif z == '兔':
-            return (lvl == SkillLevel.I and used >= 3 and eng >= 100) or \
-                (lvl == SkillLevel.II and used >= 6 and eng >= 200)
-        elif z == '鸡':
-            return (lvl == SkillLevel.I and used >= 3 and eng >= 200) or \
-                (lvl == SkillLevel.II and used >= 6 and eng >= 400)
-        return False
-
     def run(self):
         log_font = get_chinese_font(18)          # 提前拿到字体，供滚轮使用
         line_h   = log_font.get_linesize()
@@ -2105,6 +1975,10 @@ class GameUI:
                             self.log.append('取消技能选择')
                             self._scroll_to_bottom()
 
+            if self.game.game_over and self.active_modal != 'game_over':
+                self.active_modal = 'game_over'
+                self.modal_scroll = 0
+
             self.draw_board()
             self.draw_info()
             pygame.display.flip()
@@ -0,0 +1,77 @@
+# game_scheduler.py
+# 回合调度：行动者队列，统一处理普通回合、寅虎分身子回合与额外回合
+
+from collections import deque
+from typing import NamedTuple, Callable, Sequence
+
+
+class Turn(NamedTuple):
+    actor: object           # 行动玩家（Player）
+    piece: str = 'main'     # 本回合操控的棋子：'main' 主体【阳】 / 'clone' 分身【阴】
+    extra: bool = False     # 是否为额外回合（技能或奇遇追加）
+
+
+class TurnScheduler:
+    """
+    行动者队列调度器。
+    - 座次按玩家顺序轮转，每轮到一名玩家就把他的所有棋子展开成若干子回合放入队列；
+    - 独立回合 turn：座次每前进一位 +1（子回合、额外回合不计入）；
+    - 大回合 round：座次绕回首位时 +1；
+    - 额外回合：grant_extra_turn 把子回合插到队首，下一次 advance 立即执行；
+    - 出局玩家（pieces_of 返回空）的座次直接跳过，不计入独立回合。
+    每次 advance 只做一次出队或一次座次前进（外加跳过出局座次），与棋子数无关。
+    """
+
+    def __init__(self, players: Sequence, pieces_of: Callable = None):
+        self.players = players
+        self.pieces_of = pieces_of or (lambda player: ('main',))
+        self.seat = 0           # 当前座次（players 下标）
+        self.turn = 1           # 独立回合
+        self.round = 1          # 游戏大回合
+        self.pending = deque()  # 当前座次尚未进行的子回合 / 额外回合
+        self.current = self._expand(players[0]) if players else None
+
+    def _expand(self, actor) -> Turn:
+        pieces = self.pieces_of(actor) or ('main',)
+        for piece in pieces[1:]:
+            self.pending.append(Turn(actor, piece))
+        return Turn(actor, pieces[0])
+
+    @property
+    def actor(self):
+        return self.current.actor
+
+    @property
+    def in_sub_turn(self) -> bool:
+        """当前是否为分身子回合或额外回合"""
+        return self.current.piece != 'main' or self.current.extra
+
+    def grant_extra_turn(self, actor=None, piece: str = 'main'):
+        """在当前回合结束后，立即追加一个额外回合（默认给当前玩家）"""
+        self.pending.appendleft(Turn(actor or self.current.actor, piece, True))
+
+    def advance(self) -> Turn:
+        """结束当前回合，返回下一个回合"""
+        if self.pending:
+            self.current = self.pending.popleft()
+            return self.current
+
+        for _ in range(len(self.players)):
+            self.seat = (self.seat + 1) % len(self.players)
+            if self.seat == 0:
+                self.round += 1
+            if self.pieces_of(self.players[self.seat]):
+                break
+        self.turn += 1
+        self.current = self._expand(self.players[self.seat])
+        return self.current
+
+    def drop(self, actor):
+        """移除某玩家尚未进行的子回合（如破产出局）"""
+        self.pending = deque(t for t in self.pending if t.actor is not actor)
+
+    def set_seat(self, seat: int):
+        """直接跳到某个座次（测试模式、读档用），清空未完成的子回合"""
+        self.pending.clear()
+        self.seat = seat
+        self.current = self._expand(self.players[seat])
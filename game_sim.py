@@ -0,0 +1,91 @@
+# game_sim.py
+# 无界面对局驱动：按合法动作随机行动，供基准测试、模糊测试与长时间运行测试共用
+
+import random
+from typing import Optional
+
+from game_actions import Action
+from game_core import EndConditions, Game
+from game_factory import GameFactory
+from game_layout import BoardLayout
+
+ZODIACS = ['鼠', '牛', '虎', '兔', '羊', '鸡', '马', '狗']
+
+_FACTORIES: dict = {}       # 棋盘 → GameFactory
+
+
+def new_game(seed: int, n_players: int = 4, zodiacs: Optional[list[str]] = None,
+             layout: Optional[BoardLayout] = None, end_conditions: Optional[EndConditions] = None) -> Game:
+    """固定种子建局：同一 seed 得到同样的棋盘与生肖；按棋盘复用 GameFactory，结果与 Game() 相同"""
+    random.seed(seed)
+    zodiacs = zodiacs or random.Random(seed).sample(ZODIACS, n_players)
+    factory = _FACTORIES.get(layout)
+    if factory is None:
+        factory = _FACTORIES[layout] = GameFactory(layout)
+    return factory.new_game([f"p{i}" for i in range(len(zodiacs))], zodiacs, end_conditions=end_conditions)
+
+
+def play_turn(game: Game, rng: random.Random, skill_rate: float = 0.3) -> None:
+    """
+    当前行动者走完一个子回合，流程与界面一致：
+    技能（转罗盘前）→ 罗盘与移动 → 停留结算 → 购地 / 加盖 / 进阶 → 回合结束
+    """
+    player = game.players[game.current_player_idx]
+    legal = game.actions
+
+    # 寅虎待合体
+    if legal.is_legal(Action.MERGE_MAIN) and player.skill_mgr.skills['虎']['split_turns'] == 0:
+        player.skill_mgr._merge_clones(rng.choice(('main', 'clone')))
+
+    # 主动技能
+    if rng.random() < skill_rate:
+        choices = [(a, arg) for a, arg in legal.actions()
+                   if a in (Action.SKILL, Action.TARGET, Action.LAND)]
+        if choices:
+            action, arg = rng.choice(choices)
+            if action == Action.TARGET:
+                game.use_skill(player, [game.players[arg]], rng.choice(('backward', 'stay')))
+            elif action == Action.LAND:
+                game.use_skill(player, option={'from_idx': player.position, 'to_idx': arg})
+            else:
+                game.use_skill(player)
+
+    # 罗盘与移动
+    if legal.is_legal(Action.ROLL):
+        dice = game.spin_wheel()
+        if player.status.get('skip_turns', 0) > 0:
+            player.status['skip_turns'] -= 1
+        elif player.status.get('hibernate', 0) <= 0:
+            game.move_player(player, player.move_step(dice))
+            game.after_trigger(player)
+    if game.game_over:
+        return
+
+    # 购地 / 加盖 / 进阶
+    if legal.is_legal(Action.BUY, rolled=True):
+        game.buy_property(player)
+    elif (legal.is_legal(Action.UPGRADE, rolled=True)
+          and any(o.idx == player.position for o in game.plan_builds(player, 2000))):
+        game.upgrade_building(player)
+    if legal.is_legal(Action.ADVANCE, rolled=True):
+        player.skill_mgr.upgrade()
+
+    game.next_turn()
+
+
+def play(game: Game, turns: int, rng: Optional[random.Random] = None, keep_log: bool = False) -> Game:
+    """连续进行 turns 个子回合（对局结束提前停止）"""
+    rng = rng or random.Random(0)
+    for _ in range(turns):
+        if game.game_over:
+            break
+        play_turn(game, rng)
+        if not keep_log:
+            game.log.clear()
+    return game
+
+
+def midgame(seed: int = 7, turns: int = 60, n_players: int = 4) -> Game:
+    """中盘局面：固定种子下走 turns 个子回合，地皮已买、建筑已盖"""
+    game = new_game(seed, n_players)
+    return play(game, turns, random.Random(seed))
@@ -0,0 +1,253 @@
+# game_soak.py
+# 长时间运行测试：连续进行上万个子回合（对局结束即换下一局，同一进程内），
+# 每 N 个子回合采样一次 RSS、tracemalloc、子回合耗时、帧耗时与各容器长度，出现增长趋势即判为失败。
+# 采样前先 gc.collect()，内存只统计仍然可达的对象
+#
+# 用法：
+#   python game_soak.py --turns 20000                      无界面
+#   python game_soak.py --turns 10000 --ui                 带界面（SDL dummy 驱动，不弹窗口）
+#   python game_soak.py --turns 50000 --no-tracemalloc     只看 RSS 与耗时，不拖慢运行
+#   python game_soak.py -o soak.json                       采样结果写成 JSON
+#   python game_soak.py --board-size 1000                  大棋盘
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from statistics import mean, median
+from time import perf_counter_ns
+
+from game_constants import LOG_LIMIT
+from game_layout import BoardLayout, load_layout
+from game_sim import new_game, play_turn
+from game_trace import TRACER
+
+
+def rss_bytes() -> int:
+    """当前常驻内存；没有 /proc 时退回到 getrusage 的峰值"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+# 按设计随单局长度增长的容器：只报告，不参与趋势判断
+PER_GAME_RECORDS = ('ledger',)
+
+
+def container_caps(game, view=None) -> dict:
+    """有上限的容器及其上限：在上限以内涨落不算增长，超出上限才报告"""
+    caps = {
+        'game.log': LOG_LIMIT,
+        'destroyed_tiles': len(game.board.tiles),     # 转手时从原主人移出，全体合计不超过格子数
+    }
+    if view is not None:
+        caps['ui.log'] = LOG_LIMIT
+        caps['ui.wrap_cache'] = LOG_LIMIT * 2         # 满了整体清空
+    return caps
+
+
+def container_sizes(game, view=None) -> dict:
+    """可能随运行时间增长的容器"""
+    sizes = {
+        'game.log': len(game.log),
+        'destroyed_tiles': sum(len(p.destroyed_tiles) for p in game.players),
+        'energy_events': sum(len(p.status.get('energy_events', ())) for p in game.players),
+        'ledger': len(game.ledger),
+        'trace.spans': len(TRACER.spans),
+    }
+    if view is not None:
+        sizes['ui.log'] = len(view.log)
+        sizes['ui.wrap_cache'] = len(view._wrap_cache)
+    return sizes
+
+
+class SoakUI:
+    """在 SDL dummy 驱动上挂一个 GameUI，每个子回合后同步日志并绘制一帧"""
+
+    def __init__(self, game):
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        import pygame
+        import game_pygame_ui
+        self.pygame = pygame
+        self.view = game_pygame_ui.GameUI()
+        self.attach(game)
+
+    def attach(self, game):
+        view = self.view
+        view.game = game
+        view.player_sprites = view._load_player_sprites()
+
+    def frame(self) -> int:
+        """同步日志并绘制一帧，返回耗时（纳秒）"""
+        view = self.view
+        start = perf_counter_ns()
+        while view.game.log:
+            view.log.append(view.game.log.popleft())
+        view._scroll_to_bottom()
+        self.pygame.event.pump()
+        view.draw_board()
+        view.draw_info()
+        self.pygame.display.flip()
+        return perf_counter_ns() - start
+
+
+def soak(turns: int, every: int, seed: int, ui: bool = False, trace_mem: bool = True,
+         skill_rate: float = 0.3, verbose: bool = True, layout: BoardLayout = None) -> dict:
+    """连续运行 turns 个子回合，返回采样记录与 tracemalloc 增长最多的分配点"""
+    rng = random.Random(seed)
+    games = 1
+    game = new_game(seed, layout=layout)
+    screen = SoakUI(game) if ui else None
+    view = screen.view if screen else None
+
+    if trace_mem:
+        tracemalloc.start()
+    baseline = None
+    samples = []
+    turn_ns, frame_ns = [], []
+
+    for n in range(1, turns + 1):
+        if game.game_over:
+            game = new_game(seed + games, layout=layout)
+            games += 1
+            if screen:
+                screen.attach(game)
+
+        start = perf_counter_ns()
+        play_turn(game, rng, skill_rate)
+        turn_ns.append(perf_counter_ns() - start)
+        if screen:
+            frame_ns.append(screen.frame())
+
+        if n % every == 0:
+            gc.collect()        # 已结束对局的循环引用等待回收，不算作增长
+            sample = {
+                'turn': n,
+                'games': games,
+                'rss': rss_bytes(),
+                'traced': tracemalloc.get_traced_memory()[0] if trace_mem else 0,
+                'turn_p50_us': median(turn_ns) / 1000,
+                'turn_p99_us': _percentile(turn_ns, 0.99) / 1000,
+                'frame_p50_ms': median(frame_ns) / 1e6 if frame_ns else 0.0,
+                'frame_p99_ms': _percentile(frame_ns, 0.99) / 1e6,
+                'sizes': container_sizes(game, view),
+                'caps': container_caps(game, view),
+            }
+            samples.append(sample)
+            turn_ns.clear()
+            frame_ns.clear()
+            if trace_mem and baseline is None:
+                baseline = tracemalloc.take_snapshot()      # 第一次采样之后作为基线，跳过导入与预热
+            if verbose:
+                print(f"{n:>7} 回合 {games:>4} 局  RSS {sample['rss'] / 2**20:7.1f} MiB  "
+                      f"traced {sample['traced'] / 2**20:6.1f} MiB  "
+                      f"子回合 p50 {sample['turn_p50_us']:7.0f} µs p99 {sample['turn_p99_us']:7.0f} µs"
+                      + (f"  帧 p50 {sample['frame_p50_ms']:6.2f} ms" if ui else ''))
+
+    top = []
+    if trace_mem:
+        if baseline is not None:
+            diff = tracemalloc.take_snapshot().compare_to(baseline, 'lineno')
+            top = [(str(d.traceback), d.size_diff, d.count_diff) for d in diff[:10]]
+        tracemalloc.stop()
+    return {'samples': samples, 'top_allocators': top}
+
+
+def _slope(xs: list, ys: list) -> float:
+    """最小二乘斜率"""
+    mx, my = mean(xs), mean(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var if var else 0.0
+
+
+def find_trends(samples: list, max_growth_kib: float, max_slowdown: float) -> list[str]:
+    """
+    在预热（第一个采样）之后检查增长趋势：
+    - 内存：每千回合增长超过 max_growth_kib（有 tracemalloc 时看 traced，否则看 RSS）
+    - 耗时：最后三分之一采样的中位耗时比最前三分之一慢 max_slowdown 倍以上
+    - 容器：最后三分之一的最小长度仍大于最前三分之一的最大长度，即持续增长（流水账除外）；
+      有上限的容器（game.log、界面日志缓存、destroyed_tiles 等）只检查是否超出上限
+    """
+    samples = samples[1:]
+    if len(samples) < 3:
+        return []
+    errors = []
+    turns = [s['turn'] for s in samples]
+    key = 'traced' if samples[0]['traced'] else 'rss'
+    growth = _slope(turns, [s[key] for s in samples]) * 1000 / 1024
+    if growth > max_growth_kib:
+        errors.append(f"[内存] {key} 每千回合增长 {growth:,.1f} KiB，上限 {max_growth_kib:,.1f}")
+
+    third = max(1, len(samples) // 3)
+    head, tail = samples[:third], samples[-third:]
+    for metric in ('turn_p50_us', 'frame_p50_ms'):
+        before = mean(s[metric] for s in head)
+        after = mean(s[metric] for s in tail)
+        if before and after / before > max_slowdown:
+            errors.append(f"[耗时] {metric} 由 {before:,.2f} 变为 {after:,.2f}（{after / before:.2f}x）")
+
+    for name in samples[0]['sizes']:
+        if name in PER_GAME_RECORDS:
+            continue
+        cap = samples[0]['caps'].get(name)
+        if cap is not None:
+            over = max(s['sizes'][name] - s['caps'][name] for s in samples)
+            if over > 0:
+                errors.append(f"[容器] {name} 超出上限 {over}")
+            continue
+        if min(s['sizes'][name] for s in tail) > max(s['sizes'][name] for s in head):
+            errors.append(f"[容器] {name} 持续增长：{head[0]['sizes'][name]} → {tail[-1]['sizes'][name]}")
+    return errors
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="长时间运行测试")
+    parser.add_argument('--turns', type=int, default=10000, help="总子回合数（跨多局累计）")
+    parser.add_argument('--every', type=int, default=500, help="每多少子回合采样一次")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ui', action='store_true', help="同时在 SDL dummy 驱动上绘制界面")
+    parser.add_argument('--no-tracemalloc', action='store_true', help="不开启 tracemalloc")
+    parser.add_argument('--max-growth-kib', type=float, default=64, help="每千回合内存增长上限（KiB）")
+    parser.add_argument('--max-slowdown', type=float, default=1.5, help="耗时变慢倍数上限")
+    parser.add_argument('--board', help="棋盘配置 JSON（默认 boards/classic.json）")
+    parser.add_argument('--board-size', type=int, help="覆盖棋盘格子数")
+    parser.add_argument('-o', '--output', help="采样结果 JSON 路径")
+    parser.add_argument('-q', '--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    result = soak(args.turns, args.every, args.seed, args.ui, not args.no_tracemalloc,
+                  verbose=not args.quiet, layout=load_layout(args.board, args.board_size))
+    errors = find_trends(result['samples'], args.max_growth_kib, args.max_slowdown)
+    result['errors'] = errors
+
+    if result['top_allocators']:
+        print("\ntracemalloc 增长最多的分配点（相对第一次采样）：")
+        for where, size, count in result['top_allocators']:
+            print(f"  {size / 1024:+10,.1f} KiB {count:+8} 块  {where}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    for err in errors:
+        print(err)
+    print(f"\n{args.turns} 个子回合，{result['samples'][-1]['games'] if result['samples'] else 1} 局；"
+          f"{'发现增长趋势' if errors else '未发现增长趋势'}")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -23,7 +23,7 @@ def trigger_test_encounter(game, player, tile):
             # 记录当前建筑等级用于日志
             old_level = tile.level.name
             tile.level = BuildingLevel.EMPTY
-            tile.owner = None
+            game.board.transfer([tile.idx], None)
             game.log.append(f"【测试-火灾】摧毁 {fmt_name(player)} 的「{tile.name}」，建筑彻底摧毁，地皮无主")
         else:
             game.log.append(f"【测试-火灾】无效果：「{tile.name}」已是空地")
@@ -204,7 +204,7 @@ def run_upgrade_test_case(case_id: int, ui_instance):
 
     # 统一把底层日志同步到 UI
     while game.log:
-        ui_instance.log.append(game.log.pop(0))
+        ui_instance.log.append(game.log.popleft())
     ui_instance._scroll_to_bottom()
 
 def run_bagua_test_case(bagua_char: str, ui_instance):
@@ -343,7 +343,7 @@ def run_shu_skill_test(level: int, ui_instance):
     shu_player.position = 0
     shu_player.money = 10000
     shu_player.energy = 9999
-    shu_player.skill_mgr.skills['鼠']['level'] = level        # 设定等级
+    shu_player.skill_mgr.skills['鼠']['level'] = SkillLevel(level)        # 设定等级
     shu_player.skill_mgr.skills['鼠']['cooldown'] = 0         # 无冷却
 
     # 2) 让 NPC 站在 5、10 号格方便测试
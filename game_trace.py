@@ -0,0 +1,104 @@
+# game_trace.py
+# 回合阶段耗时追踪：记录各阶段的起止时间，导出为 Chrome trace-event JSON
+# （chrome://tracing 或 https://ui.perfetto.dev 打开即可按时间线查看）
+#
+# 用法：
+#   TRACER.start() ... TRACER.save('trace.json')
+#   或设置环境变量 GAME_TRACE=trace.json，退出时自动保存
+
+import atexit
+import os
+from _thread import get_ident
+from functools import wraps
+from time import perf_counter_ns
+
+
+class Tracer:
+    """
+    只追加的 span 缓冲区。关闭时被 @traced 包装的函数只多一次属性判断；
+    开启时每个 span 追加一个元组，导出时才转换成 JSON 事件。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans: list[tuple] = []    # (名称, 分类, 开始 ns, 时长 ns, 线程号)
+        self._origin = perf_counter_ns()
+        self._main_thread = get_ident()     # 模块导入所在线程，导出时标成 main
+
+    def start(self):
+        self.spans.clear()
+        self._origin = perf_counter_ns()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def record(self, name: str, cat: str, start_ns: int, end_ns: int):
+        self.spans.append((name, cat, start_ns, end_ns - start_ns, get_ident()))
+
+    def span(self, name: str, cat: str = 'game'):
+        """with TRACER.span('结算'): ... 形式的手动 span"""
+        return _Span(self, name, cat)
+
+    def to_chrome(self) -> dict:
+        pid = os.getpid()
+        tids = {}
+        events = []
+        for name, cat, start, dur, thread in self.spans:
+            tid = tids.setdefault(thread, len(tids) + 1)
+            events.append({
+                'name': name, 'cat': cat, 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': (start - self._origin) / 1000, 'dur': dur / 1000,
+            })
+        for thread, tid in tids.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': 'main' if thread == self._main_thread else str(thread)}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path: str):
+        import json         # 只有导出时才需要
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome(), f, ensure_ascii=False)
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'start')
+
+    def __init__(self, tracer, name, cat):
+        self.tracer, self.name, self.cat = tracer, name, cat
+
+    def __enter__(self):
+        self.start = perf_counter_ns() if self.tracer.enabled else 0
+        return self
+
+    def __exit__(self, *exc):
+        if self.start:
+            self.tracer.record(self.name, self.cat, self.start, perf_counter_ns())
+        return False
+
+
+TRACER = Tracer()
+
+
+def traced(name: str = None, cat: str = 'game'):
+    """装饰器：追踪开启时把一次调用记为一个 span，名称默认取函数限定名"""
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            start = perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                TRACER.record(span_name, cat, start, perf_counter_ns())
+        return wrapper
+    return decorate
+
+
+_trace_path = os.environ.get('GAME_TRACE')
+if _trace_path:
+    TRACER.start()
+    atexit.register(TRACER.save, _trace_path)
@@ -0,0 +1,228 @@
+# game_tracking.py
+# 版本号与变更追踪：Tile / Player / SkillManager 共用
+
+import copyreg
+
+
+class Versioned:
+    """
+    混入类：公开属性被赋值、或属性里的 dict/list/set 被原地修改时，
+    version 单调 +1，并把自己登记到所属 Game 的 dirty 集合。
+    缓存（租金报价、UI 面板、格子渲染）、网络增量、自动存档只需比较 version。
+    下划线开头的属性视为内部状态，不计入变更。
+
+    注意：赋给公开属性的普通 dict/list/set 会被【复制】成追踪版本，调用方手里的原对象与属性从此脱钩：
+        lst = [1]; player.properties = lst; lst.append(2)    # player.properties 仍是 [1]
+    赋值之后请始终通过属性本身（player.properties.append(...)）修改。
+    """
+    version = 0
+
+    def __setattr__(self, name, value):
+        if name[0] == '_':
+            object.__setattr__(self, name, value)
+            return
+        object.__setattr__(self, name, track(self, value))
+        self.touch()
+
+    def touch(self):
+        """手动标记一次变更（如修改了嵌套过深、无法自动追踪的数据）"""
+        d = self.__dict__
+        d['version'] = d.get('version', 0) + 1
+        game = self._owning_game()
+        if game is not None:
+            game.dirty.add(self)
+
+    def _owning_game(self):
+        """子类返回所属 Game，未绑定时返回 None"""
+        return None
+
+
+def track(owner, value):
+    """
+    把普通 dict/list/set 复制成会通知 owner 的追踪版本（内置类型无法原地换类）；其他值原样返回。
+    复制后原对象的修改不再反映到属性上，见 Versioned 的说明
+    """
+    cls = type(value)
+    if cls is dict:
+        return TrackedDict(owner, value)
+    if cls is list:
+        return TrackedList(owner, value)
+    if cls is set:
+        return TrackedSet(owner, value)
+    return value
+
+
+def rebind(value, owner):
+    """
+    复制原型对象上的一个属性值给 owner：追踪容器（含嵌套）新建一份并改挂到 owner，
+    普通 dict/list/set 浅复制，其余值（数字、字符串、枚举、None）直接共用。
+    复制过程不触发 touch，version 保持原型的值
+    """
+    cls = type(value)
+    if cls not in _CONTAINERS:
+        return value
+    if cls is TrackedList:
+        return TrackedList(owner, [rebind(v, owner) for v in value])
+    if cls is TrackedSet:
+        return TrackedSet(owner, value)
+    if cls is TrackedDict or cls is StatusDict:
+        copy = cls(owner)
+        for k, v in value.items():
+            dict.__setitem__(copy, k, rebind(v, owner))
+        return copy
+    return cls(value)
+
+
+def _touch(container):
+    owner = getattr(container, '_owner', None)
+    if owner is not None:
+        owner.touch()
+
+
+class TrackedDict(dict):
+    """写操作会通知 owner 的 dict；嵌套的 dict/list 同样被包装"""
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner, data=()):
+        self._owner = owner
+        super().__init__()
+        for k, v in dict(data).items():
+            dict.__setitem__(self, k, track(owner, v))
+
+    # pickle：默认流程先逐项 __setitem__ 再恢复 _owner，会在 _owner 缺失时 touch；
+    # 这里把 owner 与内容一起放进 state，恢复时直接写入，不触发 touch 与状态回调
+    def __reduce__(self):
+        return copyreg.__newobj__, (type(self),), (self._owner, dict(self))
+
+    def __setstate__(self, state):
+        self._owner, data = state
+        dict.update(self, data)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, track(self._owner, value))
+        _touch(self)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        _touch(self)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = dict.pop(self, key)
+            _touch(self)
+            return value
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        item = dict.popitem(self)
+        _touch(self)
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            dict.__setitem__(self, k, track(self._owner, v))
+        _touch(self)
+
+    def clear(self):
+        dict.clear(self)
+        _touch(self)
+
+
+class StatusDict(TrackedDict):
+    """
+    Player.status 专用：除了版本追踪，键的增删还会回调 owner._status_keys_changed(key)，
+    供金币/灵气修正链判断是否需要重新编译（数值更新不回调）。
+    """
+    __slots__ = ()
+
+    def __setitem__(self, key, value):
+        new = key not in self
+        TrackedDict.__setitem__(self, key, value)
+        if new:
+            self._owner._status_keys_changed(key)
+
+    def __delitem__(self, key):
+        TrackedDict.__delitem__(self, key)
+        self._owner._status_keys_changed(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = TrackedDict.pop(self, key)
+            self._owner._status_keys_changed(key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key, value = TrackedDict.popitem(self)
+        self._owner._status_keys_changed(key)
+        return key, value
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def clear(self):
+        keys = list(self)
+        TrackedDict.clear(self)
+        for key in keys:
+            self._owner._status_keys_changed(key)
+
+
+class TrackedList(list):
+    """写操作会通知 owner 的 list"""
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner, data=()):
+        self._owner = owner
+        super().__init__(data)
+
+    def __reduce__(self):
+        return copyreg.__newobj__, (type(self),), (self._owner, list(self))
+
+    def __setstate__(self, state):
+        self._owner, data = state
+        list.extend(self, data)
+
+
+class TrackedSet(set):
+    """写操作会通知 owner 的 set"""
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner, data=()):
+        self._owner = owner
+        super().__init__(data)
+
+    def __reduce__(self):
+        return copyreg.__newobj__, (type(self),), (self._owner, set(self))
+
+    def __setstate__(self, state):
+        self._owner, data = state
+        set.update(self, data)
+
+
+def _notify_after(base, name):
+    method = getattr(base, name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        _touch(self)
+        return result
+    wrapper.__name__ = name
+    return wrapper
+
+for _name in ('append', 'extend', 'insert', 'pop', 'remove', 'clear', 'sort', 'reverse',
+              '__setitem__', '__delitem__', '__iadd__', '__imul__'):
+    setattr(TrackedList, _name, _notify_after(list, _name))
+
+for _name in ('add', 'discard', 'remove', 'pop', 'clear', 'update', 'difference_update',
+              'intersection_update', 'symmetric_difference_update',
+              '__ior__', '__iand__', '__isub__', '__ixor__'):
+    setattr(TrackedSet, _name, _notify_after(set, _name))
+
+# rebind() 需要复制的容器类型
+_CONTAINERS = frozenset((TrackedDict, StatusDict, TrackedList, TrackedSet, dict, list, set))
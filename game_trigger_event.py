@@ -1,22 +1,16 @@
 # game_tigger_event.py
 # 奇遇事件专用逻辑
 
+from __future__ import annotations
+
 import random
-from typing import Dict, List
-from game_core import fmt_name, Game, Player, Tile, Negative, SKILL_NAMES, BuildingLevel
-from game_character_skill import SkillLevel
-from enum import Enum
-
-# 八卦枚举
-class Bagua(Enum):
-    QIAN = "乾"
-    KUN  = "坤"
-    ZHEN = "震"
-    XUN  = "巽"
-    KAN  = "坎"
-    LI   = "离"
-    GEN  = "艮"
-    DUI  = "兑"
+from typing import TYPE_CHECKING, Dict, List
+from game_constants import Bagua, BuildingLevel, Negative, SKILL_NAMES, SkillLevel, fmt_name
+from game_trace import traced
+
+if TYPE_CHECKING:                   # 仅用于类型标注；game_core 在模块级导入本模块
+    from game_core import Game, Player, Tile
+
 
 # 八卦灵气值事件表
 # 文件：game_trigger_event.py
@@ -72,6 +66,7 @@ BAGUA_LINGQI_EVENTS: Dict[Bagua, List[dict]] = {
 }
 
 # ---------- 八卦灵气事件对外接口 ----------
+@traced(cat='game')
 def trigger_bagua_encounter(game: Game, player: Player, tile: Tile):
     """踩到八卦格时调用"""
     if tile.bagua is None:
@@ -79,6 +74,8 @@ def trigger_bagua_encounter(game: Game, player: Player, tile: Tile):
 
     bagua = tile.bagua
     roll = random.random()
+    event = BAGUA_LINGQI_EVENTS[bagua][min(int(roll * 4), 3)]
+    game.events.bagua(player, bagua.value, event['name'])
     # 25% 概率四选一
     if bagua.value == "乾":
         if roll < 0.25:
@@ -157,7 +154,7 @@ def trigger_bagua_encounter(game: Game, player: Player, tile: Tile):
 # ---------- 乾卦专用处理 ----------
 def _handle_qian_1(game: Game, player: Player):
     """云行雨施：立刻 +500 灵气，后续 3 回合每回合 +100"""
-    gain = player.add_energy(500)
+    gain = player.add_energy(500, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【乾·云行雨施】：立刻获得 {gain} 灵气！")
     # 后续 3 回合
     for i in range(1, 4):
@@ -167,7 +164,7 @@ def _handle_qian_1(game: Game, player: Player):
 def _handle_qian_2(game: Game, player: Player):
     """天道盈虚：清零当前灵气，3 回合后返还 50%"""
     lost = player.energy
-    lost = -player.add_energy(-lost)
+    lost = -player.add_energy(-lost, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【乾·天道盈虚】：灵气清零（损失 {lost} 点）！")
     # 3 回合后返还 50%
     refund = lost // 2
@@ -176,7 +173,7 @@ def _handle_qian_2(game: Game, player: Player):
 
 def _handle_qian_3(game: Game, player: Player):
     """飞龙在天：立刻获得5000金币，且下3回合移动步数+2"""
-    gain = player.add_money(5000)
+    gain = player.add_money(5000, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【乾·飞龙在天】：立刻获得 {gain} 金币！")
     # 后续 3 回合移动额外 +2
     for i in range(1, 4):
@@ -196,34 +193,31 @@ def _handle_kun_1(game: Game, player: Player):
     """地载万物：立刻获得 (地皮数量 × 50) 灵气"""
     tiles_owned = len(player.properties)
     gain = tiles_owned * 50
-    gain = player.add_energy(gain)
+    gain = player.add_energy(gain, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【坤·地载万物】：拥有 {tiles_owned} 块地皮，获得 {gain} 灵气！")
 
 def _handle_kun_2(game: Game, player: Player):
     """坤德含章：将当前金币的5%转化为灵气"""
     convert = int(player.money * 0.05)
-    gain = player.add_energy(convert)
-    player.add_money(-convert)
+    gain = player.add_energy(convert, "八卦奇遇")
+    player.spend_money(convert, "八卦奇遇")     # 兑换不是损失，不经过修正链
     player.status["no_money_this_turn"] = 1
     player.status.setdefault("energy_events", []).append((1, "money", 1, "坤·坤德含章"))    # 标记下回合无法获得金币
-    game.log.append(f"{fmt_name(player)} 触发【坤·坤德含章】：消耗 {gain} 金币，转化为 {gain} 灵气！")
+    game.log.append(f"{fmt_name(player)} 触发【坤·坤德含章】：消耗 {convert} 金币，转化为 {gain} 灵气！")
 
 def _handle_kun_3(game: Game, player: Player):
     """厚德载物：立刻修复自身所有被摧毁（曾经有过房子而如今变成空地）的建筑，每修复一个建筑获得1000金币"""
-    to_fix = list(player.destroyed_tiles)   # 先拷贝1，避免在遍历集合的同时又修改集合
-    repaired = 0
+    # 仅修复仍归自己所有、且已沦为空地的格子；shift_levels 会同步移出 destroyed_tiles
+    to_fix = game.board.select(level=BuildingLevel.EMPTY, owner=player, indices=sorted(player.destroyed_tiles))
+    changes = game.board.shift_levels(to_fix, +1)
+    repaired = len(changes)
 
-    for idx in player.properties and to_fix:
-        tile = game.board.tiles[idx]
-        if tile.level == BuildingLevel.EMPTY and tile.owner == player:
-            tile.level = BuildingLevel.HUT
-            player.destroyed_tiles.discard(idx)  # 移出“被破坏”集合
-            repaired += 1
-            game.log.append(f"{fmt_name(player)} 触发【坤·厚德载物】：修复【{tile.name}】至茅屋")
+    for c in changes:
+        game.log.append(f"{fmt_name(player)} 触发【坤·厚德载物】：修复【{game.board.tiles[c.idx].name}】至茅屋")
 
     if repaired:
         gain = repaired * 1000
-        gain = player.add_money(gain)
+        gain = player.add_money(gain, "八卦奇遇")
         game.log.append(f"{fmt_name(player)} 因修复 {repaired} 个建筑，获得 {gain} 金币！")
     else:
         game.log.append(f"{fmt_name(player)} 触发【坤·厚德载物】：无建筑需要修复")
@@ -237,7 +231,7 @@ def _handle_kun_4(game: Game, player: Player):
 # ---------- 震卦专用处理 ----------
 def _handle_zhen_1(game: Game, player: Player):
     """雷出地奋：立刻获得400点灵气值，并随机震慑一名其他玩家，使其下次获得的灵气值减半。"""
-    player.add_energy(400)
+    player.add_energy(400, "八卦奇遇")
 
     # 随机选择一个其他玩家
     target = game.choose_target_player(player)
@@ -253,7 +247,7 @@ def _handle_zhen_2(game: Game, player: Player):
     """震惧致福：立刻损失250点灵气值(清零为止)，
     但接下来2回合内，每次受到伤害或负面效果时，获得50点灵气值。"""
     lost = min(250, player.energy)
-    player.add_energy(-lost)
+    player.add_energy(-lost, "八卦奇遇")
 
     for i in range(1, 3):
         player.status.setdefault("energy_events", []).append((i, "energy", 50, "震·震惧致福"))
@@ -267,20 +261,18 @@ def _handle_zhen_3(game: Game, player: Player):
             game.log.append(f"{fmt_name(player)} 触发【震·雷霆万钧】：使所有其他玩家立刻损失1000金币")
             continue
         lost = min(1000, p.money)
-        lost = p.add_money(-lost)
+        lost = p.add_money(-lost, "八卦奇遇")
         game.log.append(f"{fmt_name(player)} 遭受【震·雷霆万钧】：{fmt_name(p)} 损失 {lost} 金币！")
     game.log.append("【雷霆万钧】效果结束。")
 
 def _handle_zhen_4(game: Game, player: Player):
     """惊雷破茅：所有建筑等级为1（茅屋）的房屋被震塌"""
-    destroyed = 0
-    for tile in game.board.tiles:
-        if tile.level == BuildingLevel.HUT:
-            tile.level = BuildingLevel.EMPTY
-            if tile.owner is not None:
-                tile.owner.destroyed_tiles.add(tile.idx)
-            destroyed += 1
-            game.log.append(f"{fmt_name(player)} 触发【震·惊雷破茅】：{fmt_name(tile.owner)} 的「{tile.name}」被震塌！")
+    huts = game.board.select(level=BuildingLevel.HUT)
+    changes = game.board.set_levels(huts, BuildingLevel.EMPTY)
+    destroyed = len(changes)
+    for c in changes:
+        owner_name = fmt_name(c.old_owner) if c.old_owner is not None else "无主"
+        game.log.append(f"{fmt_name(player)} 触发【震·惊雷破茅】：{owner_name} 的「{game.board.tiles[c.idx].name}」被震塌！")
     if destroyed == 0:
         game.log.append("【惊雷破茅】触发，但当前没有茅屋可震塌。")
 
@@ -294,13 +286,13 @@ def _handle_xun_1(game: Game, player: Player):
         return
     richest = max(candidates, key=lambda p: p.energy)
     gain = richest.energy // 5
-    gain = player.add_energy(gain)
+    gain = player.add_energy(gain, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【巽·随风赋灵】：复制 {fmt_name(richest)} 20% 灵气，获得 {gain}！")
 
 def _handle_xun_2(game: Game, player: Player):
     """巽·风行灵散：立刻损失当前灵气值的 25%（向下取整），但下次移动步数+3"""
     lost = player.energy // 4
-    lost = -player.add_energy(-lost)
+    lost = -player.add_energy(-lost, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【巽·风行灵散巽·风行灵散】：损失 {lost} 灵气，")
     player.status.setdefault("energy_events", []).append((1, "move", 3, "巽·风行灵散")) # 仅影响下回合
     game.log.append(f"但下次移动额外 +3 步！")
@@ -311,14 +303,16 @@ def _handle_xun_3(game: Game, player: Player):
     step = 1 if player.clockwise else -1
     current = player.position
 
-    # 向前搜索最近的其他玩家
+    # 向前搜索最近的其他玩家棋子（主体或分身）
+    occupied = {pc.position: pc for pc in game.pieces if pc.is_body and pc.owner is not player}
     for offset in range(1, board_len):
         idx = (current + offset * step) % board_len
-        target = next((p for p in game.players if p.position == idx), None)
-        if target is not None and target is not player:
+        target = occupied.get(idx)
+        if target is not None:
             # 交换位置
             player.position, target.position = target.position, player.position
-            game.log.append(f"{fmt_name(player)} 触发【巽·随风巽】：与前方最近的玩家 {fmt_name(target)} 交换位置！")
+            target.owner.touch()
+            game.log.append(f"{fmt_name(player)} 触发【巽·随风巽】：与前方最近的玩家 {fmt_name(target.owner)} 交换位置！")
             return
 
     game.log.append(f"{fmt_name(player)} 触发【巽·随风巽】：前方没有其他玩家，位置不变。")
@@ -334,15 +328,15 @@ def _handle_xun_4(game: Game, player: Player):
 # ---------- 坎卦专用处理 ----------
 def _handle_kan_1(game: Game, player: Player):
     """坎渊悟道：已陷入负面状态数量 × 200 灵气"""
-    negative_count = len([k for k in player.status.keys() if k in Negative])
+    negative_count = sum(ns.value in player.status for ns in Negative)
     gain = negative_count * 200
-    gain = player.add_energy(gain)
+    gain = player.add_energy(gain, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【坎·坎渊悟道】：身陷 {negative_count} 种负面状态，获得 {gain} 灵气！")
 
 def _handle_kan_2(game: Game, player: Player):
     """水流灵逝：损失 300 灵气并被额外禁锢1回合"""
     lost = min(300, player.energy)
-    lost = -player.add_energy(-lost)
+    lost = -player.add_energy(-lost, "八卦奇遇")
     player.status["skip_turns"] = player.status.get("skip_turns", 0) + 1
     game.log.append(f"{fmt_name(player)} 触发【坎·水流灵逝】：损失 {lost} 灵气并被额外禁锢 1 回合！")
 
@@ -352,16 +346,16 @@ def _handle_kan_3(game: Game, player: Player):
     step = -1 if player.clockwise else 1  # 与玩家当前方向相反 = 后方
     trapped = []
 
-    for p in game.players:
-        if p == player:
+    # 计算“后方 12 格”，其中任一棋子（主体或分身）落入即被困
+    behind = {(player.position + offset * step) % board_len for offset in range(1, 13)}
+    caught = []
+    for pc in game.pieces:
+        p = pc.owner
+        if p is player or p in caught or not pc.is_body or pc.position not in behind:
             continue
-        # 计算“后方 12 格”
-        for offset in range(1, 13):
-            idx = (player.position + offset * step) % board_len
-            if p.position == idx:
-                p.status["skip_turns"] = max(p.status.get("skip_turns", 0), 1)
-                trapped.append(fmt_name(p))
-                break
+        p.status["skip_turns"] = max(p.status.get("skip_turns", 0), 1)
+        caught.append(p)
+        trapped.append(fmt_name(p))
 
     if trapped:
         names = ",".join(trapped)
@@ -372,7 +366,7 @@ def _handle_kan_3(game: Game, player: Player):
 def _handle_kan_4(game: Game, player: Player):
     """水洊至习坎：在当前格子召唤“险陷”区域，持续2回合"""
     tile = game.board.tiles[player.position]
-    tile.special = "negative"
+    game.mark_negative(tile)
     tile.status["cracked"] = 2 * len(game.players)   # 2 个大回合
     game.log.append(f"{fmt_name(player)} 触发【坎·水洊至习坎】：格子 {player.position} 出现险陷区域,")
     game.log.append(f"有 50 %概率塌陷，让玩家滞留 1 回合")
@@ -381,16 +375,16 @@ def _handle_kan_4(game: Game, player: Player):
 # ---------- 离卦专用处理 ----------
 def _handle_li_1(game: Game, player: Player):
     """离明顿悟：最高建筑等级 × 250 灵气"""
-    max_level = max((game.board.tiles[i].level.value for i in player.properties), default=0)
+    max_level = game.board.max_level_owned(player).value
     gain = max_level * 250
-    player.add_energy(gain)
+    player.add_energy(gain, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【离·离明顿悟】：最高建筑等级 {max_level}，")
     game.log.append(f"获得 {gain} 灵气！")
 
 def _handle_li_2(game: Game, player: Player):
     """火焚灵耗：损失 350 灵气，随机技能-1级,3回合后恢复"""
     lost = min(350, player.energy)
-    player.add_energy(-lost)
+    player.add_energy(-lost, "八卦奇遇")
 
     # 只拿当前玩家真正学过的技能（已解锁且等级 > 1）
     mgr = player.skill_mgr
@@ -412,7 +406,7 @@ def _handle_li_2(game: Game, player: Player):
 
 def _handle_li_3(game: Game, player: Player):
     """离明火光：立刻随机升级自身 2 块地皮的建筑 1 个等级"""
-    candidates = [idx for idx in player.properties if game.board.tiles[idx].level != BuildingLevel.PALACE]
+    candidates = game.board.owned_by(player, below=BuildingLevel.PALACE)
     if not candidates:
         game.log.append(f"{fmt_name(player)} 触发【离·离明火光】：无可升级地皮")
         return
@@ -434,16 +428,16 @@ def _handle_li_4(game: Game, player: Player):
 
     victim = random.choice(targets)
 
-    # 立即降级并记录租金归属
+    # 立即降级并记录租金归属（临时降级，不计入 destroyed_tiles）
+    changes = game.board.shift_levels(game.board.select(indices=victim.properties, min_level=BuildingLevel.HUT),
+                                      -1, track_destroyed=False)
     downgraded = []
-    for idx in victim.properties:
-        tile = game.board.tiles[idx]
-        if tile.level.value > 0:             # 不降至空地以下
-            tile.level = BuildingLevel(tile.level.value - 1)
-            tile.special = "negative"
-            tile.status["stolen_rent"] = 3 * len(game.players)   # 3 个大回合
-            tile.status["stolen_rent_thief"] = player
-            downgraded.append(idx)
+    for c in changes:
+        tile = game.board.tiles[c.idx]
+        game.mark_negative(tile)
+        tile.status["stolen_rent"] = 3 * len(game.players)   # 3 个大回合
+        tile.status["stolen_rent_thief"] = player
+        downgraded.append(c.idx)
 
     if not downgraded:
         game.log.append(f"{fmt_name(player)} 触发【离·突如其来】：{fmt_name(victim)} 无可降级建筑")
@@ -457,7 +451,7 @@ def _handle_li_4(game: Game, player: Player):
 def _handle_gen_1(game: Game, player: Player):
     """艮止凝元：回合数 × 30 灵气，上限600"""
     gain = min(game.game_turn * 30, 600)
-    gain = player.add_energy(gain)
+    gain = player.add_energy(gain, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【艮·艮止凝元】：回合沉淀，获得 {gain} 灵气！")
 
 def _handle_gen_2(game: Game, player: Player):
@@ -486,21 +480,21 @@ def _handle_gen_4(game: Game, player: Player):
     # 从当前回合算起
     game.log.append(f"{fmt_name(player)} 本回合处于【蛰伏】状态")
     game.log.append(f"每回合获得 1000 金币和 100 灵气")
-    gain_1 = player.add_money(1000)
-    gain_2 = player.add_energy(100)
+    gain_1 = player.add_money(1000, "八卦奇遇")
+    gain_2 = player.add_energy(100, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 本回合获得 {gain_1} 金币和 {gain_2} 灵气")
 
 # ---------- 兑卦专用处理 ----------
 def _handle_dui_1(game: Game, player: Player):
     """兑言纳灵：玩家总数 × 150 灵气"""
     gain = len(game.players) * 150
-    gain = player.add_energy(gain)
+    gain = player.add_energy(gain, "八卦奇遇")
     game.log.append(f"{fmt_name(player)} 触发【兑·兑言纳灵】：众友讲习，获得 {gain} 灵气！")
 
 def _handle_dui_2(game: Game, player: Player):
     """泽涸灵枯：-30% 灵气且下回合无法使用技能"""
     lost = player.energy * 3 // 10
-    lost = -player.add_energy(-lost)
+    lost = -player.add_energy(-lost, "八卦奇遇")
     player.status.setdefault("energy_events", []).append((1, "skill", "", 0, "兑·泽涸灵枯"))    # 下个大回合
     game.log.append(f"{fmt_name(player)} 触发【兑·泽涸灵枯】：流失 {lost} 灵气，下回合无法使用技能！")
 
@@ -515,11 +509,12 @@ def _handle_dui_3(game: Game, player: Player):
     give_amount = player.energy * 3// 4
     receive_amount = target.energy * 3 // 4
 
-    # 实际交换
-    give_amount_1 = -player.add_energy(-give_amount)
-    give_amount_2 = -target.add_energy(-receive_amount)
-    receive_amount_1 = player.add_energy(receive_amount)
-    receive_amount_2 = target.add_energy(give_amount)
+    # 实际交换：送出的部分按原数扣除（交易不是损失，不经过修正链），收到的部分照常结算
+    player.spend_energy(give_amount, "八卦奇遇")
+    target.spend_energy(receive_amount, "八卦奇遇")
+    give_amount_1, give_amount_2 = give_amount, receive_amount
+    receive_amount_1 = player.add_energy(receive_amount, "八卦奇遇")
+    receive_amount_2 = target.add_energy(give_amount, "八卦奇遇")
 
     game.log.append(f"{fmt_name(player)} 触发【兑·欣悦交融】：")
     game.log.append(f"与 {fmt_name(target)} 进行灵气交易：")
@@ -528,7 +523,7 @@ def _handle_dui_3(game: Game, player: Player):
 
 def _handle_dui_4(game: Game, player: Player):
     """言泉流金：立刻免费升级你的一块地皮建筑1个等级（最高至宫殿），并支付该地皮基础地价的金币"""
-    candidates = [idx for idx in player.properties if game.board.tiles[idx].level != BuildingLevel.PALACE]
+    candidates = game.board.owned_by(player, below=BuildingLevel.PALACE)
     if not candidates:
         game.log.append(f"{fmt_name(player)} 触发【兑·言泉流金】：无可升级地皮")
         return
@@ -543,7 +538,7 @@ def _handle_dui_4(game: Game, player: Player):
 
     old_level = tile.level
     tile.level = BuildingLevel(old_level.value + 1)
-    cost = -player.add_money(-cost)
+    player.spend_money(cost, "八卦奇遇")       # 升级的对价，不经过修正链
 
     game.log.append(f"{fmt_name(player)} 触发【兑·言泉流金】：")
     game.log.append(f"支付 {cost} 金币，将【{tile.name}】从 {old_level.name} 升级至 {tile.level.name}")